@@ -0,0 +1,99 @@
+"""
+Measure how much memory each game holds.
+
+Plays whole games through game_manager (every player asks one question,
+answers are scored by exact match so no AI is needed) and reports the
+memory held per game once they are over:
+
+    python benchmark_memory.py --players 5 20 100 --games 10
+"""
+from typing import Dict, List
+import argparse
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("SIMILARITY_WARM", "0")
+
+import game_manager
+import game_store
+
+WORDS = ["dog", "cat", "bird", "fish", "horse", "lion", "tiger", "bear", "wolf", "fox"]
+
+
+def request_string(value: str) -> str:
+    """A copy of a string, as a request body would parse it (not the stored object)."""
+    return json.loads(json.dumps(value))
+
+
+def play_game(name: str, player_count: int, rng: random.Random) -> str:
+    """Play a game of one round and return its id."""
+    game, creator_id = game_manager.create_game(name, "player0")
+    player_ids = [creator_id]
+    for i in range(1, player_count):
+        _, player_id, _ = game_manager.join_game(name, f"player{i}")
+        player_ids.append(player_id)
+    game_manager.start_game(game.game_id, creator_id, 1)
+    
+    while game_store.get_game(game.game_id).status == "playing":
+        turn, _ = game_manager.start_turn(game.game_id)
+        game_manager.submit_question(game.game_id, request_string(turn.questioner_id), "Name an animal")
+        for player_id in player_ids:
+            turn.typing_players[request_string(player_id)] = time.time()
+            game_manager.record_answer(game.game_id, request_string(player_id), rng.choice(WORDS))
+        
+        turn = game_store.get_turn(turn.turn_id)
+        groups: Dict[str, List[str]] = {}
+        for player_id, word in turn.answers.items():
+            groups.setdefault(word, []).append(player_id)
+        scores = game_manager.score_word_groups(turn, game_store.get_game(game.game_id), groups)
+        game_manager.finish_turn(game.game_id, turn.turn_id, scores)
+    return game.game_id
+
+
+def measure(player_count: int, game_count: int, seed: int) -> Dict[str, float]:
+    """
+    Get the bytes held per finished game, as traced by tracemalloc and as
+    estimated by game_store.approximate_size.
+    """
+    rng = random.Random(seed)
+    # Warm up first so one-off allocations (lazy imports, caches) aren't counted
+    play_game(f"warmup{player_count}", player_count, rng)
+    
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    game_ids = [play_game(f"bench{player_count}x{i}", player_count, rng) for i in range(game_count)]
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    
+    estimated = sum(
+        game_store.approximate_size((game_store.get_game(game_id), game_store.get_all_turns(game_id)))
+        for game_id in game_ids
+    )
+    return {
+        "traced": held / game_count,
+        "estimated": estimated / game_count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory held per finished game")
+    parser.add_argument("--players", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--games", type=int, default=10, help="Games played per player count")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    print(f"{'players':>8} {'turns':>6} {'bytes/game':>12} {'bytes/turn':>11} {'estimated':>12}")
+    for player_count in args.players:
+        result = measure(player_count, args.games, args.seed)
+        print(f"{player_count:>8} {player_count:>6} {result['traced']:>12,.0f} "
+              f"{result['traced'] / player_count:>11,.0f} {result['estimated']:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark turn scoring against the local stand-in LLM server.
+
+Groups randomly drawn answer sets the way a scored turn does and reports
+throughput, latency percentiles and how many requests reached the server:
+
+    python benchmark_scoring.py --turns 200 --players 8 --latency 0.3 --error-rate 0.05
+"""
+from typing import Dict, List
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stub_llm_server import StubLLMServer, SYNONYMS
+import word_similarity
+
+
+def answer_pool() -> List[str]:
+    """Words players might give, including synonyms and inflections of each other."""
+    words = set(SYNONYMS) | set(SYNONYMS.values())
+    words |= {word + "s" for word in ("car", "dog", "cat", "couch", "puppy", "kitten")}
+    words |= {"colour", "color", "tree", "apple", "banana", "running", "ran", "house", "home"}
+    return sorted(words)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark turn scoring offline")
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=8, help="Turns scored at once")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    server = StubLLMServer(latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, seed=args.seed).start()
+    os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY", "stub")
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("SIMILARITY_BACKEND", "openai")
+    
+    rng = random.Random(args.seed)
+    pool = answer_pool()
+    turns = [
+        {f"player{i}": rng.choice(pool) for i in range(args.players)}
+        for _ in range(args.turns)
+    ]
+    
+    def score(words: Dict[str, str]) -> float:
+        start = time.perf_counter()
+        word_similarity.group_similar_words(words)
+        return time.perf_counter() - start
+    
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool_executor:
+            durations = list(pool_executor.map(score, turns))
+    finally:
+        server.stop()
+    elapsed = time.perf_counter() - start
+    
+    print(f"backend:     {os.environ['SIMILARITY_BACKEND']}")
+    print(f"turns:       {args.turns} x {args.players} players, {args.concurrency} at once")
+    print(f"throughput:  {args.turns / elapsed:.1f} turns/s")
+    print(f"p50 latency: {percentile(durations, 0.50) * 1000:.1f} ms")
+    print(f"p95 latency: {percentile(durations, 0.95) * 1000:.1f} ms")
+    print(f"requests:    {server.requests} ({server.errors} failed)")
+    print(f"cache:       {word_similarity.verdict_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Word-vector similarity backed by a precomputed, memory-mapped table.
+
+A table is a directory containing:
+- vectors.npy: float32 matrix with one L2-normalized row per word
+- vocab.txt: one word per line, in row order
+
+Set SIMILARITY_EMBEDDINGS_PATH to the directory to enable this tier. The
+matrix is memory-mapped, so loading is cheap and worker processes share
+pages. numpy is listed in requirements.txt; if it is missing anyway (or
+there is no table) the tier is skipped.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import os
+import threading
+
+from word_forms import base_form
+
+
+class EmbeddingTable:
+    """A vocabulary index over a matrix of normalized word vectors."""
+    
+    def __init__(self, vectors, vocab: List[str]):
+        self.vectors = vectors
+        self.index: Dict[str, int] = {word: row for row, word in enumerate(vocab)}
+        # Base forms let inflections find their word (puppies -> puppi <- puppy)
+        self.form_index: Dict[str, int] = {}
+        for row, word in enumerate(vocab):
+            self.form_index.setdefault(base_form(word), row)
+    
+    @classmethod
+    def load(cls, path: str) -> "EmbeddingTable":
+        """Load a table directory, memory-mapping the vectors."""
+        import numpy as np
+        
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(path, "vocab.txt"), encoding="utf-8") as f:
+            vocab = [line.rstrip("\n") for line in f]
+        if len(vocab) != vectors.shape[0]:
+            raise ValueError("vocab.txt and vectors.npy have different lengths")
+        return cls(vectors, vocab)
+    
+    def lookup(self, word: str) -> Optional[int]:
+        """Get the row for a word, trying its base form if the word itself is missing."""
+        word = word.strip().lower()
+        row = self.index.get(word)
+        if row is None:
+            row = self.form_index.get(base_form(word))
+        return row
+    
+    def similarity(self, word1: str, word2: str) -> Optional[float]:
+        """Get the cosine similarity of two words, or None if either is unknown."""
+        row1 = self.lookup(word1)
+        row2 = self.lookup(word2)
+        if row1 is None or row2 is None:
+            return None
+        return float(self.vectors[row1] @ self.vectors[row2])
+    
+    def similar_pairs(self, words: List[str], threshold: float) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """
+        Compare all known words at once.
+        
+        Returns:
+            Tuple of (words found in the table, pairs of them with cosine
+            similarity at or above the threshold)
+        """
+        import numpy as np
+        
+        known = []
+        for word in words:
+            row = self.lookup(word)
+            if row is not None:
+                known.append((word, row))
+        if len(known) < 2:
+            return [word for word, _ in known], []
+        
+        matrix = np.asarray(self.vectors[[row for _, row in known]], dtype=np.float32)
+        scores = matrix @ matrix.T
+        matches = np.argwhere(np.triu(scores >= threshold, k=1))
+        
+        return (
+            [word for word, _ in known],
+            [(known[i][0], known[j][0]) for i, j in matches]
+        )
+
+
+def build_table(path: str, vectors: Dict[str, Sequence[float]]) -> None:
+    """Write a table directory from a word -> vector mapping, normalizing each row."""
+    import numpy as np
+    
+    os.makedirs(path, exist_ok=True)
+    vocab = list(vectors)
+    matrix = np.asarray([vectors[word] for word in vocab], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1, norms)
+    
+    np.save(os.path.join(path, "vectors.npy"), matrix)
+    with open(os.path.join(path, "vocab.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(word.lower() for word in vocab) + "\n")
+
+
+_table: Optional[EmbeddingTable] = None
+_table_path: Optional[str] = None
+_table_lock = threading.Lock()
+
+
+def get_table() -> Optional[EmbeddingTable]:
+    """
+    Get the table configured by SIMILARITY_EMBEDDINGS_PATH, loading it once.
+    
+    Returns:
+        The table, or None if no table is configured or it can't be loaded
+    """
+    global _table, _table_path
+    
+    path = os.getenv("SIMILARITY_EMBEDDINGS_PATH")
+    if not path:
+        return None
+    
+    with _table_lock:
+        if _table_path != path:
+            _table_path = path
+            try:
+                _table = EmbeddingTable.load(path)
+            except Exception as e:
+                print(f"Could not load embeddings from {path}: {e}")
+                _table = None
+        return _table
@@ -1,7 +1,12 @@
-from typing import Tuple, Optional, Dict
+from typing import Tuple, Optional, Dict, List, Set
+import asyncio
+import threading
 import uuid
-from models import Player, Game, Turn
-from game_store import get_game_by_name, save_game, get_game, get_current_turn, save_turn
+from models import Player, Game, Turn, intern_id
+from game_store import get_game_by_name, save_game, get_game, get_current_turn, get_turn, save_turn, game_lock
+import journal
+import scoring_queue
+import usage_ledger
 
 
 def create_game(game_name: str, creator_name: str) -> Tuple[Game, str]:
@@ -16,31 +21,33 @@ def create_game(game_name: str, creator_name: str) -> Tuple[Game, str]:
     if game_name != game_name_lower:
         raise ValueError("Game name must be lowercase")
     
-    # Check if game name already exists
-    existing_game = get_game_by_name(game_name_lower)
-    if existing_game and existing_game.status != "finished":
-        raise ValueError("Game name already exists")
-    
-    # Create game
-    game_id = str(uuid.uuid4())
-    creator_id = str(uuid.uuid4())
-    
-    creator = Player(
-        name=creator_name,
-        player_id=creator_id,
-        is_creator=True
-    )
-    
-    game = Game(
-        game_id=game_id,
-        game_name=game_name_lower,
-        players=[creator],
-        creator_id=creator_id,
-        status="waiting"
-    )
-    
-    save_game(game)
-    return game, creator_id
+    with game_lock(f"name:{game_name_lower}"):
+        # Check if game name already exists
+        existing_game = get_game_by_name(game_name_lower)
+        if existing_game and existing_game.status != "finished":
+            raise ValueError("Game name already exists")
+        
+        # Create game
+        game_id = str(uuid.uuid4())
+        creator_id = str(uuid.uuid4())
+        
+        creator = Player(
+            name=creator_name,
+            player_id=creator_id,
+            is_creator=True
+        )
+        
+        game = Game(
+            game_id=game_id,
+            game_name=game_name_lower,
+            players=[creator],
+            creator_id=creator_id,
+            status="waiting"
+        )
+        
+        save_game(game)
+        journal.record("create", game=game.to_dict())
+        return game, creator_id
 
 
 def join_game(game_name: str, player_name: str) -> Tuple[Game, str, Optional[str]]:
@@ -61,27 +68,32 @@ def join_game(game_name: str, player_name: str) -> Tuple[Game, str, Optional[str
     if not game:
         return None, None, "Game not found"
     
-    if game.status != "waiting":
-        return None, None, "Game is not accepting new players"
-    
-    # Validate player_name is unique (case-insensitive)
-    player_name_lower = player_name.lower()
-    for existing_player in game.players:
-        if existing_player.name.lower() == player_name_lower:
+    with game_lock(game.game_id):
+        # Look up again, the sweeper may have evicted the game before we got the lock
+        game = get_game(game.game_id)
+        if not game:
+            return None, None, "Game not found"
+        
+        if game.status != "waiting":
+            return None, None, "Game is not accepting new players"
+        
+        # Validate player_name is unique (case-insensitive)
+        if game.has_player_name(player_name):
             return None, None, "Player name already taken in this game"
-    
-    # Add player
-    player_id = str(uuid.uuid4())
-    new_player = Player(
-        name=player_name,
-        player_id=player_id,
-        is_creator=False
-    )
-    
-    game.players.append(new_player)
-    save_game(game)
-    
-    return game, player_id, None
+        
+        # Add player
+        player_id = str(uuid.uuid4())
+        new_player = Player(
+            name=player_name,
+            player_id=player_id,
+            is_creator=False
+        )
+        
+        game.add_player(new_player)
+        save_game(game)
+        journal.record("join", game_id=game.game_id, player_id=player_id, name=player_name)
+        
+        return game, player_id, None
 
 
 def start_game(game_id: str, player_id: str, rounds_per_player: int) -> Tuple[bool, Optional[str]]:
@@ -92,34 +104,36 @@ def start_game(game_id: str, player_id: str, rounds_per_player: int) -> Tuple[bo
         Tuple of (success, error_message)
         If error_message is not None, the start failed.
     """
-    game = get_game(game_id)
-    if not game:
-        return False, "Game not found"
-    
-    # Validate player is creator
-    if game.creator_id != player_id:
-        return False, "Only the game creator can start the game"
-    
-    # Validate game status
-    if game.status != "waiting":
-        return False, "Game is not in waiting status"
-    
-    # Validate rounds
-    if rounds_per_player < 1:
-        return False, "Rounds per player must be at least 1"
-    
-    # Validate minimum players
-    if len(game.players) < 3:
-        return False, "At least 3 players are required to start the game"
-    
-    # Start the game
-    game.status = "playing"
-    game.rounds_per_player = rounds_per_player
-    game.current_turn_index = 0
-    game.current_round = 0
-    
-    save_game(game)
-    return True, None
+    with game_lock(game_id):
+        game = get_game(game_id)
+        if not game:
+            return False, "Game not found"
+        
+        # Validate player is creator
+        if game.creator_id != player_id:
+            return False, "Only the game creator can start the game"
+        
+        # Validate game status
+        if game.status != "waiting":
+            return False, "Game is not in waiting status"
+        
+        # Validate rounds
+        if rounds_per_player < 1:
+            return False, "Rounds per player must be at least 1"
+        
+        # Validate minimum players
+        if len(game.players) < 3:
+            return False, "At least 3 players are required to start the game"
+        
+        # Start the game
+        game.status = "playing"
+        game.rounds_per_player = rounds_per_player
+        game.current_turn_index = 0
+        game.current_round = 0
+        
+        save_game(game)
+        journal.record("start", game_id=game_id, rounds=rounds_per_player)
+        return True, None
 
 
 def start_turn(game_id: str) -> Tuple[Turn, Optional[str]]:
@@ -130,40 +144,42 @@ def start_turn(game_id: str) -> Tuple[Turn, Optional[str]]:
         Tuple of (Turn object, error_message)
         If error_message is not None, the start failed.
     """
-    game = get_game(game_id)
-    if not game:
-        return None, "Game not found"
-    
-    if game.status != "playing":
-        return None, "Game is not in playing status"
-    
-    if game.current_turn_index is None:
-        return None, "Game turn index not initialized"
-    
-    # Check if there's already an active turn
-    if game.current_turn_id:
-        current_turn = get_current_turn(game_id)
-        if current_turn and not current_turn.is_complete:
-            return current_turn, None
-    
-    # Get current questioner
-    questioner = game.players[game.current_turn_index]
-    
-    # Create new turn
-    turn_id = str(uuid.uuid4())
-    turn = Turn(
-        turn_id=turn_id,
-        game_id=game_id,
-        questioner_id=questioner.player_id,
-        phase="question"
-    )
-    
-    # Update game
-    game.current_turn_id = turn_id
-    save_game(game)
-    save_turn(turn)
-    
-    return turn, None
+    with game_lock(game_id):
+        game = get_game(game_id)
+        if not game:
+            return None, "Game not found"
+        
+        if game.status != "playing":
+            return None, "Game is not in playing status"
+        
+        if game.current_turn_index is None:
+            return None, "Game turn index not initialized"
+        
+        # Check if there's already an active turn
+        if game.current_turn_id:
+            current_turn = get_current_turn(game_id)
+            if current_turn and not current_turn.is_complete:
+                return current_turn, None
+        
+        # Get current questioner
+        questioner = game.players[game.current_turn_index]
+        
+        # Create new turn
+        turn_id = str(uuid.uuid4())
+        turn = Turn(
+            turn_id=turn_id,
+            game_id=game_id,
+            questioner_id=questioner.player_id,
+            phase="question"
+        )
+        
+        # Update game
+        game.current_turn_id = turn_id
+        save_game(game)
+        save_turn(turn)
+        journal.record("turn", game_id=game_id, turn_id=turn_id, questioner_id=turn.questioner_id)
+        
+        return turn, None
 
 
 def submit_question(game_id: str, player_id: str, question: str) -> Tuple[bool, Optional[str]]:
@@ -173,46 +189,87 @@ def submit_question(game_id: str, player_id: str, question: str) -> Tuple[bool,
     Returns:
         Tuple of (success, error_message)
     """
-    game = get_game(game_id)
-    if not game:
-        return False, "Game not found"
-    
-    if game.status != "playing":
-        return False, "Game is not in playing status"
-    
-    if game.current_turn_index is None:
-        return False, "Game turn index not initialized"
-    
-    # Check if it's the player's turn
-    current_questioner = game.players[game.current_turn_index]
-    if current_questioner.player_id != player_id:
-        return False, "It's not your turn to ask a question"
+    with game_lock(game_id):
+        game = get_game(game_id)
+        if not game:
+            return False, "Game not found"
+        
+        if game.status != "playing":
+            return False, "Game is not in playing status"
+        
+        if game.current_turn_index is None:
+            return False, "Game turn index not initialized"
+        
+        # Check if it's the player's turn
+        current_questioner = game.players[game.current_turn_index]
+        if current_questioner.player_id != player_id:
+            return False, "It's not your turn to ask a question"
+        
+        # Get or create current turn
+        turn = get_current_turn(game_id)
+        if not turn:
+            turn, error = start_turn(game_id)
+            if error:
+                return False, error
+        
+        if turn.phase != "question":
+            return False, "Turn is not in question phase"
+        
+        if not question or not question.strip():
+            return False, "Question cannot be empty"
+        
+        # Set question and move to answer phase
+        turn.question = question.strip()
+        turn.phase = "answer"
+        save_turn(turn)
+        journal.record("question", game_id=game_id, turn_id=turn.turn_id, question=turn.question)
+        
+        # Predict likely answers while players think about theirs
+        from word_similarity import prefetch_vocabulary
+        with usage_ledger.scope(game_id, turn.turn_id):
+            prefetch_vocabulary(turn.turn_id, turn.question)
+        
+        return True, None
+
+
+def calculate_scores(turn: Turn, game: Game) -> Dict[str, int]:
+    """
+    Calculate scores for a turn based on matching answers.
+    Uses word similarity to group similar answers together.
     
-    # Get or create current turn
-    turn = get_current_turn(game_id)
-    if not turn:
-        turn, error = start_turn(game_id)
-        if error:
-            return False, error
+    Returns:
+        Dictionary mapping player_id -> points earned this turn
+    """
+    if not turn.answers or len(turn.answers) == 0:
+        return score_word_groups(turn, game, {})
     
-    if turn.phase != "question":
-        return False, "Turn is not in question phase"
+    # Group answers by similar words (using AI/similarity checking)
+    from word_similarity import get_vocabulary, group_similar_words
+    with usage_ledger.scope(game.game_id, turn.turn_id):
+        # canonical_word -> list of player_ids
+        word_groups = group_similar_words(turn.answers, vocabulary=get_vocabulary(turn.turn_id))
     
-    if not question or not question.strip():
-        return False, "Question cannot be empty"
+    return score_word_groups(turn, game, word_groups)
+
+
+async def calculate_scores_async(turn: Turn, game: Game) -> Dict[str, int]:
+    """Async version of calculate_scores that doesn't block on similarity checks."""
+    if not turn.answers or len(turn.answers) == 0:
+        return score_word_groups(turn, game, {})
     
-    # Set question and move to answer phase
-    turn.question = question.strip()
-    turn.phase = "answer"
-    save_turn(turn)
+    from word_similarity import get_vocabulary, group_similar_words_async
+    with usage_ledger.scope(game.game_id, turn.turn_id):
+        word_groups = await group_similar_words_async(turn.answers, vocabulary=get_vocabulary(turn.turn_id))
     
-    return True, None
+    return score_word_groups(turn, game, word_groups)
 
 
-def calculate_scores(turn: Turn, game: Game) -> Dict[str, int]:
+def score_word_groups(turn: Turn, game: Game, word_groups: Dict[str, List[str]]) -> Dict[str, int]:
     """
-    Calculate scores for a turn based on matching answers.
-    Uses word similarity to group similar answers together.
+    Calculate scores for a turn from its grouped answers.
+    
+    Args:
+        word_groups: canonical_word -> list of player_ids
     
     Returns:
         Dictionary mapping player_id -> points earned this turn
@@ -222,10 +279,6 @@ def calculate_scores(turn: Turn, game: Game) -> Dict[str, int]:
     if not turn.answers or len(turn.answers) == 0:
         return scores
     
-    # Group answers by similar words (using AI/similarity checking)
-    from word_similarity import group_similar_words
-    word_groups = group_similar_words(turn.answers)  # canonical_word -> list of player_ids
-    
     # Check for dud question
     # Dud if: no matches (each word appears only once) OR all same word
     is_dud = False
@@ -264,44 +317,99 @@ def submit_answer(game_id: str, player_id: str, word: str) -> Tuple[bool, Option
     Returns:
         Tuple of (success, error_message)
     """
-    game = get_game(game_id)
-    if not game:
-        return False, "Game not found"
+    success, error = record_answer(game_id, player_id, word)
+    if not success:
+        return False, error
     
-    if game.status != "playing":
-        return False, "Game is not in playing status"
+    if scoring_pending(game_id):
+        # All answered, complete the turn (or hand it to the background queue)
+        if scoring_queue.is_enabled():
+            scoring_queue.enqueue(game_id)
+        else:
+            complete_turn(game_id)
     
-    turn = get_current_turn(game_id)
-    if not turn:
-        return False, "No active turn"
-    
-    if turn.phase != "answer":
-        return False, "Turn is not in answer phase"
-    
-    # Validate word is single word (no spaces)
-    word_trimmed = word.strip()
-    if not word_trimmed:
-        return False, "Answer cannot be empty"
-    
-    if ' ' in word_trimmed:
-        return False, "Answer must be a single word"
-    
-    # Check if player already answered
-    if player_id in turn.answers:
-        return False, "You have already submitted an answer"
+    return True, None
+
+
+async def submit_answer_async(game_id: str, player_id: str, word: str) -> Tuple[bool, Optional[str]]:
+    """
+    Async version of submit_answer.
     
-    # Store answer (normalize to lowercase for matching)
-    turn.answers[player_id] = word_trimmed.lower()
-    save_turn(turn)
+    The final answer awaits scoring without blocking a server worker.
+    """
+    success, error = await asyncio.to_thread(record_answer, game_id, player_id, word)
+    if not success:
+        return False, error
     
-    # Check if all players have answered
-    if len(turn.answers) == len(game.players):
-        # All answered, complete the turn
-        complete_turn(game_id)
+    if await asyncio.to_thread(scoring_pending, game_id):
+        if scoring_queue.is_enabled():
+            scoring_queue.enqueue(game_id)
+        else:
+            await complete_turn_async(game_id)
     
     return True, None
 
 
+def record_answer(game_id: str, player_id: str, word: str) -> Tuple[bool, Optional[str]]:
+    """
+    Validate and store an answer for the current turn without scoring it.
+    
+    Returns:
+        Tuple of (success, error_message)
+    """
+    with game_lock(game_id):
+        game = get_game(game_id)
+        if not game:
+            return False, "Game not found"
+        
+        if game.status != "playing":
+            return False, "Game is not in playing status"
+        
+        turn = get_current_turn(game_id)
+        if not turn:
+            return False, "No active turn"
+        
+        if turn.phase != "answer":
+            return False, "Turn is not in answer phase"
+        
+        # Validate word is single word (no spaces)
+        word_trimmed = word.strip()
+        if not word_trimmed:
+            return False, "Answer cannot be empty"
+        
+        if ' ' in word_trimmed:
+            return False, "Answer must be a single word"
+        
+        # Check if player already answered
+        if player_id in turn.answers:
+            return False, "You have already submitted an answer"
+        
+        # Store answer (normalize to lowercase for matching)
+        turn.answers[intern_id(player_id)] = word_trimmed.lower()
+        
+        # Once everyone has answered, close the answer phase until scores are in
+        if len(turn.answers) == len(game.players):
+            turn.phase = "scoring_pending"
+        save_turn(turn)
+        journal.record("answer", game_id=game_id, turn_id=turn.turn_id, player_id=player_id,
+                       word=turn.answers[player_id])
+        
+        # Start matching this answer against earlier ones while others are still answering
+        if turn.phase == "answer":
+            from word_similarity import warm_answer
+            earlier = [answer for answered_id, answer in turn.answers.items() if answered_id != player_id]
+            with usage_ledger.scope(game_id, turn.turn_id):
+                warm_answer(turn.answers[player_id], earlier)
+        
+        return True, None
+
+
+def scoring_pending(game_id: str) -> bool:
+    """Check if the current turn has all its answers and is waiting to be scored."""
+    turn = get_current_turn(game_id)
+    return turn is not None and turn.phase == "scoring_pending"
+
+
 def complete_turn(game_id: str) -> Tuple[bool, Optional[str]]:
     """
     Complete the current turn by calculating scores and moving to next turn.
@@ -320,20 +428,113 @@ def complete_turn(game_id: str) -> Tuple[bool, Optional[str]]:
     if turn.is_complete:
         return True, None  # Already completed
     
-    # Calculate scores
-    scores = calculate_scores(turn, game)
+    # Only one request scores a turn; the others leave it to that one
+    if not claim_scoring(turn.turn_id):
+        return True, None
+    try:
+        # Calculate scores (without holding the game's lock; answers can't change now)
+        scores = calculate_scores(turn, game)
+        return finish_turn(game_id, turn.turn_id, scores)
+    finally:
+        release_scoring(turn.turn_id)
+
+
+async def complete_turn_async(game_id: str) -> Tuple[bool, Optional[str]]:
+    """
+    Async version of complete_turn.
+    
+    Reading and saving the game take locks and may touch storage, so those
+    steps run in a worker thread rather than on the event loop. If the
+    request is cancelled while scoring, the turn is handed to the scoring
+    queue so it doesn't stay waiting for scores.
+    """
+    game = await asyncio.to_thread(get_game, game_id)
+    if not game:
+        return False, "Game not found"
+    
+    turn = await asyncio.to_thread(get_current_turn, game_id)
+    if not turn:
+        return False, "No active turn"
+    
+    if turn.is_complete:
+        return True, None  # Already completed
+    
+    # Only one request scores a turn; the others leave it to that one
+    if not claim_scoring(turn.turn_id):
+        return True, None
+    cancelled = False
+    try:
+        # Calculate scores (without holding the game's lock; answers can't change now)
+        scores = await calculate_scores_async(turn, game)
+        return await asyncio.to_thread(finish_turn, game_id, turn.turn_id, scores)
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        release_scoring(turn.turn_id)
+        if cancelled:
+            # Released first so the queue's worker can claim the turn
+            scoring_queue.enqueue(game_id)
+
+
+_scoring: Set[str] = set()  # turn_ids being scored in this process
+_scoring_lock = threading.Lock()
+
+
+def claim_scoring(turn_id: str) -> bool:
+    """Claim a turn for scoring; False if another request is already scoring it."""
+    with _scoring_lock:
+        if turn_id in _scoring:
+            return False
+        _scoring.add(turn_id)
+        return True
+
+
+def release_scoring(turn_id: str) -> None:
+    with _scoring_lock:
+        _scoring.discard(turn_id)
+
+
+def finish_turn(game_id: str, turn_id: str, scores: Dict[str, int]) -> Tuple[bool, Optional[str]]:
+    """
+    Apply a turn's calculated scores under the game's lock.
+    
+    Returns:
+        Tuple of (success, error_message)
+    """
+    with game_lock(game_id):
+        game = get_game(game_id)
+        turn = get_turn(turn_id)
+        if not game or not turn:
+            return False, "No active turn"
+        
+        # Another request may have completed the turn while we were scoring
+        if turn.is_complete:
+            return True, None
+        
+        apply_turn_scores(game, turn, scores)
+        journal.record("complete", game_id=game_id, turn_id=turn_id, scores=scores)
+        return True, None
+
+
+def apply_turn_scores(game: Game, turn: Turn, scores: Dict[str, int]) -> None:
+    """Record a turn's scores, mark it complete and move the game to the next turn."""
     turn.scores = scores
     
     # Update player scores
     for player_id, points in scores.items():
-        player = next((p for p in game.players if p.player_id == player_id), None)
+        player = game.get_player(player_id)
         if player:
             player.score += points
     
     # Mark turn as complete
     turn.phase = "scoring"
     turn.is_complete = True
-    save_turn(turn)
+    # Keep only the compact, read-only record of the scored turn
+    save_turn(turn.freeze())
+    
+    from word_similarity import discard_vocabulary
+    discard_vocabulary(turn.turn_id)
     
     # Move to next turn
     game.current_turn_index += 1
@@ -350,7 +551,6 @@ def complete_turn(game_id: str) -> Tuple[bool, Optional[str]]:
         game.current_turn_id = None
     
     save_game(game)
-    return True, None
 
 
 def check_game_end(game: Game) -> bool:
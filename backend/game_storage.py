@@ -0,0 +1,427 @@
+"""
+Storage backends that keep games beyond the life of the process.
+
+game_store always serves reads from its in-memory dicts; a storage backend
+receives every save and is asked for games that aren't in memory. The
+backend is selected with GAME_STORE:
+- memory: nothing is kept, games are lost on restart (default)
+- sqlite: games and turns are written to GAME_STORE_PATH (default
+  same_word.db) in WAL mode, batched every GAME_STORE_FLUSH_INTERVAL
+  seconds (default 0.05), and loaded back one game at a time on first use
+- shared: the same database shared by several worker processes on one
+  machine; saves are committed immediately, each read checks the game's
+  version and reloads it if another process changed it, and game_lock
+  serializes changes to a game across processes
+"""
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from models import Game, Turn
+
+
+class MemoryStorage:
+    """Keeps nothing outside the process."""
+    
+    name = "memory"
+    persistent = False
+    shared = False
+    
+    def save_game(self, game: Game) -> None:
+        pass
+    
+    def save_turn(self, turn: Turn) -> None:
+        pass
+    
+    def load_game(self, game_id: str) -> Tuple[Optional[Game], List[Turn]]:
+        """Get a stored game (or None) and its turns in chronological order."""
+        return None, []
+    
+    def find_game_id(self, game_name: str) -> Optional[str]:
+        """Get the id of the most recently created game with a name."""
+        return None
+    
+    def find_turn_game_id(self, turn_id: str) -> Optional[str]:
+        """Get the id of the game a stored turn belongs to."""
+        return None
+    
+    def game_ids_with_status(self, status: str) -> List[str]:
+        return []
+    
+    def waiting_game_ids(self, prefix: str = "", offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """Get a page of waiting game ids sorted by name, optionally only names starting with prefix."""
+        return []
+    
+    def is_stale(self, game_id: str) -> bool:
+        """Check if another process changed a game since this one loaded or saved it."""
+        return False
+    
+    def lock(self, key: str) -> ContextManager:
+        """Hold a lock on a game (or other key) against other processes."""
+        return nullcontext()
+    
+    def touch(self, game_id: str, now: float) -> None:
+        """Count a read of the game as activity, so purge keeps a game still being watched."""
+        pass
+    
+    def purge(self, max_idle: Dict[str, float], now: float) -> Tuple[int, int]:
+        """
+        Delete stored games (and their turns) idle for longer than their status allows.
+        
+        Args:
+            max_idle: status -> seconds since the game's last save
+            now: The current time (time.time())
+        
+        Returns:
+            Tuple of (games deleted, turns deleted)
+        """
+        return 0, 0
+    
+    def flush(self) -> None:
+        """Write any batched saves now."""
+        pass
+    
+    def stats(self) -> Dict[str, int]:
+        return {}
+    
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStorage(MemoryStorage):
+    """
+    Write-behind SQLite storage.
+    
+    Saves are serialized immediately and queued; a writer thread commits
+    everything queued in one transaction after flush_interval seconds, so a
+    burst of saves to one game costs one write. A crash loses at most the
+    last flush interval. Reads flush first, so they always see every save.
+    
+    With shared=True, saves are committed before they return instead, and
+    every save bumps the game's version so other processes notice it.
+    """
+    
+    persistent = True
+    
+    UPSERT_GAME = (
+        "INSERT INTO games (game_id, game_name, status, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(game_id) DO UPDATE SET game_name = excluded.game_name, status = excluded.status, "
+        "data = excluded.data, updated_at = excluded.updated_at, version = games.version + 1"
+    )
+    BUMP_VERSION = "UPDATE games SET version = version + 1, updated_at = ? WHERE game_id = ?"
+    TOUCH_GAME = "UPDATE games SET updated_at = ? WHERE game_id = ?"
+    TOUCH_INTERVAL = 60.0  # seconds between stored touches of one game
+    UPSERT_TURN = (
+        "INSERT INTO turns (turn_id, game_id, data) VALUES (?, ?, ?) "
+        "ON CONFLICT(turn_id) DO UPDATE SET data = excluded.data"
+    )
+    
+    def __init__(self, path: str, flush_interval: float = 0.05, shared: bool = False, lock_stripes: int = 64):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.shared = shared
+        self.name = "shared" if shared else "sqlite"
+        self._versions: Dict[str, int] = {}  # game_id -> version of the copy this process holds
+        self._touched: Dict[str, float] = {}  # game_id -> time of its last stored touch
+        self._locks = StripedFileLock(f"{path}.locks", lock_stripes) if shared else None
+        self.writes = 0
+        self.batches = 0
+        self._pending_games: Dict[str, Tuple[str, str, str, str, float]] = {}
+        self._pending_turns: Dict[str, Tuple[str, str, str]] = {}
+        self._lock = threading.Lock()  # guards the pending saves
+        self._db_lock = threading.Lock()  # guards the connection
+        self._dirty = threading.Event()
+        self._closing = threading.Event()
+        
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            "game_id TEXT PRIMARY KEY, game_name TEXT NOT NULL, status TEXT NOT NULL, data TEXT NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 1, updated_at REAL NOT NULL DEFAULT 0)"
+        )
+        # Databases written before these columns existed
+        columns = [column[1] for column in self._db.execute("PRAGMA table_info(games)")]
+        if "version" not in columns:
+            self._db.execute("ALTER TABLE games ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        if "updated_at" not in columns:
+            self._db.execute("ALTER TABLE games ADD COLUMN updated_at REAL NOT NULL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS games_by_name ON games (game_name)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS games_by_status_name ON games (status, game_name)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "turn_id TEXT PRIMARY KEY, game_id TEXT NOT NULL, data TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS turns_by_game ON turns (game_id)")
+        self._db.commit()
+        
+        self._writer = threading.Thread(target=self._run, name="game-store-writer", daemon=True)
+        self._writer.start()
+    
+    def save_game(self, game: Game) -> None:
+        row = (game.game_id, game.game_name.lower(), game.status, json.dumps(game.to_dict()), time.time())
+        if self.shared:
+            self._write_now(game.game_id, self.UPSERT_GAME, row)
+            return
+        with self._lock:
+            self._pending_games[game.game_id] = row
+        self._dirty.set()
+    
+    def save_turn(self, turn: Turn) -> None:
+        row = (turn.turn_id, turn.game_id, json.dumps(turn.to_dict()))
+        if self.shared:
+            self._write_now(turn.game_id, self.UPSERT_TURN, row)
+            return
+        with self._lock:
+            self._pending_turns[turn.turn_id] = row
+        self._dirty.set()
+    
+    def load_game(self, game_id: str) -> Tuple[Optional[Game], List[Turn]]:
+        self.flush()
+        with self._db_lock:
+            # One read transaction, so the game and its turns are from the same version
+            self._db.execute("BEGIN")
+            try:
+                row = self._db.execute("SELECT data, version FROM games WHERE game_id = ?", (game_id,)).fetchone()
+                # Rows keep their rowid when updated, so rowid order is creation order
+                rows = self._db.execute(
+                    "SELECT data FROM turns WHERE game_id = ? ORDER BY rowid", (game_id,)
+                ).fetchall()
+            finally:
+                self._db.commit()
+            if row is None:
+                return None, [Turn.from_dict(json.loads(data)) for data, in rows]
+            self._versions[game_id] = row[1]
+        return Game.from_dict(json.loads(row[0])), [Turn.from_dict(json.loads(data)) for data, in rows]
+    
+    def find_game_id(self, game_name: str) -> Optional[str]:
+        row = self._query_one(
+            "SELECT game_id FROM games WHERE game_name = ? ORDER BY rowid DESC LIMIT 1", (game_name.lower(),)
+        )
+        return row[0] if row else None
+    
+    def find_turn_game_id(self, turn_id: str) -> Optional[str]:
+        row = self._query_one("SELECT game_id FROM turns WHERE turn_id = ?", (turn_id,))
+        return row[0] if row else None
+    
+    def game_ids_with_status(self, status: str) -> List[str]:
+        return [game_id for game_id, in self._query("SELECT game_id FROM games WHERE status = ?", (status,))]
+    
+    def waiting_game_ids(self, prefix: str = "", offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        # A range on the (status, game_name) index rather than LIKE, which can't use it
+        name_range = "AND game_name >= ? AND game_name < ? " if prefix else ""
+        params = (prefix, prefix + "\uffff") if prefix else ()
+        rows = self._query(
+            f"SELECT game_id FROM games WHERE status = 'waiting' {name_range}"
+            "ORDER BY game_name, game_id LIMIT ? OFFSET ?",
+            (*params, -1 if limit is None else limit, offset)
+        )
+        return [game_id for game_id, in rows]
+    
+    def is_stale(self, game_id: str) -> bool:
+        if not self.shared:
+            return False
+        row = self._query_one("SELECT version FROM games WHERE game_id = ?", (game_id,))
+        with self._db_lock:
+            return row is not None and row[0] != self._versions.get(game_id)
+    
+    def lock(self, key: str) -> ContextManager:
+        return self._locks.hold(key) if self._locks else nullcontext()
+    
+    def touch(self, game_id: str, now: float) -> None:
+        # Polling clients read a game every few seconds; one write a minute is enough
+        with self._lock:
+            if now - self._touched.get(game_id, 0.0) < self.TOUCH_INTERVAL:
+                return
+            self._touched[game_id] = now
+        with self._db_lock:
+            with self._db:
+                self._db.execute(self.TOUCH_GAME, (now, game_id))
+    
+    def purge(self, max_idle: Dict[str, float], now: float) -> Tuple[int, int]:
+        with self._lock:
+            self._touched = {
+                game_id: touched for game_id, touched in self._touched.items()
+                if now - touched < self.TOUCH_INTERVAL
+            }
+        self.flush()
+        games_deleted = turns_deleted = 0
+        with self._db_lock:
+            with self._db:
+                for status, seconds in max_idle.items():
+                    idle = (status, now - seconds)
+                    turns_deleted += self._db.execute(
+                        "DELETE FROM turns WHERE game_id IN "
+                        "(SELECT game_id FROM games WHERE status = ? AND updated_at < ?)", idle
+                    ).rowcount
+                    games_deleted += self._db.execute(
+                        "DELETE FROM games WHERE status = ? AND updated_at < ?", idle
+                    ).rowcount
+        return games_deleted, turns_deleted
+    
+    def flush(self) -> None:
+        # Batches are taken under the connection lock so they commit in order
+        with self._db_lock:
+            with self._lock:
+                games, self._pending_games = self._pending_games, {}
+                turns, self._pending_turns = self._pending_turns, {}
+                self._dirty.clear()
+            if not games and not turns:
+                return
+            
+            try:
+                with self._db:
+                    self._db.executemany(self.UPSERT_GAME, list(games.values()))
+                    self._db.executemany(self.UPSERT_TURN, list(turns.values()))
+                    # A turn's save counts as activity in its game
+                    touched = {row[1] for row in turns.values()}
+                    self._db.executemany(self.TOUCH_GAME, [(time.time(), game_id) for game_id in touched])
+                self.writes += len(games) + len(turns)
+                self.batches += 1
+            except sqlite3.Error as e:
+                print(f"Could not write games to {self.path}: {e}")
+                # Keep the batch for the next flush unless newer saves replaced it
+                with self._lock:
+                    self._pending_games = {**games, **self._pending_games}
+                    self._pending_turns = {**turns, **self._pending_turns}
+    
+    def close(self) -> None:
+        """Stop the writer, write what is queued and close the database."""
+        if self._closing.is_set():
+            return
+        self._closing.set()
+        self._dirty.set()
+        self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._pending_games) + len(self._pending_turns)
+        return {"writes": self.writes, "batches": self.batches, "pending": pending}
+    
+    def _run(self) -> None:
+        while not self._closing.is_set():
+            self._dirty.wait()
+            # Let saves arriving meanwhile join this batch (close flushes at once)
+            self._closing.wait(self.flush_interval)
+            self.flush()
+    
+    def _write_now(self, game_id: str, sql: str, row: tuple) -> None:
+        """Commit one save and note the game's new version (shared mode)."""
+        with self._db_lock:
+            with self._db:
+                self._db.execute(sql, row)
+                if sql is self.UPSERT_TURN:
+                    self._db.execute(self.BUMP_VERSION, (time.time(), game_id))
+                version = self._db.execute("SELECT version FROM games WHERE game_id = ?", (game_id,)).fetchone()
+            if version is not None:
+                self._versions[game_id] = version[0]
+            self.writes += 1
+            self.batches += 1
+    
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        self.flush()
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+    
+    def _query_one(self, sql: str, params: tuple) -> Optional[tuple]:
+        rows = self._query(sql, params)
+        return rows[0] if rows else None
+
+
+class StripedFileLock:
+    """
+    Exclusive locks shared between processes, striped over a fixed number of
+    lock files so any number of keys needs only that many files.
+    
+    Each hold opens its own descriptor, so threads exclude each other too;
+    a thread may re-enter a stripe it already holds.
+    """
+    
+    def __init__(self, directory: str, stripes: int = 64):
+        self.directory = directory
+        self.stripes = stripes
+        self._held = threading.local()
+        os.makedirs(directory, exist_ok=True)
+    
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        import fcntl
+        
+        stripe = zlib.crc32(key.encode()) % self.stripes
+        counts = self._held.__dict__.setdefault("counts", {})
+        if counts.get(stripe):
+            counts[stripe] += 1
+            try:
+                yield
+            finally:
+                counts[stripe] -= 1
+            return
+        
+        fd = os.open(os.path.join(self.directory, f"{stripe:03d}.lock"), os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            counts[stripe] = 1
+            try:
+                yield
+            finally:
+                counts[stripe] = 0
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+
+def create_storage() -> MemoryStorage:
+    """Create the storage backend selected by GAME_STORE (default "memory")."""
+    name = os.getenv("GAME_STORE", "memory")
+    if name == "memory":
+        return MemoryStorage()
+    if name in ("sqlite", "shared"):
+        return SQLiteStorage(
+            os.getenv("GAME_STORE_PATH", "same_word.db"),
+            flush_interval=float(os.getenv("GAME_STORE_FLUSH_INTERVAL", "0.05")),
+            shared=name == "shared",
+            lock_stripes=int(os.getenv("GAME_STORE_LOCK_STRIPES", "64"))
+        )
+    raise ValueError(f"Unknown game store: {name}")
+
+
+_storage: Optional[MemoryStorage] = None
+_storage_key: Optional[Tuple[str, str]] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> MemoryStorage:
+    """
+    Get the configured storage backend, creating it once.
+    
+    It is recreated (closing the old one) if GAME_STORE or GAME_STORE_PATH changes.
+    """
+    global _storage, _storage_key
+    
+    key = (os.getenv("GAME_STORE", "memory"), os.getenv("GAME_STORE_PATH", "same_word.db"))
+    with _storage_lock:
+        if _storage is None or _storage_key != key:
+            if _storage is not None:
+                _storage.close()
+            _storage = create_storage()
+            _storage_key = key
+        return _storage
+
+
+def close_storage() -> None:
+    """Write queued saves and close the storage backend (on shutdown)."""
+    global _storage, _storage_key
+    with _storage_lock:
+        if _storage is not None:
+            _storage.close()
+        _storage = None
+        _storage_key = None
@@ -1,5 +1,12 @@
-from typing import Dict, Optional, List
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, List, Set, Tuple
+import os
+import sys
+import threading
+import time
 from models import Game, Turn
+import game_storage
 
 
 # In-memory storage for games
@@ -10,30 +17,117 @@ games_by_name: Dict[str, str] = {}  # maps lowercase game_name -> game_id
 turns: Dict[str, Turn] = {}
 turns_by_game: Dict[str, List[str]] = {}  # maps game_id -> list of turn_ids
 
+# Indexes kept up to date by save_game
+games_by_status: Dict[str, Set[str]] = {}  # maps status -> game_ids
+indexed_games: Dict[str, Tuple[str, str]] = {}  # maps game_id -> (status, game_name) it is indexed under
+waiting_by_name: List[Tuple[str, str]] = []  # sorted (game_name, game_id) of waiting games
+last_active: Dict[str, float] = {}  # maps game_id -> time.time() of its last save, load or touch
+
+# How long games of each status may sit idle before sweep() evicts them
+DEFAULT_TTLS = {"waiting": 3600.0, "playing": 7200.0, "finished": 1800.0}
+
+
+# Serializes loading games from persistent storage (see game_storage)
+_load_lock = threading.Lock()
+_index_lock = threading.Lock()
+_waiting_source: Optional[game_storage.MemoryStorage] = None  # storage the waiting games were loaded from
+
 
 def get_game(game_id: str) -> Game | None:
     """Get a game by its ID."""
-    return games.get(game_id)
+    game = games.get(game_id)
+    if game is None or game_storage.get_storage().is_stale(game_id):
+        load_game(game_id, reload=game is not None)
+        game = games.get(game_id)
+    return game
 
 
 def get_game_by_name(game_name: str) -> Game | None:
     """Get a game by its name (case-insensitive lookup)."""
     game_name_lower = game_name.lower()
     game_id = games_by_name.get(game_name_lower)
+    storage = game_storage.get_storage()
+    # Another process may have created a game with this name since
+    if storage.shared or (not game_id and storage.persistent):
+        stored_id = storage.find_game_id(game_name_lower)
+        if stored_id:
+            game_id = games_by_name[game_name_lower] = stored_id
     if game_id:
-        return games.get(game_id)
+        return get_game(game_id)
     return None
 
 
+class GameLocks:
+    """
+    One reentrant lock per game (or other key) within this process.
+    
+    A key's lock is created on first use and dropped once no thread holds or
+    waits for it, so only games being changed right now cost anything.
+    """
+    
+    def __init__(self):
+        self._locks: Dict[str, List] = {}  # key -> [RLock, threads holding or waiting]
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def hold(self, key: str):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.RLock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._locks)
+
+
+game_locks = GameLocks()
+
+
+@contextmanager
+def game_lock(game_id: str):
+    """
+    Lock a game while changing or reading it.
+    
+    Changes to one game are serialized across threads (and across processes
+    when GAME_STORE=shared), while different games proceed in parallel. The
+    lock is reentrant. Read the game inside the lock so changes apply to its
+    latest version.
+    """
+    with game_locks.hold(game_id), game_storage.get_storage().lock(game_id):
+        yield
+
+
 def save_game(game: Game) -> None:
     """Save a game to storage."""
     games[game.game_id] = game
     games_by_name[game.game_name.lower()] = game.game_id
+    last_active[game.game_id] = time.time()
+    index_game(game)
+    game_storage.get_storage().save_game(game)
 
 
 def get_turn(turn_id: str) -> Turn | None:
     """Get a turn by its ID."""
-    return turns.get(turn_id)
+    turn = turns.get(turn_id)
+    storage = game_storage.get_storage()
+    if turn is not None and storage.shared:
+        # Reloads the game's turns if another process changed it
+        get_game(turn.game_id)
+        turn = turns.get(turn_id)
+    elif turn is None and storage.persistent:
+        game_id = storage.find_turn_game_id(turn_id)
+        if game_id:
+            load_game(game_id)
+            turn = turns.get(turn_id)
+    return turn
 
 
 def get_current_turn(game_id: str) -> Turn | None:
@@ -44,6 +138,18 @@ def get_current_turn(game_id: str) -> Turn | None:
     return get_turn(game.current_turn_id)
 
 
+def touch_game(game_id: str) -> None:
+    """
+    Count a client reading a game as activity, so the sweeper keeps games
+    that are still being watched (a lobby waiting to start, a finished game
+    on screen) even though nothing changes in them.
+    """
+    now = time.time()
+    if game_id in games:
+        last_active[game_id] = now
+    game_storage.get_storage().touch(game_id, now)
+
+
 def save_turn(turn: Turn) -> None:
     """Save a turn to storage."""
     turns[turn.turn_id] = turn
@@ -51,10 +157,14 @@ def save_turn(turn: Turn) -> None:
         turns_by_game[turn.game_id] = []
     if turn.turn_id not in turns_by_game[turn.game_id]:
         turns_by_game[turn.game_id].append(turn.turn_id)
+    last_active[turn.game_id] = time.time()
+    game_storage.get_storage().save_turn(turn)
 
 
 def get_all_turns(game_id: str) -> List[Turn]:
     """Get all turns for a game in chronological order."""
+    if game_id not in turns_by_game or game_storage.get_storage().shared:
+        get_game(game_id)
     if game_id not in turns_by_game:
         return []
     
@@ -63,6 +173,265 @@ def get_all_turns(game_id: str) -> List[Turn]:
 
 
 def get_all_waiting_games() -> List[Game]:
-    """Get all games with status 'waiting'."""
-    return [game for game in games.values() if game.status == "waiting"]
+    """Get all games with status 'waiting', sorted by name."""
+    return list_waiting_games()
+
+
+def list_waiting_games(prefix: str = "", offset: int = 0, limit: Optional[int] = None) -> List[Game]:
+    """
+    Get a page of waiting games, sorted by name, without scanning other games.
+    
+    Args:
+        prefix: Only games whose name starts with this (case-insensitive)
+        offset: Number of matching games to skip
+        limit: Maximum number of games to return (None for all)
+    
+    Returns:
+        List of waiting games
+    """
+    prefix = prefix.lower()
+    storage = game_storage.get_storage()
+    if storage.shared:
+        # Other processes change the lobby too, so ask the database
+        stored = (get_game(game_id) for game_id in storage.waiting_game_ids(prefix, offset, limit))
+        return [game for game in stored if game is not None and game.status == "waiting"]
+    if storage.persistent:
+        load_waiting_games(storage)
+    
+    page: List[str] = []
+    with _index_lock:
+        i = bisect_left(waiting_by_name, (prefix,)) + offset
+        while i < len(waiting_by_name) and (limit is None or len(page) < limit):
+            game_name, game_id = waiting_by_name[i]
+            if not game_name.startswith(prefix):
+                break
+            page.append(game_id)
+            i += 1
+    return [games[game_id] for game_id in page if game_id in games]
+
+
+def get_games_with_status(status: str) -> List[Game]:
+    """Get every game in memory with a status."""
+    with _index_lock:
+        game_ids = list(games_by_status.get(status, ()))
+    return [games[game_id] for game_id in game_ids if game_id in games]
+
+
+def index_game(game: Game) -> None:
+    """Move a game to its current status in the indexes (nothing to do if it hasn't changed)."""
+    key = (game.status, game.game_name.lower())
+    with _index_lock:
+        previous = indexed_games.get(game.game_id)
+        if previous == key:
+            return
+        if previous is not None:
+            unindex(game.game_id, *previous)
+        games_by_status.setdefault(game.status, set()).add(game.game_id)
+        if game.status == "waiting":
+            insort(waiting_by_name, (key[1], game.game_id))
+        indexed_games[game.game_id] = key
+
+
+def unindex(game_id: str, status: str, game_name: str) -> None:
+    """Remove a game from the status indexes (caller holds _index_lock)."""
+    game_ids = games_by_status.get(status)
+    if game_ids is not None:
+        game_ids.discard(game_id)
+    if status == "waiting":
+        i = bisect_left(waiting_by_name, (game_name, game_id))
+        if i < len(waiting_by_name) and waiting_by_name[i] == (game_name, game_id):
+            del waiting_by_name[i]
+    indexed_games.pop(game_id, None)
+
+
+def load_waiting_games(storage: game_storage.MemoryStorage) -> None:
+    """Load the stored waiting games into memory once per storage backend, so the index covers them."""
+    global _waiting_source
+    if _waiting_source is storage:
+        return
+    for game_id in storage.game_ids_with_status("waiting"):
+        get_game(game_id)
+    _waiting_source = storage
+
+
+def load_game(game_id: str, reload: bool = False) -> None:
+    """
+    Load a game and its turns from persistent storage into memory.
+    
+    Does nothing if the game (or its turns) are already in memory, so
+    objects being played with are never replaced by stored copies; with
+    reload=True they are replaced if another process changed the game.
+    """
+    storage = game_storage.get_storage()
+    if not storage.persistent:
+        return
+    
+    with _load_lock:
+        if reload and storage.is_stale(game_id):
+            games.pop(game_id, None)
+            for turn_id in turns_by_game.pop(game_id, []):
+                turns.pop(turn_id, None)
+        if game_id in games or game_id in turns_by_game:
+            return
+        game, game_turns = storage.load_game(game_id)
+        if game is not None:
+            games[game_id] = game
+            last_active[game_id] = time.time()
+            index_game(game)
+        if game_turns:
+            for turn in game_turns:
+                turns[turn.turn_id] = turn
+            turns_by_game[game_id] = [turn.turn_id for turn in game_turns]
+
+
+
+def game_ttls() -> Dict[str, float]:
+    """
+    Get how long games of each status may sit idle, in seconds.
+    
+    Set with GAME_TTL_WAITING, GAME_TTL_PLAYING and GAME_TTL_FINISHED
+    (defaults in DEFAULT_TTLS); 0 keeps games of that status forever.
+    """
+    ttls = {}
+    for status, default in DEFAULT_TTLS.items():
+        seconds = float(os.getenv(f"GAME_TTL_{status.upper()}", str(default)))
+        if seconds > 0:
+            ttls[status] = seconds
+    return ttls
+
+
+def sweep(now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Evict games idle for longer than their status's TTL, with all their turns.
+    
+    Persistent storage is purged by the same TTLs, so abandoned games don't
+    come back on the next lookup.
+    
+    Args:
+        now: The current time (defaults to time.time())
+    
+    Returns:
+        Counts of evicted games, turns, players and objects, the approximate
+        bytes they held, and the games and turns deleted from storage
+    """
+    import journal
+    
+    now = time.time() if now is None else now
+    ttls = game_ttls()
+    reclaimed = {"games": 0, "turns": 0, "players": 0, "objects": 0, "bytes": 0,
+                 "stored_games": 0, "stored_turns": 0}
+    
+    for status, seconds in ttls.items():
+        for game in get_games_with_status(status):
+            if now - last_active.get(game.game_id, now) < seconds:
+                continue
+            with game_lock(game.game_id):
+                # Check again, the game may have been used since
+                if game.status != status or now - last_active.get(game.game_id, now) < seconds:
+                    continue
+                evicted_turns, size = evict_game(game.game_id)
+                # Journaled so a restart doesn't rebuild the game from its older records
+                journal.record("evict", game_id=game.game_id)
+            reclaimed["games"] += 1
+            reclaimed["turns"] += evicted_turns
+            reclaimed["players"] += len(game.players)
+            reclaimed["bytes"] += size
+    reclaimed["objects"] = reclaimed["games"] + reclaimed["turns"] + reclaimed["players"]
+    
+    storage = game_storage.get_storage()
+    if storage.persistent and ttls:
+        reclaimed["stored_games"], reclaimed["stored_turns"] = storage.purge(ttls, now)
+    
+    with _sweep_lock:
+        sweep_totals["sweeps"] += 1
+        for key, count in reclaimed.items():
+            sweep_totals[key] += count
+    return reclaimed
+
+
+def evict_game(game_id: str) -> Tuple[int, int]:
+    """
+    Drop a game and its turns from memory and the indexes.
+    
+    Returns:
+        Tuple of (turns evicted, approximate bytes reclaimed)
+    """
+    with _load_lock:
+        game = games.pop(game_id, None)
+        turn_ids = turns_by_game.pop(game_id, [])
+        evicted_turns = [turns.pop(turn_id) for turn_id in turn_ids if turn_id in turns]
+        last_active.pop(game_id, None)
+        if game is not None and games_by_name.get(game.game_name.lower()) == game_id:
+            del games_by_name[game.game_name.lower()]
+        with _index_lock:
+            previous = indexed_games.get(game_id)
+            if previous is not None:
+                unindex(game_id, *previous)
+    return len(evicted_turns), approximate_size((game, evicted_turns))
+
+
+def approximate_size(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Estimate the memory held by an object graph (each distinct object counted once)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(key, seen) + approximate_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, seen) for item in obj)
+    else:
+        if hasattr(obj, "__dict__"):
+            size += approximate_size(vars(obj), seen)
+        for name in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, name):
+                size += approximate_size(getattr(obj, name), seen)
+    return size
+
+
+sweep_totals = {"sweeps": 0, "games": 0, "turns": 0, "players": 0, "objects": 0, "bytes": 0,
+                "stored_games": 0, "stored_turns": 0}
+_sweep_lock = threading.Lock()
+_sweeper: Optional[threading.Thread] = None
+_sweeper_stop = threading.Event()
+
+
+def start_sweeper(interval: Optional[float] = None) -> None:
+    """Run sweep() every GAME_SWEEP_INTERVAL seconds (default 60) on a background thread."""
+    global _sweeper
+    if interval is None:
+        interval = float(os.getenv("GAME_SWEEP_INTERVAL", "60"))
+    with _sweep_lock:
+        if _sweeper is not None and _sweeper.is_alive():
+            return
+        _sweeper_stop.clear()
+        _sweeper = threading.Thread(target=_run_sweeper, args=(interval,), name="game-sweeper", daemon=True)
+        _sweeper.start()
+
+
+def stop_sweeper() -> None:
+    global _sweeper
+    with _sweep_lock:
+        sweeper, _sweeper = _sweeper, None
+    _sweeper_stop.set()
+    if sweeper is not None:
+        sweeper.join()
+
+
+def sweep_stats() -> Dict[str, int]:
+    """Get what the sweeper has reclaimed since startup."""
+    with _sweep_lock:
+        return dict(sweep_totals)
+
 
+def _run_sweeper(interval: float) -> None:
+    while not _sweeper_stop.wait(interval):
+        try:
+            reclaimed = sweep()
+            if reclaimed["games"] or reclaimed["stored_games"]:
+                print(f"Swept {reclaimed['games']} idle games ({reclaimed['objects']} objects, "
+                      f"~{reclaimed['bytes']} bytes) and {reclaimed['stored_games']} stored games")
+        except Exception as e:
+            print(f"Game sweep failed: {e}")
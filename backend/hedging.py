@@ -0,0 +1,195 @@
+"""
+Hedged requests for the similarity provider.
+
+With SIMILARITY_HEDGE=1, a call that hasn't returned within the
+SIMILARITY_HEDGE_PERCENTILE (default 95) of recent call latencies gets a
+duplicate request, and the first usable answer wins. Hedges are capped at
+SIMILARITY_HEDGE_MAX_RATE (default 0.1) extra requests per call, and are
+only sent once enough latencies have been seen to estimate the percentile.
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import os
+import threading
+import time
+
+import usage_ledger
+
+
+class Hedger:
+    """Tracks recent latencies of one kind of call and hedges its slow calls."""
+    
+    def __init__(self, percentile: float = 95.0, max_rate: float = 0.1,
+                 window: int = 200, min_samples: int = 20):
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.calls = 0
+        self.fired = 0
+        self.won = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, duration: float) -> None:
+        """Record the latency of one request."""
+        with self._lock:
+            self._latencies.append(duration)
+    
+    def delay(self) -> Optional[float]:
+        """Get how long to wait before hedging, or None without enough samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
+    
+    def run(self, call: Callable[[], Any], admit: Optional[Callable[[], bool]] = None) -> Any:
+        """
+        Make a call, sending a duplicate if it is slower than the hedge delay.
+        
+        Args:
+            call: Makes one request
+            admit: Asked before sending the duplicate; no hedge is sent if it
+                returns False
+        
+        Returns:
+            The first non-None result, or None if every request returned None
+        """
+        delay = self._start()
+        if delay is None:
+            return self._timed(call)
+        
+        primary = usage_ledger.submit(get_executor(), self._timed, call)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._claim_hedge(admit):
+            return primary.result()
+        
+        hedge = usage_ledger.submit(get_executor(), self._timed, call)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result is not None:
+                    if future is hedge:
+                        self._count_win()
+                    return result
+        return None
+    
+    async def run_async(self, call: Callable[[], Awaitable[Any]],
+                        admit: Optional[Callable[[], bool]] = None) -> Any:
+        """Async version of run; the losing request is cancelled."""
+        delay = self._start()
+        primary = asyncio.ensure_future(self._timed_async(call))
+        if delay is None:
+            return await primary
+        
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._claim_hedge(admit):
+            return await primary
+        
+        hedge = asyncio.ensure_future(self._timed_async(call))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result is not None:
+                        if task is hedge:
+                            self._count_win()
+                        return result
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "fired": self.fired,
+                "won": self.won,
+                "samples": len(self._latencies),
+            }
+    
+    def _start(self) -> Optional[float]:
+        with self._lock:
+            self.calls += 1
+        return self.delay()
+    
+    def _claim_hedge(self, admit: Optional[Callable[[], bool]] = None) -> bool:
+        """Reserve a hedge if the extra request rate stays under the cap and admit() allows it."""
+        with self._lock:
+            if self.fired + 1 > self.max_rate * self.calls:
+                return False
+            if admit is not None and not admit():
+                return False
+            self.fired += 1
+            return True
+    
+    def _count_win(self) -> None:
+        with self._lock:
+            self.won += 1
+    
+    def _timed(self, call: Callable[[], Any]) -> Any:
+        start = time.monotonic()
+        try:
+            return call()
+        finally:
+            self.record(time.monotonic() - start)
+    
+    async def _timed_async(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.monotonic()
+        result = await call()
+        # Cancelled requests are not recorded; they'd understate the latency
+        self.record(time.monotonic() - start)
+        return result
+
+
+def enabled() -> bool:
+    """Check if slow similarity calls should be hedged."""
+    return os.getenv("SIMILARITY_HEDGE", "0") == "1"
+
+
+_hedgers: Dict[str, Hedger] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_hedger(kind: str) -> Hedger:
+    """Get the hedger for one kind of call (check, cluster, ...), creating it once."""
+    with _lock:
+        if kind not in _hedgers:
+            _hedgers[kind] = Hedger(
+                percentile=float(os.getenv("SIMILARITY_HEDGE_PERCENTILE", "95")),
+                max_rate=float(os.getenv("SIMILARITY_HEDGE_MAX_RATE", "0.1"))
+            )
+        return _hedgers[kind]
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the thread pool that runs hedged sync requests."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=2 * int(os.getenv("SIMILARITY_MAX_WORKERS", "8")),
+                thread_name_prefix="similarity-hedge"
+            )
+        return _executor
+
+
+def stats() -> Dict[str, Dict[str, object]]:
+    """Get hedge counters per kind of call for operators."""
+    with _lock:
+        hedgers = dict(_hedgers)
+    return {kind: hedger.stats() for kind, hedger in hedgers.items()}
+
+
+def reset() -> None:
+    with _lock:
+        _hedgers.clear()
@@ -0,0 +1,436 @@
+"""
+Write-ahead journal of game changes, with periodic snapshots.
+
+Set GAME_JOURNAL_DIR to a directory to enable it. Every change game_manager
+makes to a game (create, join, start, turn, question, answer, complete),
+and every game the sweeper evicts, is appended to the current journal file
+there as one compact JSON line, and the file is fsynced every
+GAME_JOURNAL_FSYNC_INTERVAL seconds (default 0.1), so a crash loses at
+most that much. After GAME_JOURNAL_SNAPSHOT_EVERY
+records (default 10000), and on shutdown, all games are written to a
+snapshot and older journal files are deleted.
+
+On startup restore() loads the latest snapshot and replays the journal
+files written after it, so startup time follows recent activity rather
+than total history. Replaying a record checks the same conditions the
+original change did, so records already reflected in a snapshot are
+skipped.
+
+Files are numbered by generation: journal-000003.jsonl holds the records
+written after snapshot-000003.json was started.
+
+The journal is for a single server process. It stays off when
+BACKEND_WORKERS or WEB_CONCURRENCY asks for more than one worker (use
+GAME_STORE=shared instead), and a process that finds the directory locked
+by another one runs without it rather than sharing its files.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import re
+import threading
+import time
+
+from models import Game, Player, Turn, intern_id
+import game_store
+
+
+FILE_PATTERN = re.compile(r"^(journal|snapshot)-(\d+)\.(jsonl|json)$")
+
+
+class Journal:
+    """An append-only journal of game changes in one directory."""
+    
+    def __init__(self, directory: str, fsync_interval: float = 0.1, snapshot_every: int = 10000):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self.records = 0
+        self.syncs = 0
+        self.snapshots = 0
+        self._since_snapshot = 0
+        self._unsynced = False
+        self._lock = threading.Lock()  # guards the journal file
+        self._snapshot_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = threading.Event()
+        
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = self._lock_directory()
+        journals, _ = self.files()
+        # Start a new file rather than append after a line a crash may have cut short
+        self.generation = max([generation for generation, _ in journals] + [0]) + 1
+        self._file = open(self.journal_path(self.generation), "a", encoding="utf-8")
+        
+        self._syncer = threading.Thread(target=self._run, name="game-journal", daemon=True)
+        self._syncer.start()
+    
+    def _lock_directory(self) -> int:
+        """Take the directory for this process; generations and snapshots can't be shared."""
+        import fcntl
+        
+        fd = os.open(os.path.join(self.directory, "journal.lock"), os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            raise RuntimeError(f"Journal directory {self.directory} is in use by another process")
+        return fd
+    
+    def journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"journal-{generation:06d}.jsonl")
+    
+    def snapshot_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"snapshot-{generation:06d}.json")
+    
+    def files(self) -> Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]:
+        """
+        Get the journal and snapshot files in the directory.
+        
+        Returns:
+            Tuple of (journals, snapshots), each a sorted list of (generation, path)
+        """
+        journals, snapshots = [], []
+        for name in os.listdir(self.directory):
+            match = FILE_PATTERN.match(name)
+            if match:
+                found = journals if match.group(1) == "journal" else snapshots
+                found.append((int(match.group(2)), os.path.join(self.directory, name)))
+        return sorted(journals), sorted(snapshots)
+    
+    def record(self, op: str, **fields: Any) -> None:
+        """
+        Append a change to the journal.
+        
+        Call it while holding the game's lock, after the change is applied, so
+        a game's records are in the order its changes happened.
+        """
+        line = json.dumps({"op": op, **fields}, separators=(",", ":"))
+        with self._lock:
+            if self._file.closed:
+                print(f"Journal closed, dropping {op} record")
+                return
+            self._file.write(line + "\n")
+            # Hand the line to the OS now; fsync waits for the interval
+            self._file.flush()
+            self.records += 1
+            self._since_snapshot += 1
+            self._unsynced = True
+            if self.fsync_interval <= 0:
+                self._sync()
+        self._wake.set()
+    
+    def sync(self) -> None:
+        """Fsync everything recorded so far."""
+        with self._lock:
+            self._sync()
+    
+    def snapshot(self) -> None:
+        """
+        Write every game to a new snapshot and delete the files it replaces.
+        
+        New records go to a fresh journal file first. Games are then written
+        one at a time under their locks, so each is consistent; a change
+        made meanwhile may be in both the snapshot and the new journal, and
+        is skipped when replayed.
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                self._sync()
+                self._file.close()
+                self.generation += 1
+                generation = self.generation
+                self._file = open(self.journal_path(generation), "a", encoding="utf-8")
+                self._since_snapshot = 0
+            
+            snapshot = {"generation": generation, "games": [], "turns": []}
+            for game_id in list(game_store.games):
+                with game_store.game_lock(game_id):
+                    game = game_store.games.get(game_id)
+                    if game is None:
+                        continue
+                    snapshot["games"].append(game.to_dict())
+                    snapshot["turns"].extend(turn.to_dict() for turn in game_store.get_all_turns(game_id))
+            
+            path = self.snapshot_path(generation)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            self.snapshots += 1
+            
+            # Everything before this generation is now in the snapshot
+            journals, snapshots = self.files()
+            for older, older_path in journals + snapshots:
+                if older < generation:
+                    os.remove(older_path)
+    
+    def restore(self) -> Dict[str, int]:
+        """
+        Load the latest snapshot and replay the journal files written since.
+        
+        Turns left waiting for scores are queued for scoring again.
+        
+        Returns:
+            Counts of games loaded from the snapshot and records replayed and skipped
+        """
+        journals, snapshots = self.files()
+        restored = {"games": 0, "replayed": 0, "skipped": 0}
+        start = 0
+        if snapshots:
+            start, path = snapshots[-1]
+            with open(path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            for data in snapshot["games"]:
+                game_store.save_game(Game.from_dict(data))
+                restored["games"] += 1
+            for data in snapshot["turns"]:
+                game_store.save_turn(Turn.from_dict(data))
+        
+        for generation, path in journals:
+            if generation < start or generation == self.generation:
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        print(f"Skipping unreadable journal line in {path}")
+                        continue
+                    if replay(record):
+                        restored["replayed"] += 1
+                    else:
+                        restored["skipped"] += 1
+        
+        import scoring_queue
+        for game in game_store.get_games_with_status("playing"):
+            turn = game_store.get_current_turn(game.game_id)
+            if turn is not None and turn.phase == "scoring_pending":
+                scoring_queue.enqueue(game.game_id)
+        return restored
+    
+    def close(self) -> None:
+        """Snapshot, stop the syncer and close the journal (on shutdown)."""
+        if self._closing.is_set():
+            return
+        self._closing.set()
+        self._wake.set()
+        self._syncer.join()
+        self.snapshot()
+        with self._lock:
+            self._sync()
+            self._file.close()
+        # Closing the descriptor releases the directory
+        os.close(self._lock_fd)
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "generation": self.generation,
+                "records": self.records,
+                "since_snapshot": self._since_snapshot,
+                "syncs": self.syncs,
+                "snapshots": self.snapshots,
+            }
+    
+    def _sync(self) -> None:
+        """Fsync the journal file (caller holds _lock)."""
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = False
+            self.syncs += 1
+    
+    def _run(self) -> None:
+        while not self._closing.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            # Let records arriving meanwhile share this fsync
+            self._closing.wait(self.fsync_interval)
+            try:
+                self.sync()
+                if self._since_snapshot >= self.snapshot_every:
+                    self.snapshot()
+            except OSError as e:
+                print(f"Could not write game journal to {self.directory}: {e}")
+
+
+def replay(record: Dict[str, Any]) -> bool:
+    """
+    Apply one journal record to game_store.
+    
+    Returns:
+        True if it was applied, False if the change was already there
+    """
+    apply = REPLAYERS.get(record.get("op"))
+    if apply is None:
+        print(f"Skipping unknown journal record: {record.get('op')}")
+        return False
+    return apply(record)
+
+
+def _replay_create(record: Dict[str, Any]) -> bool:
+    if game_store.get_game(record["game"]["game_id"]) is not None:
+        return False
+    game_store.save_game(Game.from_dict(record["game"]))
+    return True
+
+
+def _replay_join(record: Dict[str, Any]) -> bool:
+    game = game_store.get_game(record["game_id"])
+    if game is None or game.status != "waiting" or game.has_player(record["player_id"]):
+        return False
+    game.add_player(Player(name=record["name"], player_id=record["player_id"]))
+    game_store.save_game(game)
+    return True
+
+
+def _replay_start(record: Dict[str, Any]) -> bool:
+    game = game_store.get_game(record["game_id"])
+    if game is None or game.status != "waiting":
+        return False
+    game.status = "playing"
+    game.rounds_per_player = record["rounds"]
+    game.current_turn_index = 0
+    game.current_round = 0
+    game_store.save_game(game)
+    return True
+
+
+def _replay_turn(record: Dict[str, Any]) -> bool:
+    game = game_store.get_game(record["game_id"])
+    if game is None or game_store.get_turn(record["turn_id"]) is not None:
+        return False
+    game_store.save_turn(Turn(turn_id=record["turn_id"], game_id=game.game_id,
+                              questioner_id=record["questioner_id"], phase="question"))
+    game.current_turn_id = intern_id(record["turn_id"])
+    game_store.save_game(game)
+    return True
+
+
+def _replay_question(record: Dict[str, Any]) -> bool:
+    turn = game_store.get_turn(record["turn_id"])
+    if turn is None or turn.phase != "question":
+        return False
+    turn.question = record["question"]
+    turn.phase = "answer"
+    game_store.save_turn(turn)
+    return True
+
+
+def _replay_answer(record: Dict[str, Any]) -> bool:
+    game = game_store.get_game(record["game_id"])
+    turn = game_store.get_turn(record["turn_id"])
+    if game is None or turn is None or turn.phase != "answer" or record["player_id"] in turn.answers:
+        return False
+    turn.answers[intern_id(record["player_id"])] = record["word"]
+    if len(turn.answers) == len(game.players):
+        turn.phase = "scoring_pending"
+    game_store.save_turn(turn)
+    return True
+
+
+def _replay_complete(record: Dict[str, Any]) -> bool:
+    game = game_store.get_game(record["game_id"])
+    turn = game_store.get_turn(record["turn_id"])
+    if game is None or turn is None or turn.is_complete:
+        return False
+    from game_manager import apply_turn_scores
+    apply_turn_scores(game, turn, {intern_id(player_id): points for player_id, points in record["scores"].items()})
+    return True
+
+
+def _replay_evict(record: Dict[str, Any]) -> bool:
+    if game_store.get_game(record["game_id"]) is None:
+        return False
+    game_store.evict_game(record["game_id"])
+    return True
+
+
+REPLAYERS = {
+    "create": _replay_create,
+    "join": _replay_join,
+    "start": _replay_start,
+    "turn": _replay_turn,
+    "question": _replay_question,
+    "answer": _replay_answer,
+    "complete": _replay_complete,
+    "evict": _replay_evict,
+}
+
+
+_journal: Optional[Journal] = None
+_journal_dir: Optional[str] = None
+_journal_lock = threading.Lock()
+
+
+def worker_count() -> int:
+    """Get the number of server workers configured for this deployment."""
+    return max(int(os.getenv("BACKEND_WORKERS") or 1), int(os.getenv("WEB_CONCURRENCY") or 1))
+
+
+def get_journal() -> Optional[Journal]:
+    """
+    Get the journal for GAME_JOURNAL_DIR, opening it once.
+    
+    Returns:
+        The journal, or None if none is configured or it can't be used here
+        (more than one worker, or the directory is another process's)
+    """
+    global _journal, _journal_dir
+    
+    directory = os.getenv("GAME_JOURNAL_DIR")
+    replaced = None
+    with _journal_lock:
+        if _journal_dir != directory:
+            replaced = _journal
+            _journal = None
+            _journal_dir = directory
+            if directory and worker_count() > 1:
+                print("GAME_JOURNAL_DIR is ignored with more than one worker; use GAME_STORE=shared")
+            elif directory:
+                try:
+                    _journal = Journal(
+                        directory,
+                        fsync_interval=float(os.getenv("GAME_JOURNAL_FSYNC_INTERVAL", "0.1")),
+                        snapshot_every=int(os.getenv("GAME_JOURNAL_SNAPSHOT_EVERY", "10000"))
+                    )
+                except RuntimeError as e:
+                    print(f"Game journal disabled: {e}")
+        journal = _journal
+    
+    # Close outside _journal_lock: the snapshot takes game locks, whose
+    # holders may be waiting here to record a change
+    if replaced is not None:
+        replaced.close()
+    return journal
+
+
+def record(op: str, **fields: Any) -> None:
+    """Append a change to the journal, if one is configured."""
+    # Callers hold a game lock, so skip _journal_lock unless the journal needs opening
+    journal = _journal if _journal_dir == os.getenv("GAME_JOURNAL_DIR") else get_journal()
+    if journal is not None:
+        journal.record(op, **fields)
+
+
+def restore() -> Optional[Dict[str, int]]:
+    """Rebuild game_store from the journal on startup, if one is configured."""
+    journal = get_journal()
+    if journal is None:
+        return None
+    start = time.monotonic()
+    restored = journal.restore()
+    print(f"Restored {restored['games']} games and replayed {restored['replayed']} journal records "
+          f"in {time.monotonic() - start:.2f}s")
+    return restored
+
+
+def close_journal() -> None:
+    """Snapshot and close the journal (on shutdown)."""
+    global _journal, _journal_dir
+    with _journal_lock:
+        journal, _journal, _journal_dir = _journal, None, None
+    if journal is not None:
+        journal.close()
@@ -1,9 +1,42 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the local similarity indexes up front rather than on the first scored turn
+    import embeddings
+    import pair_classifier
+    import typo_index
+    
+    typo_index.get_index()
+    embeddings.get_table()
+    pair_classifier.get_classifier()
+    
+    # Rebuild games from the journal's snapshot and the changes since
+    import journal
+    journal.restore()
+    
+    import game_store
+    game_store.start_sweeper()
+    yield
+    
+    game_store.stop_sweeper()
+    
+    # Let turns being scored finish before the final snapshot
+    import scoring_queue
+    scoring_queue.wait_for_idle(timeout=30)
+    journal.close_journal()
+    
+    # Write games still waiting in the storage batch before the process exits
+    import game_storage
+    game_storage.close_storage()
+
+
+app = FastAPI(lifespan=lifespan)
 
 import os
 
@@ -66,7 +99,7 @@ class TurnInfo(BaseModel):
     turn_id: str
     questioner_id: str
     question: Optional[str] = None
-    phase: str  # question, answer, scoring
+    phase: str  # question, answer, scoring_pending, scoring
     is_complete: bool
     answers: Optional[Dict[str, str]] = None  # player_id -> word (only shown if phase is scoring or player has answered)
     scores: Optional[Dict[str, int]] = None  # player_id -> points (only shown if phase is scoring)
@@ -112,14 +145,15 @@ def ping():
     return {"message": "Pong"}
 
 @app.get("/api/games", response_model=list[GameListItem])
-def list_waiting_games():
-    """List all games with status 'waiting'."""
+def list_waiting_games(
+    prefix: str = "",
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1, le=500)
+):
+    """List games with status 'waiting' alphabetically, optionally one page or only names starting with prefix."""
     try:
-        from game_store import get_all_waiting_games
-        waiting_games = get_all_waiting_games()
-        
-        # Sort alphabetically by game name
-        sorted_games = sorted(waiting_games, key=lambda g: g.game_name)
+        from game_store import list_waiting_games as list_waiting
+        waiting_games = list_waiting(prefix=prefix, offset=offset, limit=limit)
         
         return [
             GameListItem(
@@ -127,7 +161,7 @@ def list_waiting_games():
                 game_id=game.game_id,
                 player_count=len(game.players)
             )
-            for game in sorted_games
+            for game in waiting_games
         ]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -200,84 +234,90 @@ def join_game(request: JoinGameRequest):
 def get_game_state(game_id: str, player_id: Optional[str] = None):
     """Get current game state."""
     try:
-        from game_store import get_game, get_current_turn, get_all_turns
-        game = get_game(game_id)
-        
-        if not game:
-            raise HTTPException(status_code=404, detail="Game not found")
-        
-        # Convert players to PlayerInfo
-        players_info = [
-            PlayerInfo(
-                name=player.name,
-                player_id=player.player_id,
-                score=player.score,
-                is_creator=player.is_creator
-            )
-            for player in game.players
-        ]
+        from game_store import game_lock, get_game, get_current_turn, get_all_turns, touch_game
         
-        # Get all turns for the game
-        all_turns_list = get_all_turns(game_id)
-        all_turns_info = []
-        
-        for turn in all_turns_list:
-            # Determine what answers to show based on phase and player
-            answers_to_show = None
-            if turn.phase == "scoring" or turn.is_complete:
-                # Show all answers for completed turns
-                answers_to_show = turn.answers
-            elif turn.phase == "answer":
-                # During answer phase, show which players have answered (but not their words)
-                answers_to_show = {pid: "answered" for pid in turn.answers.keys()}
+        # Read under the game's lock so a turn being scored is never seen half-applied
+        with game_lock(game_id):
+            game = get_game(game_id)
+            
+            if not game:
+                raise HTTPException(status_code=404, detail="Game not found")
+            
+            # A client still polling the game keeps it from being swept
+            touch_game(game_id)
+            
+            # Convert players to PlayerInfo
+            players_info = [
+                PlayerInfo(
+                    name=player.name,
+                    player_id=player.player_id,
+                    score=player.score,
+                    is_creator=player.is_creator
+                )
+                for player in game.players
+            ]
+            
+            # Get all turns for the game
+            all_turns_list = get_all_turns(game_id)
+            all_turns_info = []
+            
+            for turn in all_turns_list:
+                # Determine what answers to show based on phase and player
+                answers_to_show = None
+                if turn.phase == "scoring" or turn.is_complete:
+                    # Show all answers for completed turns
+                    answers_to_show = turn.answers
+                elif turn.phase in ("answer", "scoring_pending"):
+                    # Until scores are in, show which players have answered (but not their words)
+                    answers_to_show = {pid: "answered" for pid in turn.answers.keys()}
+            
+                scores_to_show = None
+                if turn.phase == "scoring" or turn.is_complete:
+                    scores_to_show = turn.scores
+            
+                # Filter typing players to only show those who typed recently (within last 3 seconds)
+                import time
+                current_time = time.time()
+                active_typing = {
+                    pid: ts for pid, ts in turn.typing_players.items()
+                    if current_time - ts < 3.0
+                } if turn.typing_players else {}
             
-            scores_to_show = None
-            if turn.phase == "scoring" or turn.is_complete:
-                scores_to_show = turn.scores
+                turn_info = TurnInfo(
+                    turn_id=turn.turn_id,
+                    questioner_id=turn.questioner_id,
+                    question=turn.question,
+                    phase=turn.phase,
+                    is_complete=turn.is_complete,
+                    answers=answers_to_show,
+                    scores=scores_to_show,
+                    typing_players=active_typing if active_typing else None
+                )
+                all_turns_info.append(turn_info)
             
-            # Filter typing players to only show those who typed recently (within last 3 seconds)
-            import time
-            current_time = time.time()
-            active_typing = {
-                pid: ts for pid, ts in turn.typing_players.items()
-                if current_time - ts < 3.0
-            } if turn.typing_players else {}
+            # Get current turn information (for backward compatibility)
+            turn_info = None
+            if game.current_turn_id:
+                turn = get_current_turn(game_id)
+                if turn:
+                    # Find it in all_turns_info
+                    for t in all_turns_info:
+                        if t.turn_id == turn.turn_id:
+                            turn_info = t
+                            break
             
-            turn_info = TurnInfo(
-                turn_id=turn.turn_id,
-                questioner_id=turn.questioner_id,
-                question=turn.question,
-                phase=turn.phase,
-                is_complete=turn.is_complete,
-                answers=answers_to_show,
-                scores=scores_to_show,
-                typing_players=active_typing if active_typing else None
+            return GameStateResponse(
+                game_id=game.game_id,
+                game_name=game.game_name,
+                players=players_info,
+                creator_id=game.creator_id,
+                status=game.status,
+                rounds_per_player=game.rounds_per_player,
+                current_turn_index=game.current_turn_index,
+                current_round=game.current_round,
+                current_turn=turn_info,
+                all_turns=all_turns_info
             )
-            all_turns_info.append(turn_info)
-        
-        # Get current turn information (for backward compatibility)
-        turn_info = None
-        if game.current_turn_id:
-            turn = get_current_turn(game_id)
-            if turn:
-                # Find it in all_turns_info
-                for t in all_turns_info:
-                    if t.turn_id == turn.turn_id:
-                        turn_info = t
-                        break
-        
-        return GameStateResponse(
-            game_id=game.game_id,
-            game_name=game.game_name,
-            players=players_info,
-            creator_id=game.creator_id,
-            status=game.status,
-            rounds_per_player=game.rounds_per_player,
-            current_turn_index=game.current_turn_index,
-            current_round=game.current_round,
-            current_turn=turn_info,
-            all_turns=all_turns_info
-        )
     except HTTPException:
         raise
     except Exception as e:
@@ -326,11 +366,12 @@ def submit_question_endpoint(game_id: str, request: QuestionRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.post("/api/games/{game_id}/answer", response_model=ActionResponse)
-def submit_answer_endpoint(game_id: str, request: AnswerRequest):
+async def submit_answer_endpoint(game_id: str, request: AnswerRequest):
     """Submit an answer for the current turn."""
     try:
-        from game_manager import submit_answer
-        success, error = submit_answer(game_id, request.player_id, request.word)
+        # Async so scoring the final answer doesn't hold a threadpool worker
+        from game_manager import submit_answer_async
+        success, error = await submit_answer_async(game_id, request.player_id, request.word)
         
         if not success:
             return ActionResponse(success=False, error=error)
@@ -343,21 +384,91 @@ def submit_answer_endpoint(game_id: str, request: AnswerRequest):
 def update_typing_endpoint(game_id: str, request: TypingRequest):
     """Update typing indicator for a player."""
     try:
-        from game_store import get_current_turn, save_turn
+        from game_store import game_lock, get_current_turn, save_turn
+        from models import intern_id
         import time
         
-        turn = get_current_turn(game_id)
-        if not turn:
-            return ActionResponse(success=False, error="No active turn")
-        
-        if turn.phase != "answer":
-            return ActionResponse(success=False, error="Not in answer phase")
-        
-        # Update typing timestamp for this player
-        turn.typing_players[request.player_id] = time.time()
-        save_turn(turn)
+        with game_lock(game_id):
+            turn = get_current_turn(game_id)
+            if not turn:
+                return ActionResponse(success=False, error="No active turn")
+            
+            if turn.phase != "answer":
+                return ActionResponse(success=False, error="Not in answer phase")
+            
+            # Update typing timestamp for this player
+            turn.typing_players[intern_id(request.player_id)] = time.time()
+            save_turn(turn)
         
         return ActionResponse(success=True)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+def require_admin(x_admin_token: Optional[str]) -> None:
+    """Reject admin requests without the ADMIN_TOKEN; admin endpoints are off unless one is set."""
+    import secrets
+    
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or not secrets.compare_digest(x_admin_token or "", admin_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@app.get("/api/admin/similarity")
+def similarity_status(x_admin_token: Optional[str] = Header(default=None)):
+    """Report similarity caches, coalesced and hedged requests, circuit breaker state, degraded-mode counts and the scoring queue."""
+    require_admin(x_admin_token)
+    
+    import hedging
+    import scoring_queue
+    import similarity_health
+    import word_similarity
+    
+    return {
+        "backend": os.getenv("SIMILARITY_BACKEND", "openai"),
+        "verdict_cache": word_similarity.verdict_cache.stats(),
+        "canonical_cache": word_similarity.canonical_cache.stats(),
+        "coalesced": {
+            "shared": word_similarity.pair_flight.shared + word_similarity.pair_flight_async.shared,
+            "in_flight": word_similarity.pair_flight.in_flight() + word_similarity.pair_flight_async.in_flight(),
+        },
+        "health": similarity_health.stats(),
+        "hedging": hedging.stats(),
+        "scoring_queue": scoring_queue.stats(),
+    }
+
+@app.get("/api/admin/usage")
+def usage_status(game_id: Optional[str] = None, limit: int = 20,
+                 x_admin_token: Optional[str] = Header(default=None)):
+    """Report AI calls, tokens and latency in total and per game (with its turns if game_id is given)."""
+    require_admin(x_admin_token)
+    
+    import usage_ledger
+    
+    if game_id is not None:
+        usage = usage_ledger.game_usage(game_id)
+        if usage is None:
+            raise HTTPException(status_code=404, detail="No usage recorded for game")
+        return usage
+    
+    return {
+        "totals": usage_ledger.totals(),
+        "games": usage_ledger.recent_games(limit),
+    }
+
+@app.get("/api/admin/store")
+def store_status(x_admin_token: Optional[str] = Header(default=None)):
+    """Report games held in memory per status, what the sweeper has reclaimed and the storage backend."""
+    require_admin(x_admin_token)
+    
+    import game_storage
+    import game_store
+    import journal
+    
+    storage = game_storage.get_storage()
+    return {
+        "games": {status: len(game_ids) for status, game_ids in game_store.games_by_status.items()},
+        "turns": len(game_store.turns),
+        "ttls": game_store.game_ttls(),
+        "sweeper": game_store.sweep_stats(),
+        "storage": {"backend": storage.name, **storage.stats()},
+        "journal": journal.get_journal().stats() if journal.get_journal() else None,
+    }
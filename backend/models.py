@@ -1,9 +1,15 @@
-from dataclasses import dataclass, field
-from typing import Optional
+from dataclasses import asdict, dataclass, field
+from typing import Optional, Union
+import sys
 import uuid
 
 
-@dataclass
+def intern_id(value: Optional[str]) -> Optional[str]:
+    """Intern an id so its copies in answers, scores and indexes share one string."""
+    return sys.intern(value) if value else value
+
+
+@dataclass(slots=True)
 class Player:
     name: str
     player_id: str
@@ -11,11 +17,10 @@ class Player:
     is_creator: bool = False
 
     def __post_init__(self):
-        if not self.player_id:
-            self.player_id = str(uuid.uuid4())
+        self.player_id = intern_id(self.player_id or str(uuid.uuid4()))
 
 
-@dataclass
+@dataclass(slots=True)
 class Turn:
     turn_id: str
     game_id: str
@@ -24,15 +29,80 @@ class Turn:
     answers: dict[str, str] = field(default_factory=dict)  # player_id -> word (lowercase)
     scores: dict[str, int] = field(default_factory=dict)  # player_id -> points
     is_complete: bool = False
-    phase: str = "question"  # question, answer, scoring
+    phase: str = "question"  # question, answer, scoring_pending, scoring
     typing_players: dict[str, float] = field(default_factory=dict)  # player_id -> timestamp of last typing activity
 
     def __post_init__(self):
-        if not self.turn_id:
-            self.turn_id = str(uuid.uuid4())
+        self.turn_id = intern_id(self.turn_id or str(uuid.uuid4()))
+        self.game_id = intern_id(self.game_id)
+        self.questioner_id = intern_id(self.questioner_id)
+        self.answers = {intern_id(player_id): word for player_id, word in self.answers.items()}
+        self.scores = {intern_id(player_id): points for player_id, points in self.scores.items()}
+
+    def freeze(self) -> "CompletedTurn":
+        """Get the compact, read-only record of this turn once it is scored."""
+        return CompletedTurn(
+            self.turn_id, self.game_id, self.questioner_id, self.question,
+            tuple(self.answers), tuple(sys.intern(word) for word in self.answers.values()),
+            tuple(self.scores), tuple(self.scores.values())
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Union["Turn", "CompletedTurn"]:
+        turn = cls(**data)
+        return turn.freeze() if turn.is_complete else turn
+
+
+@dataclass(frozen=True, slots=True)
+class CompletedTurn:
+    """
+    A scored turn. Answers and scores are kept as parallel tuples of player
+    ids and values (answer words interned) and typing activity is dropped,
+    but it reads like a Turn.
+    """
+    turn_id: str
+    game_id: str
+    questioner_id: str
+    question: Optional[str]
+    answer_ids: tuple[str, ...]
+    answer_words: tuple[str, ...]
+    score_ids: tuple[str, ...]
+    score_points: tuple[int, ...]
+
+    is_complete = True
+    phase = "scoring"
 
+    @property
+    def answers(self) -> dict[str, str]:
+        return dict(zip(self.answer_ids, self.answer_words))
 
-@dataclass
+    @property
+    def scores(self) -> dict[str, int]:
+        return dict(zip(self.score_ids, self.score_points))
+
+    @property
+    def typing_players(self) -> dict[str, float]:
+        return {}
+
+    def to_dict(self) -> dict:
+        """Get the same dict a Turn would give, so storage doesn't tell them apart."""
+        return {
+            "turn_id": self.turn_id,
+            "game_id": self.game_id,
+            "questioner_id": self.questioner_id,
+            "question": self.question,
+            "answers": self.answers,
+            "scores": self.scores,
+            "is_complete": True,
+            "phase": "scoring",
+            "typing_players": {},
+        }
+
+
+@dataclass(slots=True)
 class Game:
     game_id: str
     game_name: str  # stored in lowercase
@@ -43,8 +113,49 @@ class Game:
     current_turn_index: Optional[int] = None
     current_round: int = 0
     current_turn_id: Optional[str] = None
+    # Indexes over players, kept in step by add_player (not stored)
+    players_by_id: dict[str, Player] = field(init=False, repr=False, compare=False, default_factory=dict)
+    player_names: set[str] = field(init=False, repr=False, compare=False, default_factory=set)  # lowercase
 
     def __post_init__(self):
-        if not self.game_id:
-            self.game_id = str(uuid.uuid4())
+        self.game_id = intern_id(self.game_id or str(uuid.uuid4()))
+        self.creator_id = intern_id(self.creator_id)
+        self.current_turn_id = intern_id(self.current_turn_id)
+        self.index_players()
+
+    def index_players(self) -> None:
+        """Rebuild the player indexes from the players list."""
+        self.players_by_id = {player.player_id: player for player in self.players}
+        self.player_names = {player.name.lower() for player in self.players}
+
+    def add_player(self, player: Player) -> None:
+        self.players.append(player)
+        self.players_by_id[player.player_id] = player
+        self.player_names.add(player.name.lower())
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        self._check_index()
+        return self.players_by_id.get(player_id)
+
+    def has_player(self, player_id: str) -> bool:
+        self._check_index()
+        return player_id in self.players_by_id
+
+    def has_player_name(self, name: str) -> bool:
+        """Check if a player already has this name (case-insensitive)."""
+        self._check_index()
+        return name.lower() in self.player_names
+
+    def _check_index(self) -> None:
+        # Players appended to the list directly are picked up here
+        if len(self.players_by_id) != len(self.players):
+            self.index_players()
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data["players_by_id"], data["player_names"]
+        return data
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "Game":
+        return cls(**{**data, "players": [Player(**player) for player in data["players"]]})
@@ -0,0 +1,247 @@
+"""
+Local word-pair classifier learned from recorded AI verdicts.
+
+Set SIMILARITY_VERDICT_LOG to a file to record every AI verdict as a JSON
+line. train_pair_classifier.py fits a logistic regression on character
+n-gram and edit-distance features of the logged pairs and writes a model;
+set SIMILARITY_CLASSIFIER_PATH to that model to answer pairs the model is
+confident about without calling the AI. Pure Python, no dependencies.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import json
+import math
+import os
+import threading
+
+from word_forms import base_form
+
+
+FEATURE_NAMES = [
+    "bigram_jaccard",
+    "trigram_jaccard",
+    "edit_similarity",
+    "prefix_ratio",
+    "length_ratio",
+    "substring",
+    "same_base_form",
+]
+
+
+def ngrams(word: str, n: int) -> Set[str]:
+    padded = f"^{word}$"
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two words."""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def features(word1: str, word2: str) -> List[float]:
+    """Get the feature vector of a pair (every feature is in [0, 1])."""
+    a = word1.strip().lower()
+    b = word2.strip().lower()
+    longest = max(len(a), len(b), 1)
+    shortest = max(min(len(a), len(b)), 1)
+    
+    prefix = 0
+    for char_a, char_b in zip(a, b):
+        if char_a != char_b:
+            break
+        prefix += 1
+    
+    return [
+        jaccard(ngrams(a, 2), ngrams(b, 2)),
+        jaccard(ngrams(a, 3), ngrams(b, 3)),
+        1 - edit_distance(a, b) / longest,
+        prefix / shortest,
+        min(len(a), len(b)) / longest,
+        float(a in b or b in a),
+        float(base_form(a) == base_form(b)),
+    ]
+
+
+class PairClassifier:
+    """
+    Logistic regression over pair features.
+    
+    Pairs scoring at or above `high` are matches and at or below `low` are
+    not; anything in between is left undecided for the AI.
+    """
+    
+    def __init__(self, weights: Sequence[float], bias: float, high: float = 0.95, low: float = 0.02):
+        self.weights = list(weights)
+        self.bias = bias
+        self.high = high
+        self.low = low
+    
+    def probability(self, word1: str, word2: str) -> float:
+        z = self.bias + sum(w * x for w, x in zip(self.weights, features(word1, word2)))
+        return 1 / (1 + math.exp(-max(-30.0, min(30.0, z))))
+    
+    def classify(self, word1: str, word2: str) -> Optional[bool]:
+        """Decide a pair if the model is confident, or None if not."""
+        p = self.probability(word1, word2)
+        if p >= self.high:
+            return True
+        if p <= self.low:
+            return False
+        return None
+    
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "features": FEATURE_NAMES,
+            "weights": self.weights,
+            "bias": self.bias,
+            "high": self.high,
+            "low": self.low,
+        }
+    
+    @classmethod
+    def load(cls, path: str) -> "PairClassifier":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("features") != FEATURE_NAMES:
+            raise ValueError("model was trained on different features")
+        return cls(data["weights"], data["bias"], data["high"], data["low"])
+    
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def train(examples: Sequence[Tuple[str, str, bool]], epochs: int = 300,
+          learning_rate: float = 0.5, l2: float = 0.001) -> PairClassifier:
+    """
+    Fit a classifier with batch gradient descent.
+    
+    Thresholds are left at their defaults; see choose_thresholds.
+    """
+    rows = [(features(word1, word2), 1.0 if similar else 0.0) for word1, word2, similar in examples]
+    weights = [0.0] * len(FEATURE_NAMES)
+    bias = 0.0
+    if not rows:
+        return PairClassifier(weights, bias)
+    
+    for _ in range(epochs):
+        gradient = [0.0] * len(weights)
+        gradient_bias = 0.0
+        for x, y in rows:
+            z = bias + sum(w * value for w, value in zip(weights, x))
+            error = 1 / (1 + math.exp(-max(-30.0, min(30.0, z)))) - y
+            for i, value in enumerate(x):
+                gradient[i] += error * value
+            gradient_bias += error
+        weights = [
+            w - learning_rate * (g / len(rows) + l2 * w)
+            for w, g in zip(weights, gradient)
+        ]
+        bias -= learning_rate * gradient_bias / len(rows)
+    
+    return PairClassifier(weights, bias)
+
+
+def choose_thresholds(classifier: PairClassifier, examples: Sequence[Tuple[str, str, bool]],
+                      precision: float = 0.98, min_support: int = 10) -> PairClassifier:
+    """
+    Set the classifier's thresholds from held-out examples.
+    
+    `high` becomes the lowest score above which at least `precision` of
+    pairs are matches, and `low` the highest score below which at least
+    `precision` are not. A side with fewer than `min_support` examples
+    reaching the target is disabled.
+    """
+    scored = sorted(
+        ((classifier.probability(word1, word2), similar) for word1, word2, similar in examples),
+        reverse=True
+    )
+    
+    classifier.high = 1.01
+    matches = 0
+    for count, (p, similar) in enumerate(scored, 1):
+        matches += similar
+        if count >= min_support and matches / count >= precision:
+            classifier.high = p
+    
+    classifier.low = -0.01
+    non_matches = 0
+    for count, (p, similar) in enumerate(reversed(scored), 1):
+        non_matches += not similar
+        if count >= min_support and non_matches / count >= precision:
+            classifier.low = p
+    
+    return classifier
+
+
+def read_verdicts(paths: Iterable[str]) -> List[Tuple[str, str, bool]]:
+    """Read logged verdicts, keeping the latest verdict per unordered pair."""
+    verdicts: Dict[Tuple[str, str], Tuple[str, str, bool]] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                word1, word2 = record["word1"], record["word2"]
+                verdicts[tuple(sorted((word1, word2)))] = (word1, word2, bool(record["similar"]))
+    return list(verdicts.values())
+
+
+_log_lock = threading.Lock()
+
+
+def record_verdict(word1: str, word2: str, similar: bool, source: str) -> None:
+    """Append an AI verdict to SIMILARITY_VERDICT_LOG, if set."""
+    path = os.getenv("SIMILARITY_VERDICT_LOG")
+    if not path:
+        return
+    
+    line = json.dumps({"word1": word1, "word2": word2, "similar": similar, "source": source})
+    try:
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print(f"Could not record verdict to {path}: {e}")
+
+
+_classifier: Optional[PairClassifier] = None
+_classifier_path: Optional[str] = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> Optional[PairClassifier]:
+    """
+    Get the classifier configured by SIMILARITY_CLASSIFIER_PATH, loading it once.
+    
+    Returns:
+        The classifier, or None if none is configured or it can't be loaded
+    """
+    global _classifier, _classifier_path
+    
+    path = os.getenv("SIMILARITY_CLASSIFIER_PATH")
+    if not path:
+        return None
+    
+    with _classifier_lock:
+        if _classifier_path != path:
+            _classifier_path = path
+            try:
+                _classifier = PairClassifier.load(path)
+            except Exception as e:
+                print(f"Could not load pair classifier from {path}: {e}")
+                _classifier = None
+        return _classifier
@@ -0,0 +1,87 @@
+"""
+Background scoring of turns.
+
+When SCORING_MODE=background, the final answer of a turn only moves it to the
+"scoring_pending" phase; scoring is handed to a bounded worker pool so the
+answer request returns immediately. SCORING_MAX_CONCURRENT caps how many turns
+score at the same time across all games.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+import os
+import threading
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_pending: Dict[str, Future] = {}  # game_id -> queued or running scoring job
+_counters = {"queued": 0, "completed": 0, "failed": 0}
+
+
+def is_enabled() -> bool:
+    """Check if turns should be scored in the background."""
+    return os.getenv("SCORING_MODE", "inline") == "background"
+
+
+def enqueue(game_id: str) -> Future:
+    """
+    Queue the current turn of a game for scoring.
+    
+    Returns:
+        The scoring job (an already queued job is reused)
+    """
+    global _executor
+    with _lock:
+        existing = _pending.get(game_id)
+        if existing is not None and not existing.done():
+            return existing
+        
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("SCORING_MAX_CONCURRENT", "4")),
+                thread_name_prefix="scoring"
+            )
+        
+        future = _executor.submit(_score_turn, game_id)
+        _pending[game_id] = future
+        _counters["queued"] += 1
+    
+    future.add_done_callback(lambda f: _finish(game_id, f))
+    return future
+
+
+def wait_for_idle(timeout: Optional[float] = None) -> bool:
+    """
+    Wait for all queued scoring jobs to finish.
+    
+    Returns:
+        True if the queue drained before the timeout, False otherwise
+    """
+    with _lock:
+        futures = list(_pending.values())
+    _, not_done = wait(futures, timeout=timeout)
+    return not not_done
+
+
+def stats() -> Dict[str, int]:
+    """Get queue counters for operators."""
+    with _lock:
+        return {"pending": len(_pending), **_counters}
+
+
+def _score_turn(game_id: str) -> None:
+    from game_manager import complete_turn
+    success, error = complete_turn(game_id)
+    if not success:
+        raise RuntimeError(error)
+
+
+def _finish(game_id: str, future: Future) -> None:
+    with _lock:
+        if _pending.get(game_id) is future:
+            del _pending[game_id]
+        if future.exception() is not None:
+            _counters["failed"] += 1
+            print(f"Background scoring failed for game {game_id}: {future.exception()}")
+        else:
+            _counters["completed"] += 1
@@ -0,0 +1,575 @@
+"""
+Pluggable backends that decide word similarity when local tiers can't.
+
+The backend is selected with SIMILARITY_BACKEND:
+- openai: OpenAI chat completions (default; OPENAI_BASE_URL can point it at
+  any compatible server, such as stub_llm_server.py)
+- exact: distinct words never match (no network)
+- local: words match if they share a base form (no network)
+- embeddings: cosine similarity from the configured word-vector table
+- replay: answers recorded in SIMILARITY_REPLAY_PATH, asking
+  SIMILARITY_REPLAY_SOURCE (and recording the answer) on a miss
+
+Every method returns None when the backend can't answer, so callers can
+fall back to another strategy.
+"""
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import os
+import threading
+
+from word_forms import base_form
+import embeddings
+import similarity_health
+import usage_ledger
+
+
+DEFAULT_MODEL = "gpt-5-nano-2025-08-07"
+
+PAIR_SYSTEM_PROMPT = "You are a word similarity checker. Determine if two single words are similar enough to be considered the same answer in a word game. Consider:\n- Spelling variations (color/colour, theater/theatre)\n- Plural/singular forms (dog/dogs)\n- Common synonyms (car/automobile, dog/puppy)\n- Different forms of the same word (run/running)\n\nRespond with only 'YES' or 'NO'."
+
+CANONICAL_SYSTEM_PROMPT = "You normalize single-word answers from a word game. For each word, give the canonical answer that every word considered the same answer would share: the singular, base-form, American spelling of the most common word with that meaning (e.g. colours -> color, running -> run, automobile -> car).\n\nRespond with only a JSON object mapping each given word to its canonical answer."
+
+VOCABULARY_SYSTEM_PROMPT = "You predict answers in a word game where players answer a question with a single word and score when their answers match. List the single-word answers players are most likely to give, including common plural, inflected, misspelled-but-common and synonym variants, and give each its canonical answer: words similar enough to be considered the same answer must share a canonical answer, which is the singular, base-form, American spelling of the most common word with that meaning.\n\nRespond with only a JSON object mapping each likely answer to its canonical answer."
+
+CLUSTER_SYSTEM_PROMPT = "You are a word similarity checker. Group single-word answers from a word game so that words similar enough to be considered the same answer share a group. Consider:\n- Spelling variations (color/colour, theater/theatre)\n- Plural/singular forms (dog/dogs)\n- Common synonyms (car/automobile, dog/puppy)\n- Different forms of the same word (run/running)\n\nRespond with only a JSON object of the form {\"groups\": [[\"word\", ...], ...]} in which every given word appears in exactly one group."
+
+
+class SimilarityBackend:
+    """Base backend that can't decide anything."""
+    
+    name = "none"
+    
+    def available(self) -> bool:
+        """Check if the backend is configured well enough to be asked at all."""
+        return True
+    
+    def check(self, word1: str, word2: str) -> Optional[bool]:
+        """Decide if two words are the same answer."""
+        return None
+    
+    def cluster(self, words: List[str]) -> Optional[List[List[str]]]:
+        """Cluster distinct words into groups of the same answer."""
+        return None
+    
+    def canonicalize(self, words: List[str]) -> Optional[Dict[str, str]]:
+        """Map each word to its canonical answer."""
+        return None
+    
+    def vocabulary(self, question: str, size: int, timeout: Optional[float] = None) -> Optional[Dict[str, str]]:
+        """
+        Predict about `size` likely answers to a question, mapped to their
+        canonical answers, waiting at most `timeout` seconds (defaults to
+        SIMILARITY_CALL_TIMEOUT).
+        """
+        return None
+    
+    # Backends without native async calls run the sync ones in a worker
+    # thread, so a slow lookup (a replay miss going to the network) doesn't
+    # block the event loop and can be timed out
+    async def check_async(self, word1: str, word2: str) -> Optional[bool]:
+        return await asyncio.to_thread(self.check, word1, word2)
+    
+    async def cluster_async(self, words: List[str]) -> Optional[List[List[str]]]:
+        return await asyncio.to_thread(self.cluster, words)
+    
+    async def canonicalize_async(self, words: List[str]) -> Optional[Dict[str, str]]:
+        return await asyncio.to_thread(self.canonicalize, words)
+
+
+class KeyedBackend(SimilarityBackend):
+    """Backend where words are the same answer exactly when their keys are equal."""
+    
+    def key(self, word: str) -> str:
+        raise NotImplementedError
+    
+    def check(self, word1: str, word2: str) -> Optional[bool]:
+        return self.key(word1) == self.key(word2)
+    
+    def cluster(self, words: List[str]) -> Optional[List[List[str]]]:
+        clusters: Dict[str, List[str]] = {}
+        for word in words:
+            clusters.setdefault(self.key(word), []).append(word)
+        return list(clusters.values())
+    
+    def canonicalize(self, words: List[str]) -> Optional[Dict[str, str]]:
+        return {word: self.key(word) for word in words}
+
+
+class ExactBackend(KeyedBackend):
+    """Only identical words (case-insensitive) match."""
+    
+    name = "exact"
+    
+    def key(self, word: str) -> str:
+        return word.strip().lower()
+
+
+class LocalBackend(KeyedBackend):
+    """Words match if they share a base form (plurals, irregular forms, spellings)."""
+    
+    name = "local"
+    
+    def key(self, word: str) -> str:
+        return base_form(word)
+
+
+class EmbeddingBackend(SimilarityBackend):
+    """Words match if their vectors' cosine similarity reaches SIMILARITY_THRESHOLD."""
+    
+    name = "embeddings"
+    
+    def check(self, word1: str, word2: str) -> Optional[bool]:
+        table = embeddings.get_table()
+        if table is None:
+            return None
+        similarity = table.similarity(word1, word2)
+        if similarity is None:
+            return None
+        return similarity >= float(os.getenv("SIMILARITY_THRESHOLD", "0.85"))
+
+
+class OpenAIBackend(SimilarityBackend):
+    """Asks an OpenAI-compatible chat-completions API."""
+    
+    name = "openai"
+    
+    def available(self) -> bool:
+        return bool(os.getenv("OPENAI_API_KEY"))
+    
+    def check(self, word1: str, word2: str) -> Optional[bool]:
+        content = self.complete(pair_request(word1, word2), "AI similarity check failed")
+        return None if content is None else parse_verdict(content)
+    
+    def cluster(self, words: List[str]) -> Optional[List[List[str]]]:
+        content = self.complete(cluster_request(words), "AI clustering failed")
+        return None if content is None else parse_clusters(content, words)
+    
+    def canonicalize(self, words: List[str]) -> Optional[Dict[str, str]]:
+        content = self.complete(canonical_request(words), "AI canonicalization failed")
+        return None if content is None else parse_canonical_forms(content, words)
+    
+    def vocabulary(self, question: str, size: int, timeout: Optional[float] = None) -> Optional[Dict[str, str]]:
+        content = self.complete(vocabulary_request(question, size), "AI vocabulary prefetch failed", timeout)
+        return None if content is None else parse_vocabulary(content)
+    
+    async def check_async(self, word1: str, word2: str) -> Optional[bool]:
+        content = await self.complete_async(pair_request(word1, word2), "AI similarity check failed")
+        return None if content is None else parse_verdict(content)
+    
+    async def cluster_async(self, words: List[str]) -> Optional[List[List[str]]]:
+        content = await self.complete_async(cluster_request(words), "AI clustering failed")
+        return None if content is None else parse_clusters(content, words)
+    
+    async def canonicalize_async(self, words: List[str]) -> Optional[Dict[str, str]]:
+        content = await self.complete_async(canonical_request(words), "AI canonicalization failed")
+        return None if content is None else parse_canonical_forms(content, words)
+    
+    def complete(self, request: dict, error_message: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Send a chat-completion request, waiting at most `timeout` seconds
+        (defaults to SIMILARITY_CALL_TIMEOUT).
+        
+        Returns:
+            The reply text, or None if no API key is set or the call failed
+        """
+        client = get_client()
+        if client is None:
+            return None
+        
+        if timeout is None:
+            timeout = similarity_health.call_timeout()
+        try:
+            response = client.chat.completions.create(**request, timeout=timeout)
+            usage_ledger.record_tokens(response.usage)
+            
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"{error_message}: {e}")
+            return None
+    
+    async def complete_async(self, request: dict, error_message: str) -> Optional[str]:
+        """Async version of complete using the shared async client."""
+        client = get_async_client()
+        if client is None:
+            return None
+        
+        try:
+            response = await client.chat.completions.create(**request, timeout=similarity_health.call_timeout())
+            usage_ledger.record_tokens(response.usage)
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"{error_message}: {e}")
+            return None
+
+
+class ReplayBackend(SimilarityBackend):
+    """
+    Answers from a JSON-lines recording of earlier answers.
+    
+    On a miss the source backend (if any) is asked, and its answer is
+    appended to the recording. Records look like:
+        {"kind": "check", "words": ["car", "automobile"], "answer": true}
+        {"kind": "cluster", "words": [...], "answer": [[...], ...]}
+        {"kind": "canonical", "words": ["automobile"], "answer": "car"}
+        {"kind": "vocabulary", "words": ["<question>"], "answer": {...}}
+    """
+    
+    name = "replay"
+    
+    def __init__(self, path: Optional[str] = None, source: Optional[SimilarityBackend] = None):
+        self.path = path
+        self.source = source
+        self.hits = 0
+        self.misses = 0
+        self._answers: Dict[Tuple[str, Tuple[str, ...]], object] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._answers[self._key(record["kind"], record["words"])] = record["answer"]
+    
+    def check(self, word1: str, word2: str) -> Optional[bool]:
+        return self._replay("check", [word1, word2], lambda: self.source.check(word1, word2))
+    
+    def cluster(self, words: List[str]) -> Optional[List[List[str]]]:
+        return self._replay("cluster", words, lambda: self.source.cluster(words))
+    
+    def canonicalize(self, words: List[str]) -> Optional[Dict[str, str]]:
+        result: Dict[str, str] = {}
+        missing: List[str] = []
+        for word in words:
+            answer = self._lookup("canonical", [word])
+            if answer is None:
+                missing.append(word)
+            else:
+                result[word] = answer
+        
+        if missing:
+            resolved = self.source.canonicalize(missing) if self.source else None
+            if resolved is None:
+                return None
+            for word, canonical in resolved.items():
+                self._record("canonical", [word], canonical)
+            result.update(resolved)
+        return result
+    
+    def vocabulary(self, question: str, size: int, timeout: Optional[float] = None) -> Optional[Dict[str, str]]:
+        return self._replay("vocabulary", [question], lambda: self.source.vocabulary(question, size, timeout))
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._answers)}
+    
+    @staticmethod
+    def _key(kind: str, words: List[str]) -> Tuple[str, Tuple[str, ...]]:
+        return kind, tuple(sorted(word.strip().lower() for word in words))
+    
+    def _lookup(self, kind: str, words: List[str]):
+        with self._lock:
+            answer = self._answers.get(self._key(kind, words))
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return answer
+    
+    def _replay(self, kind: str, words: List[str], ask: Callable[[], object]):
+        answer = self._lookup(kind, words)
+        if answer is not None or self.source is None:
+            return answer
+        
+        answer = ask()
+        if answer is not None:
+            self._record(kind, words, answer)
+        return answer
+    
+    def _record(self, kind: str, words: List[str], answer) -> None:
+        with self._lock:
+            self._answers[self._key(kind, words)] = answer
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"kind": kind, "words": list(words), "answer": answer}) + "\n")
+
+
+def create_replay_backend() -> ReplayBackend:
+    """Build the replay backend from SIMILARITY_REPLAY_PATH / SIMILARITY_REPLAY_SOURCE."""
+    source_name = os.getenv("SIMILARITY_REPLAY_SOURCE")
+    source = create_backend(source_name) if source_name else None
+    return ReplayBackend(path=os.getenv("SIMILARITY_REPLAY_PATH"), source=source)
+
+
+BACKENDS: Dict[str, Callable[[], SimilarityBackend]] = {
+    "exact": ExactBackend,
+    "local": LocalBackend,
+    "embeddings": EmbeddingBackend,
+    "openai": OpenAIBackend,
+    "replay": create_replay_backend,
+}
+
+_instances: Dict[str, SimilarityBackend] = {}
+_instances_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], SimilarityBackend]) -> None:
+    """Register (or replace) a backend factory under a name."""
+    with _instances_lock:
+        BACKENDS[name] = factory
+        _instances.pop(name, None)
+
+
+def reset_backends() -> None:
+    """Drop created backend instances (and API clients) so they are rebuilt from the environment."""
+    global _client, _client_key, _async_client, _async_client_key
+    with _instances_lock:
+        _instances.clear()
+    with _client_lock:
+        _client = _client_key = None
+    _async_client = _async_client_key = None
+
+
+def create_backend(name: str) -> SimilarityBackend:
+    """Create a new backend instance by name."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown similarity backend: {name}")
+    return BACKENDS[name]()
+
+
+def get_backend() -> SimilarityBackend:
+    """Get the backend selected by SIMILARITY_BACKEND (default "openai"), creating it once."""
+    name = os.getenv("SIMILARITY_BACKEND", "openai")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = create_backend(name)
+        return _instances[name]
+
+
+def similarity_model() -> str:
+    """Get the chat model used for similarity requests."""
+    return os.getenv("SIMILARITY_MODEL", DEFAULT_MODEL)
+
+
+def pair_request(word1: str, word2: str) -> dict:
+    """Build the chat-completion arguments for a pairwise similarity check."""
+    return {
+        "model": similarity_model(),
+        "messages": [
+            {"role": "system", "content": PAIR_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"Are '{word1}' and '{word2}' similar enough to be considered the same answer? Answer YES or NO only."
+            }
+        ],
+        "temperature": 0.1,
+        "max_tokens": 10
+    }
+
+
+def cluster_request(words: List[str]) -> dict:
+    """Build the chat-completion arguments for clustering a turn's answers."""
+    return {
+        "model": similarity_model(),
+        "messages": [
+            {"role": "system", "content": CLUSTER_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Group these answers: {json.dumps(words)}"}
+        ],
+        "temperature": 0.1,
+        "max_tokens": 20 + 10 * len(words),
+        "response_format": {"type": "json_object"}
+    }
+
+
+def canonical_request(words: List[str]) -> dict:
+    """Build the chat-completion arguments for canonicalizing words."""
+    return {
+        "model": similarity_model(),
+        "messages": [
+            {"role": "system", "content": CANONICAL_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Canonicalize these answers: {json.dumps(words)}"}
+        ],
+        "temperature": 0.1,
+        "max_tokens": 20 + 10 * len(words),
+        "response_format": {"type": "json_object"}
+    }
+
+
+def vocabulary_request(question: str, size: int) -> dict:
+    """Build the chat-completion arguments for predicting a question's likely answers."""
+    return {
+        "model": similarity_model(),
+        "messages": [
+            {"role": "system", "content": VOCABULARY_SYSTEM_PROMPT},
+            {"role": "user", "content": f"List about {size} likely answers to: {question}"}
+        ],
+        "temperature": 0.1,
+        "max_tokens": 20 + 12 * size,
+        "response_format": {"type": "json_object"}
+    }
+
+
+def parse_verdict(content: Optional[str]) -> bool:
+    """Parse a YES/NO similarity reply."""
+    return (content or "").strip().upper() == "YES"
+
+
+_client = None
+_client_key: Optional[Tuple[str, Optional[str]]] = None
+_client_lock = threading.Lock()
+_async_client = None
+_async_client_key: Optional[Tuple[str, Optional[str], int]] = None
+
+
+def get_client():
+    """
+    Get the shared sync OpenAI client, or None if no API key is set.
+    
+    The client (and its pooled HTTP connections) is reused across calls and
+    threads, and recreated if the API key or OPENAI_BASE_URL changes. The
+    SDK's own retries are turned off (as for the async client): they would
+    stretch a call past SIMILARITY_CALL_TIMEOUT, unseen by the circuit
+    breaker, the turn deadline and the usage ledger, which handle retries.
+    """
+    global _client, _client_key
+    
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        return None
+    
+    try:
+        import openai
+    except ImportError as e:
+        print(f"AI similarity check failed: {e}")
+        return None
+    
+    key = (openai_api_key, os.getenv("OPENAI_BASE_URL"))
+    with _client_lock:
+        if _client is None or _client_key != key:
+            _client = openai.OpenAI(api_key=openai_api_key, max_retries=0)
+            _client_key = key
+        return _client
+
+
+def get_async_client():
+    """
+    Get the shared async OpenAI client, or None if no API key is set.
+    
+    The client (and its pooled HTTP connections) is reused across calls. It is
+    recreated if the API key, OPENAI_BASE_URL or the running event loop changes, since pooled
+    connections can't be shared between loops.
+    """
+    global _async_client, _async_client_key
+    
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        return None
+    
+    try:
+        import openai
+    except ImportError as e:
+        print(f"AI similarity check failed: {e}")
+        return None
+    
+    key = (openai_api_key, os.getenv("OPENAI_BASE_URL"), id(asyncio.get_running_loop()))
+    if _async_client is None or _async_client_key != key:
+        _async_client = openai.AsyncOpenAI(api_key=openai_api_key, max_retries=0)
+        _async_client_key = key
+    return _async_client
+
+
+def parse_clusters(content: Optional[str], words: List[str]) -> Optional[List[List[str]]]:
+    """
+    Parse and validate a clustering reply.
+    
+    Returns:
+        The clusters if every input word appears in exactly one cluster and no
+        unknown words are present, otherwise None
+    """
+    try:
+        data = json.loads(content or "")
+    except ValueError:
+        return None
+    
+    clusters = data.get("groups") if isinstance(data, dict) else None
+    if not isinstance(clusters, list):
+        return None
+    
+    expected = set(words)
+    seen: Set[str] = set()
+    result: List[List[str]] = []
+    for cluster in clusters:
+        if not isinstance(cluster, list):
+            return None
+        members = []
+        for word in cluster:
+            if not isinstance(word, str):
+                return None
+            word = word.strip().lower()
+            if word not in expected or word in seen:
+                return None
+            seen.add(word)
+            members.append(word)
+        if members:
+            result.append(members)
+    
+    if seen != expected:
+        return None
+    return result
+
+
+def parse_canonical_forms(content: Optional[str], words: List[str]) -> Optional[Dict[str, str]]:
+    """
+    Parse and validate a canonicalization reply.
+    
+    Returns:
+        Dictionary mapping each input word -> canonical single word, or None
+        if any word is missing or mapped to something that isn't a single word
+    """
+    try:
+        data = json.loads(content or "")
+    except ValueError:
+        return None
+    
+    if not isinstance(data, dict):
+        return None
+    
+    replies = {str(word).strip().lower(): value for word, value in data.items()}
+    result: Dict[str, str] = {}
+    for word in words:
+        canonical = replies.get(word)
+        if not isinstance(canonical, str) or not canonical.strip() or " " in canonical.strip():
+            return None
+        result[word] = canonical.strip().lower()
+    return result
+
+
+def parse_vocabulary(content: Optional[str]) -> Optional[Dict[str, str]]:
+    """
+    Parse a likely-answer vocabulary reply.
+    
+    Entries that aren't a single word mapped to a single word are dropped,
+    since the vocabulary is only a guess.
+    
+    Returns:
+        Dictionary mapping likely answer -> canonical answer, or None if the
+        reply isn't a JSON object or has no usable entries
+    """
+    try:
+        data = json.loads(content or "")
+    except ValueError:
+        return None
+    
+    if not isinstance(data, dict):
+        return None
+    
+    result: Dict[str, str] = {}
+    for word, canonical in data.items():
+        word = str(word).strip().lower()
+        if not isinstance(canonical, str):
+            continue
+        canonical = canonical.strip().lower()
+        if word and canonical and " " not in word and " " not in canonical:
+            result[word] = canonical
+    return result or None
@@ -0,0 +1,222 @@
+"""
+Health tracking for the similarity provider.
+
+- A circuit breaker opens after SIMILARITY_BREAKER_FAILURES consecutive
+  failed or slow calls (slower than SIMILARITY_BREAKER_SLOW_SECONDS) and
+  lets a single probe call through after SIMILARITY_BREAKER_COOLDOWN seconds.
+- A governor refuses new calls while SIMILARITY_MAX_IN_FLIGHT calls are
+  already running or more than SIMILARITY_MAX_QUEUED turns wait for scoring.
+- Each turn gets a SIMILARITY_TURN_BUDGET deadline, and each call at most
+  SIMILARITY_CALL_TIMEOUT seconds of it.
+
+Refused calls degrade the turn to local matching; every degradation is
+counted by reason for operators.
+"""
+from typing import Dict, Optional
+import os
+import threading
+import time
+
+import scoring_queue
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+    
+    def __init__(self, failure_threshold: int = 5, slow_seconds: float = 5.0,
+                 cooldown: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.slow_seconds = slow_seconds
+        self.cooldown = cooldown
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.successes = 0
+        self.failures = 0
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+    
+    def allow(self) -> bool:
+        """Check if a call may be made now (claims the probe when half-open)."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+    
+    def record(self, success: bool, duration: float) -> None:
+        """Record the outcome of a call; slow successes count as failures."""
+        with self._lock:
+            self._probing = False
+            if success and duration <= self.slow_seconds:
+                self.successes += 1
+                self._failures = 0
+                self._state = CLOSED
+                return
+            
+            self.failures += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+    
+    def abandon(self) -> None:
+        """Forget a call that was cancelled before it finished, freeing the probe."""
+        with self._lock:
+            self._probing = False
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+            self.opened = self.successes = self.failures = 0
+    
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "successes": self.successes,
+                "failures": self.failures,
+            }
+    
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+        return self._state
+
+
+class Deadline:
+    """Time budget for scoring one turn."""
+    
+    def __init__(self, budget: Optional[float] = None, clock=time.monotonic):
+        self._clock = clock
+        self.expires_at = clock() + (turn_budget() if budget is None else budget)
+    
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+    
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def turn_budget() -> float:
+    return float(os.getenv("SIMILARITY_TURN_BUDGET", "10"))
+
+
+def call_timeout() -> float:
+    return float(os.getenv("SIMILARITY_CALL_TIMEOUT", "5"))
+
+
+breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("SIMILARITY_BREAKER_FAILURES", "5")),
+    slow_seconds=float(os.getenv("SIMILARITY_BREAKER_SLOW_SECONDS", "5")),
+    cooldown=float(os.getenv("SIMILARITY_BREAKER_COOLDOWN", "30"))
+)
+
+_lock = threading.Lock()
+_in_flight = 0
+_degraded: Dict[str, int] = {}
+
+
+def admit() -> bool:
+    """
+    Claim a slot for a provider call.
+    
+    Returns:
+        True if the call may go ahead (call release() when it finishes),
+        False if the provider is unhealthy or overloaded
+    """
+    global _in_flight
+    
+    reason = overload_reason()
+    if reason is None and not breaker.allow():
+        reason = "breaker_open"
+    if reason is not None:
+        record_degraded(reason)
+        return False
+    
+    with _lock:
+        _in_flight += 1
+    return True
+
+
+def release(success: bool, duration: float) -> None:
+    """Finish a call claimed with admit()."""
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+    breaker.record(success, duration)
+    if not success:
+        record_degraded("call_failed")
+
+
+def abandon() -> None:
+    """
+    Finish a call claimed with admit() that was cancelled, such as the losing
+    request of a hedge. It isn't counted against the provider.
+    """
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+    breaker.abandon()
+
+
+def healthy() -> bool:
+    """Check (without claiming anything) whether turns should use the provider."""
+    return breaker.state != OPEN and overload_reason() is None
+
+
+def overload_reason() -> Optional[str]:
+    """Get why the governor would refuse a call, or None."""
+    with _lock:
+        in_flight = _in_flight
+    if in_flight >= int(os.getenv("SIMILARITY_MAX_IN_FLIGHT", "32")):
+        return "too_many_calls"
+    if scoring_queue.stats()["pending"] > int(os.getenv("SIMILARITY_MAX_QUEUED", "50")):
+        return "queue_backlog"
+    return None
+
+
+def record_degraded(reason: str) -> None:
+    with _lock:
+        _degraded[reason] = _degraded.get(reason, 0) + 1
+
+
+def stats() -> Dict[str, object]:
+    """Get breaker state, in-flight calls and degradation counts for operators."""
+    with _lock:
+        in_flight = _in_flight
+        degraded = dict(_degraded)
+    return {
+        "breaker": breaker.stats(),
+        "in_flight": in_flight,
+        "degraded": degraded,
+    }
+
+
+def reset() -> None:
+    global _in_flight
+    breaker.reset()
+    with _lock:
+        _in_flight = 0
+        _degraded.clear()
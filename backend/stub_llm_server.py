@@ -0,0 +1,196 @@
+"""
+Local stand-in for an OpenAI-compatible chat-completions server.
+
+Answers the similarity, clustering, canonicalization and vocabulary
+requests built by similarity_backends using base forms plus a small synonym
+table, with configurable latency and error rate. Point the app at it for
+offline tests and benchmarks:
+
+    python stub_llm_server.py --port 8099 --latency 0.2 --error-rate 0.05
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8099/v1 uvicorn main:app
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+import argparse
+import json
+import random
+import re
+import threading
+import time
+
+from word_forms import base_form
+
+
+# Synonym -> canonical answer, on top of base forms
+SYNONYMS = {
+    "automobile": "car",
+    "auto": "car",
+    "vehicle": "car",
+    "puppy": "dog",
+    "doggy": "dog",
+    "hound": "dog",
+    "kitten": "cat",
+    "kitty": "cat",
+    "sofa": "couch",
+    "settee": "couch",
+    "soda": "pop",
+    "jog": "run",
+    "sprint": "run",
+    "ocean": "sea",
+    "large": "big",
+    "huge": "big",
+    "tiny": "small",
+    "little": "small",
+}
+
+# Keyed by base form so inflections match too (puppies -> puppi <- puppy)
+SYNONYM_FORMS = {base_form(word): base_form(target) for word, target in SYNONYMS.items()}
+
+PAIR_PATTERN = re.compile(r"Are '(.*)' and '(.*)' similar enough")
+VOCABULARY_PATTERN = re.compile(r"^List about \d+ likely answers to:")
+
+
+def canonical(word: str) -> str:
+    """Get the stand-in canonical answer for a word."""
+    key = base_form(word)
+    return SYNONYM_FORMS.get(key, key)
+
+
+def answer(prompt: str) -> str:
+    """Build the reply text for the last user message of a request."""
+    match = PAIR_PATTERN.search(prompt)
+    if match:
+        return "YES" if canonical(match.group(1)) == canonical(match.group(2)) else "NO"
+    
+    if VOCABULARY_PATTERN.match(prompt):
+        # Any question gets the whole synonym table as its likely answers
+        return json.dumps({word: canonical(word) for word in [*SYNONYMS, *SYNONYMS.values()]})
+    
+    words = json.loads(prompt[prompt.index("["):]) if "[" in prompt else []
+    if prompt.startswith("Canonicalize these answers:"):
+        return json.dumps({word: canonical(word) for word in words})
+    
+    groups: Dict[str, List[str]] = {}
+    for word in words:
+        groups.setdefault(canonical(word), []).append(word)
+    return json.dumps({"groups": list(groups.values())})
+
+
+class StubLLMServer:
+    """A threaded chat-completions server that can run in-process."""
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+    
+    def start(self) -> "StubLLMServer":
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+    
+    def _draw(self):
+        """Pick this request's delay and whether it fails."""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return delay, failed
+    
+    def _handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": "Not found"}})
+                    return
+                
+                delay, failed = server._draw()
+                time.sleep(delay)
+                if failed:
+                    self._send(500, {"error": {"message": "Injected failure", "type": "server_error"}})
+                    return
+                
+                messages = body.get("messages", [])
+                prompt = messages[-1]["content"] if messages else ""
+                content = answer(prompt)
+                prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+                completion_tokens = len(content.split())
+                self._send(200, {
+                    "id": f"chatcmpl-stub-{server.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens
+                    }
+                })
+            
+            def _send(self, status: int, payload: dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds on the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail with 500")
+    args = parser.parse_args()
+    
+    server = StubLLMServer(args.host, args.port, args.latency, args.jitter, args.error_rate)
+    print(f"Serving chat completions at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
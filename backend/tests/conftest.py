@@ -4,23 +4,45 @@ Pytest fixtures for backend tests.
 import pytest
 from starlette.testclient import TestClient
 from main import app
+import game_storage
 import game_store
+import hedging
+import similarity_backends
+import similarity_health
+import usage_ledger
+import word_similarity
 
 
 @pytest.fixture(autouse=True)
 def reset_store():
     """Reset the game store before each test to ensure isolation."""
     # Clear all games and turns
+    game_storage.close_storage()
     game_store.games.clear()
     game_store.games_by_name.clear()
     game_store.turns.clear()
     game_store.turns_by_game.clear()
+    game_store.games_by_status.clear()
+    game_store.indexed_games.clear()
+    game_store.waiting_by_name.clear()
+    game_store.last_active.clear()
+    word_similarity.verdict_cache.clear()
+    word_similarity.canonical_cache.clear()
+    word_similarity.clear_vocabularies()
+    similarity_backends.reset_backends()
+    similarity_health.reset()
+    hedging.reset()
+    usage_ledger.reset()
     yield
     # Cleanup after test (though autouse=True means this runs before each test)
     game_store.games.clear()
     game_store.games_by_name.clear()
     game_store.turns.clear()
     game_store.turns_by_game.clear()
+    game_store.games_by_status.clear()
+    game_store.indexed_games.clear()
+    game_store.waiting_by_name.clear()
+    game_store.last_active.clear()
 
 
 @pytest.fixture
@@ -29,6 +51,14 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture
+def admin_client(client, monkeypatch):
+    """Create a test client that sends the ADMIN_TOKEN."""
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    client.headers["X-Admin-Token"] = "secret"
+    return client
+
+
 @pytest.fixture
 def sample_game_name():
     """Sample game name for testing."""
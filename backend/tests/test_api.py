@@ -2,6 +2,8 @@
 Tests for API endpoints - integration tests.
 """
 import pytest
+import threading
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from game_manager import create_game, join_game, start_game, start_turn, submit_question, submit_answer
 import game_store
@@ -68,6 +70,34 @@ class TestListGames:
         games = response.json()
         test_game = next(g for g in games if g["game_name"] == "testgame")
         assert test_game["player_count"] == 3
+    
+    def test_list_games_paginated(self, client):
+        """Test that offset and limit return one page of the sorted lobby."""
+        for name in ["delta", "alpha", "echo", "charlie", "bravo"]:
+            create_game(name, "Alice")
+        
+        response = client.get("/api/games?offset=1&limit=2")
+        assert response.status_code == 200
+        assert [g["game_name"] for g in response.json()] == ["bravo", "charlie"]
+        
+        response = client.get("/api/games?offset=10")
+        assert response.json() == []
+    
+    def test_list_games_prefix(self, client):
+        """Test that prefix search only returns names starting with the prefix."""
+        for name in ["apple", "apricot", "banana", "application"]:
+            create_game(name, "Alice")
+        
+        response = client.get("/api/games?prefix=AP&limit=2")
+        assert [g["game_name"] for g in response.json()] == ["apple", "application"]
+        
+        response = client.get("/api/games?prefix=apr")
+        assert [g["game_name"] for g in response.json()] == ["apricot"]
+    
+    def test_list_games_rejects_bad_page(self, client):
+        """Test that a negative offset or zero limit is rejected."""
+        assert client.get("/api/games?offset=-1").status_code == 422
+        assert client.get("/api/games?limit=0").status_code == 422
 
 
 class TestCreateGame:
@@ -256,6 +286,21 @@ class TestGetGameState:
         completed_turn = next(t for t in data["all_turns"] if t["is_complete"])
         assert completed_turn["answers"] is not None
         # Should have actual words, not just "answered"
+    
+    def test_polled_game_not_swept(self, client, monkeypatch):
+        """Test that a game a client is still polling outlives its idle TTL."""
+        monkeypatch.setenv("GAME_TTL_WAITING", "10")
+        game, _ = create_game("testgame", "Alice")
+        created = game_store.last_active[game.game_id]
+        
+        with patch.object(game_store.time, "time", return_value=created + 8):
+            assert client.get(f"/api/games/{game.game_id}").status_code == 200
+        
+        assert game_store.sweep(created + 15)["games"] == 0
+        assert client.get(f"/api/games/{game.game_id}").status_code == 200
+        # Once nobody polls it, it is swept as before
+        assert game_store.sweep(game_store.last_active[game.game_id] + 11)["games"] == 1
+        assert client.get(f"/api/games/{game.game_id}").status_code == 404
 
 
 class TestStartGame:
@@ -415,6 +460,50 @@ class TestSubmitAnswer:
         assert "single word" in data["error"].lower()
 
 
+    def test_submit_final_answer_background_scoring(self, client):
+        """Test that the final answer returns before scoring when scoring runs in the background."""
+        import game_manager
+        import scoring_queue
+        
+        game, creator_id = create_game("testgame", "Alice")
+        _, player2_id, _ = join_game("testgame", "Bob")
+        _, player3_id, _ = join_game("testgame", "Charlie")
+        start_game(game.game_id, creator_id, 1)
+        start_turn(game.game_id)
+        submit_question(game.game_id, creator_id, "What is your favorite animal?")
+        submit_answer(game.game_id, creator_id, "dog")
+        submit_answer(game.game_id, player2_id, "dog")
+        
+        release = threading.Event()
+        real_calculate = game_manager.calculate_scores
+        
+        def blocked_calculate(turn, game):
+            release.wait(5)
+            return real_calculate(turn, game)
+        
+        with patch.dict('os.environ', {'SCORING_MODE': 'background'}), \
+             patch.object(game_manager, "calculate_scores", side_effect=blocked_calculate):
+            response = client.post(f"/api/games/{game.game_id}/answer", json={
+                "player_id": player3_id,
+                "word": "cat"
+            })
+            assert response.json()["success"] is True
+            
+            # Scoring is still running: phase is reported and words stay hidden
+            data = client.get(f"/api/games/{game.game_id}").json()
+            assert data["current_turn"]["phase"] == "scoring_pending"
+            assert set(data["current_turn"]["answers"].values()) == {"answered"}
+            assert data["current_turn"]["scores"] is None
+            
+            release.set()
+            assert scoring_queue.wait_for_idle(timeout=5) is True
+        
+        data = client.get(f"/api/games/{game.game_id}").json()
+        assert data["current_turn"] is None
+        assert data["all_turns"][0]["phase"] == "scoring"
+        assert data["all_turns"][0]["answers"][player3_id] == "cat"
+
+
 class TestTypingIndicator:
     """Test typing indicator endpoint."""
     
@@ -466,3 +555,63 @@ class TestTypingIndicator:
         assert data["success"] is False
         assert "answer phase" in data["error"].lower()
 
+
+
+class TestAdminSimilarity:
+    """Test the similarity status endpoint for operators."""
+    
+    def test_status_reports_health(self, admin_client):
+        """Test that breaker state, caches and queue stats are reported."""
+        response = admin_client.get("/api/admin/similarity")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["health"]["breaker"]["state"] == "closed"
+        assert data["health"]["degraded"] == {}
+        assert "hits" in data["verdict_cache"]
+        assert "pending" in data["scoring_queue"]
+    
+    def test_status_requires_token(self, client):
+        """Test that ADMIN_TOKEN protects the endpoint."""
+        with patch.dict('os.environ', {'ADMIN_TOKEN': 'secret'}):
+            assert client.get("/api/admin/similarity").status_code == 403
+            assert client.get("/api/admin/similarity", headers={"X-Admin-Token": "wrong"}).status_code == 403
+            response = client.get("/api/admin/similarity", headers={"X-Admin-Token": "secret"})
+            assert response.status_code == 200
+    
+    def test_disabled_without_token(self, client, monkeypatch):
+        """Test that the admin endpoints are closed unless ADMIN_TOKEN is set."""
+        monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+        for path in ("/api/admin/similarity", "/api/admin/usage", "/api/admin/store"):
+            assert client.get(path).status_code == 403
+            assert client.get(path, headers={"X-Admin-Token": ""}).status_code == 403
+
+
+class TestAdminUsage:
+    """Test the AI usage endpoint."""
+    
+    def test_usage_totals_and_game(self, admin_client):
+        """Test reading totals and a single game's usage."""
+        import usage_ledger
+        with usage_ledger.scope("game1", "turn1"):
+            usage_ledger.record_call("cluster", True, 0.3)
+        
+        data = admin_client.get("/api/admin/usage").json()
+        assert data["totals"]["calls"] == 1
+        assert data["games"][0]["game_id"] == "game1"
+        
+        game = admin_client.get("/api/admin/usage", params={"game_id": "game1"}).json()
+        assert game["turns"]["turn1"]["calls"] == 1
+        assert admin_client.get("/api/admin/usage", params={"game_id": "missing"}).status_code == 404
+
+
+class TestAdminStore:
+    """Test the game store endpoint."""
+    
+    def test_store_counts(self, admin_client):
+        """Test that games are counted per status."""
+        admin_client.post("/api/games/create", json={"game_name": "testgame", "player_name": "Alice"})
+        
+        data = admin_client.get("/api/admin/store").json()
+        assert data["games"]["waiting"] == 1
+        assert data["storage"]["backend"] == "memory"
+        assert "bytes" in data["sweeper"]
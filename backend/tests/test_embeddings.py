@@ -0,0 +1,84 @@
+"""
+Tests for embeddings module - word-vector similarity tier.
+"""
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+import embeddings
+import word_similarity
+
+
+VECTORS = {
+    "car": [1.0, 0.0, 0.0],
+    "automobile": [0.95, 0.1, 0.0],
+    "dog": [0.0, 1.0, 0.0],
+    "puppy": [0.1, 0.95, 0.0],
+    "cat": [0.0, 0.3, 1.0],
+}
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    """Build a small embedding table and point the similarity layer at it."""
+    path = str(tmp_path / "table")
+    embeddings.build_table(path, VECTORS)
+    with patch.dict('os.environ', {'SIMILARITY_EMBEDDINGS_PATH': path}, clear=True):
+        yield path
+
+
+class TestEmbeddingTable:
+    """Test the memory-mapped embedding table."""
+    
+    def test_load_is_memory_mapped(self, table_path):
+        """Test that vectors are memory-mapped and normalized."""
+        table = embeddings.EmbeddingTable.load(table_path)
+        
+        assert isinstance(table.vectors, np.memmap)
+        assert table.similarity("car", "car") == pytest.approx(1.0)
+    
+    def test_lookup_uses_base_form(self, table_path):
+        """Test that plural forms find their base word."""
+        table = embeddings.EmbeddingTable.load(table_path)
+        assert table.lookup("dogs") == table.lookup("dog")
+        assert table.lookup("giraffe") is None
+    
+    def test_similar_pairs(self, table_path):
+        """Test comparing all words of a turn at once."""
+        table = embeddings.EmbeddingTable.load(table_path)
+        known, pairs = table.similar_pairs(["car", "dog", "automobile", "giraffe", "puppy"], 0.85)
+        
+        assert known == ["car", "dog", "automobile", "puppy"]
+        assert sorted(pairs) == [("car", "automobile"), ("dog", "puppy")]
+
+
+class TestEmbeddingTier:
+    """Test the embedding tier in word_similarity."""
+    
+    def test_are_words_similar_uses_threshold(self, table_path):
+        """Test that the threshold parameter decides embedding matches."""
+        assert word_similarity.are_words_similar("car", "automobile") is True
+        assert word_similarity.are_words_similar("car", "automobile", threshold=0.999) is False
+        assert word_similarity.are_words_similar("dog", "cat") is False
+    
+    def test_known_words_skip_ai(self, table_path):
+        """Test that words in the table never reach the AI."""
+        with patch.object(word_similarity, "cluster_words_with_ai") as mock_cluster, \
+             patch.object(word_similarity, "query_semantic_similarity") as mock_query:
+            groups = word_similarity.group_similar_words(
+                {"p1": "car", "p2": "dog", "p3": "automobile", "p4": "puppies"}
+            )
+        
+        mock_cluster.assert_not_called()
+        mock_query.assert_not_called()
+        assert groups == {"car": ["p1", "p3"], "dog": ["p2", "p4"]}
+    
+    def test_unknown_words_still_checked(self, table_path):
+        """Test that only pairs involving unknown words go to the AI."""
+        with patch.dict('os.environ', {'SIMILARITY_BATCH': '0'}), \
+             patch.object(word_similarity, "are_words_similar", return_value=False) as mock_similar:
+            groups = word_similarity.group_similar_words({"p1": "car", "p2": "dog", "p3": "giraffe"})
+        
+        checked = {frozenset(call.args) for call in mock_similar.call_args_list}
+        assert checked == {frozenset({"car", "giraffe"}), frozenset({"dog", "giraffe"})}
+        assert len(groups) == 3
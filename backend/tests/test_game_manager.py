@@ -1,11 +1,12 @@
 """
 Tests for game_manager module - core game logic tests.
 """
+import asyncio
 import pytest
 from game_manager import (
     create_game, join_game, start_game, start_turn,
     submit_question, submit_answer, calculate_scores,
-    complete_turn, check_game_end
+    complete_turn, check_game_end, submit_answer_async
 )
 from models import Game, Player, Turn
 import game_store
@@ -79,6 +80,47 @@ class TestJoinGame:
         _, _, error = join_game("nonexistent", "Bob")
         assert error == "Game not found"
     
+    def test_join_game_evicted_before_lock(self):
+        """Test joining a game the sweeper evicts between the lookup and the lock."""
+        from unittest.mock import patch
+        
+        game, _ = create_game("testgame", "Alice")
+        
+        def lookup_then_evict(name):
+            found = game_store.get_game_by_name(name)
+            game_store.evict_game(found.game_id)
+            return found
+        
+        with patch("game_manager.get_game_by_name", side_effect=lookup_then_evict):
+            result = join_game("testgame", "Bob")
+        
+        assert result == (None, None, "Game not found")
+        assert game_store.get_game(game.game_id) is None
+    
+    def test_evicted_while_waiting_for_lock(self):
+        """Test that a change waiting on the game's lock sees an eviction made while it waited."""
+        import threading
+        
+        game, creator_id = create_game("testgame", "Alice")
+        join_game("testgame", "Bob")
+        join_game("testgame", "Charlie")
+        locked = threading.Event()
+        results = []
+        
+        def start_after_lock():
+            locked.wait()
+            results.append(start_game(game.game_id, creator_id, 1))
+        
+        starter = threading.Thread(target=start_after_lock)
+        starter.start()
+        with game_store.game_lock(game.game_id):
+            locked.set()
+            starter.join(0.1)  # the starter is now blocked on the lock
+            game_store.evict_game(game.game_id)
+        starter.join(5)
+        
+        assert results == [(False, "Game not found")]
+    
     def test_join_game_not_waiting(self):
         """Test joining a game that's not in waiting status."""
         game, creator_id = create_game("testgame", "Alice")
@@ -385,6 +427,217 @@ class TestSubmitAnswer:
         assert len(completed_turn.scores) == 3
 
 
+    def test_submit_answer_async_auto_complete(self):
+        """Test that the async path scores the turn when the last answer arrives."""
+        game, creator_id = create_game("testgame", "Alice")
+        _, player2_id, _ = join_game("testgame", "Bob")
+        _, player3_id, _ = join_game("testgame", "Charlie")
+        start_game(game.game_id, creator_id, 2)
+        start_turn(game.game_id)
+        turn_id = game_store.get_current_turn(game.game_id).turn_id
+        submit_question(game.game_id, creator_id, "What is your favorite animal?")
+        
+        assert asyncio.run(submit_answer_async(game.game_id, creator_id, "dog")) == (True, None)
+        assert asyncio.run(submit_answer_async(game.game_id, player2_id, "dog")) == (True, None)
+        assert game_store.get_turn(turn_id).is_complete is False
+        assert asyncio.run(submit_answer_async(game.game_id, player3_id, "bird")) == (True, None)
+        
+        completed_turn = game_store.get_turn(turn_id)
+        assert completed_turn.is_complete is True
+        assert completed_turn.scores == {creator_id: 1, player2_id: 2, player3_id: 0}
+    
+    def test_submit_answer_async_off_event_loop(self):
+        """Test that an answer waiting on a busy game's lock doesn't block the event loop."""
+        import threading
+        
+        game, creator_id = create_game("testgame", "Alice")
+        _, player2_id, _ = join_game("testgame", "Bob")
+        _, player3_id, _ = join_game("testgame", "Charlie")
+        start_game(game.game_id, creator_id, 2)
+        start_turn(game.game_id)
+        submit_question(game.game_id, creator_id, "What is your favorite animal?")
+        locked = threading.Event()
+        release = threading.Event()
+        
+        def hold_lock():
+            with game_store.game_lock(game.game_id):
+                locked.set()
+                release.wait(5)
+        
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait()
+        
+        async def run():
+            answer = asyncio.create_task(submit_answer_async(game.game_id, player2_id, "dog"))
+            # The loop keeps running while the answer waits for the lock
+            await asyncio.sleep(0.05)
+            assert not answer.done()
+            release.set()
+            return await answer
+        
+        assert asyncio.run(run()) == (True, None)
+        holder.join()
+    
+    def test_cancelled_scoring_handed_to_queue(self):
+        """Test that a turn whose scoring request is cancelled is still scored."""
+        from unittest.mock import patch
+        import scoring_queue
+        
+        game, creator_id = create_game("testgame", "Alice")
+        _, player2_id, _ = join_game("testgame", "Bob")
+        _, player3_id, _ = join_game("testgame", "Charlie")
+        start_game(game.game_id, creator_id, 2)
+        start_turn(game.game_id)
+        turn_id = game_store.get_current_turn(game.game_id).turn_id
+        submit_question(game.game_id, creator_id, "What is your favorite animal?")
+        asyncio.run(submit_answer_async(game.game_id, creator_id, "dog"))
+        asyncio.run(submit_answer_async(game.game_id, player2_id, "dog"))
+        
+        async def slow_scores(turn, game):
+            await asyncio.sleep(10)
+        
+        async def run():
+            answer = asyncio.create_task(submit_answer_async(game.game_id, player3_id, "bird"))
+            await asyncio.sleep(0.1)
+            answer.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await answer
+        
+        with patch("game_manager.calculate_scores_async", slow_scores):
+            asyncio.run(run())
+        assert scoring_queue.wait_for_idle(timeout=10)
+        
+        completed_turn = game_store.get_turn(turn_id)
+        assert completed_turn.is_complete is True
+        assert completed_turn.scores == {creator_id: 1, player2_id: 2, player3_id: 0}
+    
+    def test_answers_warmed_before_final_answer(self):
+        """Test that earlier answers are matched while the turn is open, without revealing them."""
+        from unittest.mock import patch
+        import word_similarity
+        
+        game, creator_id = create_game("testgame", "Alice")
+        _, player2_id, _ = join_game("testgame", "Bob")
+        _, player3_id, _ = join_game("testgame", "Charlie")
+        start_game(game.game_id, creator_id, 2)
+        start_turn(game.game_id)
+        turn_id = game_store.get_current_turn(game.game_id).turn_id
+        submit_question(game.game_id, creator_id, "What do you drive?")
+        
+        def fake_query(word1, word2):
+            return {word1, word2} == {"car", "automobile"}
+        
+        jobs = []
+        
+        def warm_answer(word, answered):
+            jobs.append(original_warm(word, answered))
+            return jobs[-1]
+        
+        original_warm = word_similarity.warm_answer
+        with patch.dict('os.environ', {'SIMILARITY_WARM': '1'}), \
+             patch.object(word_similarity, "query_semantic_similarity", side_effect=fake_query), \
+             patch.object(word_similarity, "warm_answer", side_effect=warm_answer):
+            submit_answer(game.game_id, creator_id, "car")
+            submit_answer(game.game_id, player2_id, "automobile")
+            for job in jobs:
+                if job is not None:
+                    job.result()
+            
+            turn = game_store.get_turn(turn_id)
+            assert turn.phase == "answer"
+            assert turn.scores == {}
+            assert word_similarity.verdict_cache.get("car", "automobile") is True
+            
+            with patch.object(word_similarity, "cluster_words_with_ai",
+                              return_value=[["car"], ["bike"]]) as mock_cluster:
+                submit_answer(game.game_id, player3_id, "bike")
+        
+        # Only the final answer's pair with the merged set is left to resolve
+        mock_cluster.assert_called_once_with(["car", "bike"])
+        assert game_store.get_turn(turn_id).scores == {creator_id: 1, player2_id: 2, player3_id: 0}
+    
+    def test_question_prefetches_vocabulary(self):
+        """Test that a turn is scored from the vocabulary prefetched for its question."""
+        from unittest.mock import patch
+        import word_similarity
+        
+        game, creator_id = create_game("testgame", "Alice")
+        _, player2_id, _ = join_game("testgame", "Bob")
+        _, player3_id, _ = join_game("testgame", "Charlie")
+        start_game(game.game_id, creator_id, 2)
+        start_turn(game.game_id)
+        turn_id = game_store.get_current_turn(game.game_id).turn_id
+        
+        jobs = []
+        
+        def prefetch_vocabulary(turn_id, question):
+            jobs.append(original_prefetch(turn_id, question))
+            return jobs[-1]
+        
+        original_prefetch = word_similarity.prefetch_vocabulary
+        vocabulary = {"car": "car", "automobile": "car", "bike": "bike"}
+        with patch.dict('os.environ', {'SIMILARITY_PREFETCH': '1', 'SIMILARITY_WARM': '0'}), \
+             patch.object(word_similarity, "fetch_vocabulary", return_value=vocabulary) as mock_call:
+            with patch.object(word_similarity, "prefetch_vocabulary", side_effect=prefetch_vocabulary):
+                submit_question(game.game_id, creator_id, "What do you ride?")
+            jobs[0].result()
+            
+            submit_answer(game.game_id, creator_id, "car")
+            submit_answer(game.game_id, player2_id, "automobile")
+            submit_answer(game.game_id, player3_id, "bike")
+        
+        mock_call.assert_called_once_with("What do you ride?", 40)
+        assert game_store.get_turn(turn_id).scores == {creator_id: 1, player2_id: 2, player3_id: 0}
+        assert word_similarity.get_vocabulary(turn_id) is None
+    
+    def test_submit_answer_closes_answer_phase(self):
+        """Test that the last answer moves the turn to scoring_pending before scoring."""
+        import scoring_queue
+        from unittest.mock import patch
+        
+        game, creator_id = create_game("testgame", "Alice")
+        _, player2_id, _ = join_game("testgame", "Bob")
+        _, player3_id, _ = join_game("testgame", "Charlie")
+        start_game(game.game_id, creator_id, 2)
+        start_turn(game.game_id)
+        turn_id = game_store.get_current_turn(game.game_id).turn_id
+        submit_question(game.game_id, creator_id, "What is your favorite animal?")
+        submit_answer(game.game_id, creator_id, "dog")
+        submit_answer(game.game_id, player2_id, "cat")
+        
+        with patch.object(scoring_queue, "enqueue") as mock_enqueue, \
+             patch.dict('os.environ', {'SCORING_MODE': 'background'}):
+            assert submit_answer(game.game_id, player3_id, "bird") == (True, None)
+        
+        mock_enqueue.assert_called_once_with(game.game_id)
+        turn = game_store.get_turn(turn_id)
+        assert turn.phase == "scoring_pending"
+        assert turn.is_complete is False
+        
+        # No more answers are accepted while scoring is pending
+        success, error = submit_answer(game.game_id, player3_id, "fish")
+        assert success is False
+        assert error == "Turn is not in answer phase"
+        
+        # The queued job completes the turn
+        assert complete_turn(game.game_id) == (True, None)
+        assert game_store.get_turn(turn_id).is_complete is True
+    
+    def test_submit_answer_async_validation(self):
+        """Test that the async path applies the same validation."""
+        game, creator_id = create_game("testgame", "Alice")
+        join_game("testgame", "Bob")
+        join_game("testgame", "Charlie")
+        start_game(game.game_id, creator_id, 2)
+        start_turn(game.game_id)
+        submit_question(game.game_id, creator_id, "What is your favorite animal?")
+        
+        success, error = asyncio.run(submit_answer_async(game.game_id, creator_id, "two words"))
+        assert success is False
+        assert error == "Answer must be a single word"
+
+
 class TestCalculateScores:
     """Test score calculation."""
     
@@ -518,9 +771,10 @@ class TestCompleteTurn:
         # But let's test complete_turn directly
         # Get turn from all_turns since current_turn_id might be cleared
         all_turns = game_store.get_all_turns(game.game_id)
-        turn = next(t for t in all_turns if t.turn_id == turn_id)
-        turn.is_complete = False  # Reset to test complete_turn
-        turn.phase = "answer"  # Reset phase
+        completed = next(t for t in all_turns if t.turn_id == turn_id)
+        # Scored turns are frozen, so put back an unscored copy to test complete_turn
+        turn = Turn(turn_id=turn_id, game_id=completed.game_id, questioner_id=completed.questioner_id,
+                    question=completed.question, answers=completed.answers, phase="answer")
         game = game_store.get_game(game.game_id)
         game.current_turn_id = turn_id  # Restore for complete_turn
         game.current_turn_index = 0  # Reset turn index since it was already incremented
@@ -589,6 +843,98 @@ class TestCompleteTurn:
         assert updated_game.status == "finished"
 
 
+class TestPlayerIndex:
+    """Test the player_id and name indexes kept on Game."""
+    
+    def test_join_maintains_indexes(self):
+        """Test that joined players can be looked up by id and name."""
+        game, creator_id = create_game("testgame", "Alice")
+        game, player_id, _ = join_game("testgame", "Bob")
+        
+        assert game.get_player(player_id).name == "Bob"
+        assert game.get_player(creator_id).is_creator
+        assert game.has_player_name("BOB")
+        assert not game.has_player("missing")
+        
+        _, _, error = join_game("testgame", "bob")
+        assert error == "Player name already taken in this game"
+    
+    def test_indexes_not_stored(self):
+        """Test that the indexes are left out of to_dict and rebuilt by from_dict."""
+        game = Game(game_id="g1", game_name="testgame", players=[Player(name="Alice", player_id="p1")])
+        data = game.to_dict()
+        
+        assert "players_by_id" not in data
+        assert "player_names" not in data
+        assert Game.from_dict(data).get_player("p1").name == "Alice"
+    
+    def test_players_appended_directly(self):
+        """Test that players added to the list without add_player are still found."""
+        game = Game(game_id="g1", game_name="testgame")
+        game.players.append(Player(name="Alice", player_id="p1"))
+        
+        assert game.has_player("p1")
+        assert game.has_player_name("alice")
+
+
+class TestCompactTurns:
+    """Test the frozen records kept for scored turns."""
+    
+    def play_turn(self):
+        game, creator_id = create_game("testgame", "Alice")
+        _, bob_id, _ = join_game("testgame", "Bob")
+        _, carol_id, _ = join_game("testgame", "Carol")
+        start_game(game.game_id, creator_id, 1)
+        turn, _ = start_turn(game.game_id)
+        submit_question(game.game_id, creator_id, "Name an animal")
+        for player_id, word in ((creator_id, "dog"), (bob_id, "dog"), (carol_id, "cat")):
+            # Ids arrive as fresh strings from request bodies
+            submit_answer(game.game_id, "".join(player_id), word)
+        return game_store.get_turn(turn.turn_id), bob_id
+    
+    def test_scored_turn_is_frozen(self):
+        """Test that a scored turn is stored as a read-only record that reads like a Turn."""
+        from dataclasses import FrozenInstanceError
+        from models import CompletedTurn
+        
+        turn, bob_id = self.play_turn()
+        
+        assert isinstance(turn, CompletedTurn)
+        assert turn.is_complete and turn.phase == "scoring"
+        assert turn.answers[bob_id] == "dog"
+        assert turn.scores[bob_id] == 2
+        assert turn.typing_players == {}
+        with pytest.raises(FrozenInstanceError):
+            turn.question = "changed"
+    
+    def test_ids_interned(self):
+        """Test that answer keys share the player's id string."""
+        turn, bob_id = self.play_turn()
+        
+        player = game_store.get_game(turn.game_id).get_player(bob_id)
+        assert next(pid for pid in turn.answer_ids if pid == bob_id) is player.player_id
+    
+    def test_round_trip(self):
+        """Test that a scored turn is stored like a Turn and loads back frozen."""
+        from models import CompletedTurn
+        
+        turn, _ = self.play_turn()
+        data = turn.to_dict()
+        
+        assert data == Turn(**data).to_dict()
+        loaded = Turn.from_dict(data)
+        assert isinstance(loaded, CompletedTurn)
+        assert loaded == turn
+    
+    def test_slots(self):
+        """Test that models carry no per-instance __dict__."""
+        game = Game(game_id="g1", game_name="testgame", players=[Player(name="Alice", player_id="p1")])
+        turn = Turn(turn_id="t1", game_id="g1", questioner_id="p1")
+        
+        for obj in (game, game.players[0], turn, turn.freeze()):
+            assert not hasattr(obj, "__dict__")
+
+
 class TestCheckGameEnd:
     """Test game end detection."""
     
@@ -618,3 +964,138 @@ class TestCheckGameEnd:
         
         assert check_game_end(game) is True
 
+
+
+class TestConcurrency:
+    """Stress the per-game locks with many threads."""
+    
+    def start_answer_phase(self, name, player_count):
+        game, creator_id = create_game(name, "Player0")
+        player_ids = [creator_id]
+        for i in range(1, player_count):
+            _, player_id, _ = join_game(name, f"Player{i}")
+            player_ids.append(player_id)
+        start_game(game.game_id, creator_id, 2)
+        start_turn(game.game_id)
+        submit_question(game.game_id, creator_id, "Name an animal")
+        return game.game_id, player_ids
+    
+    def run_together(self, calls):
+        """Run every call on its own thread, released at the same moment."""
+        import threading
+        barrier = threading.Barrier(len(calls))
+        errors = []
+        
+        def run(call):
+            barrier.wait()
+            try:
+                call()
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=run, args=(call,)) for call in calls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+    
+    def test_simultaneous_answers_scored_once(self, monkeypatch):
+        """Test that players answering at once record every answer and score the turn once."""
+        import time
+        import game_manager
+        
+        game_id, player_ids = self.start_answer_phase("busygame", 12)
+        turn_id = game_store.get_current_turn(game_id).turn_id
+        scored = []
+        
+        def slow_scores(turn, game):
+            scored.append(turn.turn_id)
+            time.sleep(0.05)
+            return {player_id: 1 for player_id in turn.answers}
+        monkeypatch.setattr(game_manager, "calculate_scores", slow_scores)
+        
+        self.run_together([
+            lambda player_id=player_id: submit_answer(game_id, player_id, "dog")
+            for player_id in player_ids
+        ])
+        
+        turn = game_store.get_turn(turn_id)
+        assert len(turn.answers) == 12
+        assert turn.is_complete
+        assert scored == [turn_id]
+        assert all(player.score == 1 for player in game_store.get_game(game_id).players)
+        assert len(game_store.game_locks) == 0
+    
+    def test_typing_and_answers_interleave(self):
+        """Test that typing updates racing answers never lose an answer."""
+        import main
+        
+        game_id, player_ids = self.start_answer_phase("typinggame", 6)
+        turn_id = game_store.get_current_turn(game_id).turn_id
+        calls = []
+        for player_id in player_ids:
+            calls += [lambda player_id=player_id: main.update_typing_endpoint(
+                game_id, main.TypingRequest(player_id=player_id)) for _ in range(5)]
+            calls.append(lambda player_id=player_id: submit_answer(game_id, player_id, "cat"))
+        
+        self.run_together(calls)
+        
+        turn = game_store.get_turn(turn_id)
+        assert set(turn.answers) == set(player_ids)
+        assert turn.is_complete
+    
+    def test_readers_never_see_half_scored_turn(self, monkeypatch):
+        """Test that a locked reader never sees a scored turn the game hasn't moved past."""
+        import threading
+        import time
+        import game_manager
+        
+        game_id, player_ids = self.start_answer_phase("readgame", 3)
+        turn_id = game_store.get_current_turn(game_id).turn_id
+        original = game_manager.save_turn
+        
+        def slow_save_turn(turn):
+            original(turn)
+            time.sleep(0.01)  # widen the window between saving the turn and the game
+        monkeypatch.setattr(game_manager, "save_turn", slow_save_turn)
+        
+        torn = []
+        done = threading.Event()
+        
+        def read():
+            while not done.is_set():
+                with game_store.game_lock(game_id):
+                    game = game_store.get_game(game_id)
+                    turn = game_store.get_turn(turn_id)
+                    if turn.is_complete and game.current_turn_id == turn_id:
+                        torn.append(turn_id)
+        
+        reader = threading.Thread(target=read)
+        reader.start()
+        for player_id in player_ids:
+            submit_answer(game_id, player_id, "dog")
+        done.set()
+        reader.join()
+        
+        assert game_store.get_turn(turn_id).is_complete
+        assert torn == []
+    
+    def test_games_run_in_parallel(self):
+        """Test that holding one game's lock doesn't block another game."""
+        import threading
+        
+        first_id, _ = self.start_answer_phase("firstgame", 2)
+        second_id, second_players = self.start_answer_phase("secondgame", 2)
+        
+        answered = threading.Event()
+        
+        def answer_other_game():
+            submit_answer(second_id, second_players[1], "owl")
+            answered.set()
+        
+        with game_store.game_lock(first_id):
+            thread = threading.Thread(target=answer_other_game)
+            thread.start()
+            assert answered.wait(5)
+        thread.join()
@@ -3,6 +3,7 @@ Tests for game_store module - storage layer tests.
 """
 import pytest
 from models import Game, Player, Turn
+import game_storage
 import game_store
 
 
@@ -137,3 +138,420 @@ class TestGameStore:
         assert len(waiting_games) == 1
         assert waiting_games[0].game_id == "waiting-1"
 
+
+
+class TestLobbyIndex:
+    """Test the status index and the name-sorted waiting list."""
+    
+    def test_status_change_moves_game(self):
+        """Test that saving a game with a new status moves it between indexes."""
+        game = Game(game_id="game-1", game_name="one", players=[])
+        game_store.save_game(game)
+        assert game_store.get_games_with_status("waiting") == [game]
+        
+        game.status = "playing"
+        game_store.save_game(game)
+        assert game_store.get_games_with_status("waiting") == []
+        assert game_store.get_games_with_status("playing") == [game]
+        assert game_store.waiting_by_name == []
+    
+    def test_waiting_list_stays_sorted(self):
+        """Test that waiting games are kept in name order as they come and go."""
+        for game_id, name in [("g1", "mango"), ("g2", "apple"), ("g3", "zucchini"), ("g4", "kiwi")]:
+            game_store.save_game(Game(game_id=game_id, game_name=name, players=[]))
+        game = game_store.get_game("g4")
+        game.status = "finished"
+        game_store.save_game(game)
+        
+        assert [game.game_name for game in game_store.list_waiting_games()] == ["apple", "mango", "zucchini"]
+    
+    def test_page_and_prefix(self):
+        """Test paging through names that start with a prefix."""
+        for n, name in enumerate(["cat", "car", "cart", "dog", "ca"]):
+            game_store.save_game(Game(game_id=f"g{n}", game_name=name, players=[]))
+        
+        names = [game.game_name for game in game_store.list_waiting_games(prefix="car", offset=1, limit=5)]
+        assert names == ["cart"]
+        names = [game.game_name for game in game_store.list_waiting_games(prefix="CA", limit=2)]
+        assert names == ["ca", "car"]
+        assert game_store.list_waiting_games(prefix="x") == []
+    
+    def test_reused_name_lists_new_game(self):
+        """Test that a finished game and a new game of the same name are indexed apart."""
+        old = Game(game_id="old", game_name="reused", players=[], status="finished")
+        game_store.save_game(old)
+        game_store.save_game(Game(game_id="new", game_name="reused", players=[]))
+        
+        assert [game.game_id for game in game_store.list_waiting_games()] == ["new"]
+        assert game_store.get_games_with_status("finished") == [old]
+
+
+class TestGameLocks:
+    """Test the per-game lock manager."""
+    
+    def test_reentrant_and_released(self):
+        """Test that a game's lock can be taken again by its holder and is dropped afterwards."""
+        with game_store.game_lock("game-1"):
+            with game_store.game_lock("game-1"):
+                assert len(game_store.game_locks) == 1
+        assert len(game_store.game_locks) == 0
+    
+    def test_blocks_other_threads(self):
+        """Test that another thread waits for the same game but not for another one."""
+        import threading
+        
+        order = []
+        with game_store.game_lock("game-1"):
+            def take_same():
+                with game_store.game_lock("game-1"):
+                    order.append("same")
+            
+            def take_other():
+                with game_store.game_lock("game-2"):
+                    order.append("other")
+            
+            waiting = threading.Thread(target=take_same)
+            waiting.start()
+            other = threading.Thread(target=take_other)
+            other.start()
+            other.join()
+            order.append("released")
+        waiting.join()
+        
+        assert order == ["other", "released", "same"]
+
+
+class TestSQLiteStorage:
+    """Test persisting games to SQLite and loading them back after a restart."""
+    
+    @pytest.fixture
+    def sqlite_store(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GAME_STORE", "sqlite")
+        monkeypatch.setenv("GAME_STORE_PATH", str(tmp_path / "games.db"))
+        yield
+        game_storage.close_storage()
+    
+    def restart(self):
+        """Write everything out and forget the in-memory state, like a restarted server."""
+        game_storage.close_storage()
+        game_store.games.clear()
+        game_store.games_by_name.clear()
+        game_store.turns.clear()
+        game_store.turns_by_game.clear()
+        game_store.games_by_status.clear()
+        game_store.indexed_games.clear()
+        game_store.waiting_by_name.clear()
+        game_store.last_active.clear()
+    
+    def test_game_survives_restart(self, sqlite_store):
+        """Test that games, players and turns are loaded back after a restart."""
+        game = Game(game_id="game-1", game_name="testgame",
+                    players=[Player(name="Alice", player_id="p1", score=3, is_creator=True)],
+                    status="playing", current_turn_id="turn-2")
+        game_store.save_game(game)
+        game_store.save_turn(Turn(turn_id="turn-1", game_id="game-1", questioner_id="p1",
+                                  answers={"p1": "car"}, is_complete=True))
+        game_store.save_turn(Turn(turn_id="turn-2", game_id="game-1", questioner_id="p1"))
+        
+        self.restart()
+        
+        loaded = game_store.get_game_by_name("TestGame")
+        assert loaded == game
+        assert [turn.turn_id for turn in game_store.get_all_turns("game-1")] == ["turn-1", "turn-2"]
+        assert game_store.get_turn("turn-1").answers == {"p1": "car"}
+        assert game_store.get_current_turn("game-1").turn_id == "turn-2"
+    
+    def test_games_load_lazily(self, sqlite_store):
+        """Test that a restart loads nothing until a game is asked for."""
+        game_store.save_game(Game(game_id="game-1", game_name="one", players=[]))
+        game_store.save_game(Game(game_id="game-2", game_name="two", players=[]))
+        
+        self.restart()
+        
+        assert game_store.get_turn("missing") is None
+        assert game_store.get_game("game-2").game_name == "two"
+        assert list(game_store.games) == ["game-2"]
+    
+    def test_loaded_game_is_not_replaced(self, sqlite_store):
+        """Test that a game in memory is never swapped for its stored copy."""
+        game_store.save_game(Game(game_id="game-1", game_name="one", players=[]))
+        self.restart()
+        
+        game = game_store.get_game("game-1")
+        game.status = "playing"
+        game_store.load_game("game-1")
+        assert game_store.get_game("game-1") is game
+    
+    def test_name_resolves_to_newest_game(self, sqlite_store):
+        """Test that a reused name finds the game created last."""
+        game_store.save_game(Game(game_id="old", game_name="reused", players=[], status="finished"))
+        game_store.save_game(Game(game_id="new", game_name="reused", players=[]))
+        
+        self.restart()
+        
+        assert game_store.get_game_by_name("reused").game_id == "new"
+        assert [game.game_id for game in game_store.get_all_waiting_games()] == ["new"]
+    
+    def test_waiting_games_listed_after_restart(self, sqlite_store):
+        """Test that stored waiting games are listed in order after a restart."""
+        for game_id, name in [("g1", "pear"), ("g2", "fig"), ("g3", "plum")]:
+            game_store.save_game(Game(game_id=game_id, game_name=name, players=[]))
+        
+        self.restart()
+        
+        assert [game.game_name for game in game_store.list_waiting_games(prefix="p")] == ["pear", "plum"]
+    
+    def test_saves_are_batched(self, sqlite_store, monkeypatch):
+        """Test that repeated saves of a game are coalesced into one write."""
+        monkeypatch.setenv("GAME_STORE_FLUSH_INTERVAL", "60")
+        game = Game(game_id="game-1", game_name="one", players=[])
+        storage = game_storage.get_storage()
+        for round_number in range(50):
+            game.current_round = round_number
+            game_store.save_game(game)
+        storage.flush()
+        
+        assert storage.stats() == {"writes": 1, "batches": 1, "pending": 0}
+        self.restart()
+        assert game_store.get_game("game-1").current_round == 49
+
+
+JOIN_SCRIPT = """
+import sys
+from game_manager import join_game
+for i in range(int(sys.argv[2])):
+    game, player_id, error = join_game("shared", f"{sys.argv[1]}-{i}")
+    assert error is None, error
+"""
+
+
+class TestSharedStorage:
+    """Test several worker processes sharing one SQLite database."""
+    
+    @pytest.fixture
+    def shared_store(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "games.db")
+        monkeypatch.setenv("GAME_STORE", "shared")
+        monkeypatch.setenv("GAME_STORE_PATH", path)
+        other = game_storage.SQLiteStorage(path, shared=True)
+        yield other
+        other.close()
+        game_storage.close_storage()
+    
+    def test_saves_are_visible_at_once(self, shared_store):
+        """Test that another process reads a save without waiting for a flush."""
+        game_store.save_game(Game(game_id="game-1", game_name="one", players=[]))
+        game_store.save_turn(Turn(turn_id="turn-1", game_id="game-1", questioner_id="p1"))
+        
+        game, game_turns = shared_store.load_game("game-1")
+        assert game.game_name == "one"
+        assert [turn.turn_id for turn in game_turns] == ["turn-1"]
+    
+    def test_reads_see_other_process_changes(self, shared_store):
+        """Test that a game changed by another process is reloaded on the next read."""
+        game_store.save_game(Game(game_id="game-1", game_name="one", players=[]))
+        game_store.save_turn(Turn(turn_id="turn-1", game_id="game-1", questioner_id="p1"))
+        assert game_store.get_game("game-1").players == []
+        
+        game, game_turns = shared_store.load_game("game-1")
+        game.players.append(Player(name="Bob", player_id="p2"))
+        shared_store.save_game(game)
+        game_turns[0].answers["p2"] = "car"
+        shared_store.save_turn(game_turns[0])
+        
+        assert [player.name for player in game_store.get_game("game-1").players] == ["Bob"]
+        assert game_store.get_turn("turn-1").answers == {"p2": "car"}
+        assert not game_storage.get_storage().is_stale("game-1")
+    
+    def test_name_follows_other_process(self, shared_store):
+        """Test that a name reused by another process resolves to its new game."""
+        game_store.save_game(Game(game_id="old", game_name="reused", players=[], status="finished"))
+        assert game_store.get_game_by_name("reused").game_id == "old"
+        
+        shared_store.save_game(Game(game_id="new", game_name="reused", players=[]))
+        assert game_store.get_game_by_name("reused").game_id == "new"
+    
+    def test_lobby_includes_other_process_games(self, shared_store):
+        """Test that the lobby lists waiting games created by another process."""
+        game_store.save_game(Game(game_id="g1", game_name="beta", players=[]))
+        shared_store.save_game(Game(game_id="g2", game_name="alpha", players=[]))
+        shared_store.save_game(Game(game_id="g3", game_name="gamma", players=[], status="playing"))
+        
+        assert [game.game_name for game in game_store.list_waiting_games()] == ["alpha", "beta"]
+        assert [game.game_name for game in game_store.list_waiting_games(prefix="b", limit=1)] == ["beta"]
+    
+    def test_lock_excludes_threads_and_reenters(self, tmp_path):
+        """Test that a stripe lock is exclusive between threads but reentrant within one."""
+        import threading
+        
+        locks = game_storage.StripedFileLock(str(tmp_path / "locks"), stripes=4)
+        inside = []
+        
+        def hold():
+            with locks.hold("game-1"):
+                inside.append(threading.get_ident())
+                assert len(inside) == 1
+                with locks.hold("game-1"):
+                    pass
+                inside.pop()
+        
+        threads = [threading.Thread(target=hold) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert inside == []
+    
+    def test_concurrent_joins_from_processes(self, shared_store, tmp_path):
+        """Test that players joining through several processes at once are all kept."""
+        import os
+        import subprocess
+        import sys
+        from game_manager import create_game
+        
+        game, _ = create_game("shared", "Alice")
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        workers = [
+            subprocess.Popen([sys.executable, "-c", JOIN_SCRIPT, f"worker{n}", "5"], cwd=backend_dir)
+            for n in range(4)
+        ]
+        assert [worker.wait(timeout=60) for worker in workers] == [0, 0, 0, 0]
+        
+        assert len(game_store.get_game(game.game_id).players) == 21
+
+
+class TestSweeper:
+    """Test evicting idle and finished games."""
+    
+    def make_game(self, game_id, name, status, turn_count=2):
+        game = Game(game_id=game_id, game_name=name, status=status,
+                    players=[Player(name="Alice", player_id=f"{game_id}-p1", is_creator=True),
+                             Player(name="Bob", player_id=f"{game_id}-p2")])
+        game_store.save_game(game)
+        for i in range(turn_count):
+            game_store.save_turn(Turn(turn_id=f"{game_id}-t{i}", game_id=game_id,
+                                      questioner_id=f"{game_id}-p1", question="Name a fruit",
+                                      answers={f"{game_id}-p2": "apple"}, phase="complete"))
+        return game
+    
+    def test_finished_game_evicted_with_turns(self):
+        """Test that an expired finished game leaves memory and every index."""
+        self.make_game("old", "oldgame", "finished")
+        now = game_store.last_active["old"] + game_store.DEFAULT_TTLS["finished"] + 1
+        
+        reclaimed = game_store.sweep(now)
+        
+        assert reclaimed["games"] == 1
+        assert reclaimed["turns"] == 2
+        assert reclaimed["players"] == 2
+        assert reclaimed["objects"] == 5
+        assert reclaimed["bytes"] > 0
+        assert game_store.get_game("old") is None
+        assert game_store.get_game_by_name("oldgame") is None
+        assert game_store.get_turn("old-t0") is None
+        assert "old" not in game_store.turns_by_game
+        assert "old" not in game_store.indexed_games
+        assert game_store.get_games_with_status("finished") == []
+        assert "old" not in game_store.last_active
+    
+    def test_recent_games_kept(self):
+        """Test that games are only evicted once idle for their status's TTL."""
+        self.make_game("playing", "busygame", "playing")
+        self.make_game("done", "donegame", "finished")
+        now = game_store.last_active["done"] + game_store.DEFAULT_TTLS["finished"] + 1
+        
+        reclaimed = game_store.sweep(now)
+        
+        assert reclaimed["games"] == 1
+        assert game_store.get_game("playing") is not None
+        assert game_store.get_game("done") is None
+    
+    def test_waiting_games_leave_lobby(self, monkeypatch):
+        """Test that abandoned waiting games disappear from the lobby."""
+        monkeypatch.setenv("GAME_TTL_WAITING", "10")
+        self.make_game("lobby", "lobbygame", "waiting", turn_count=0)
+        
+        game_store.sweep(game_store.last_active["lobby"] + 11)
+        
+        assert game_store.list_waiting_games() == []
+    
+    def test_ttl_zero_keeps_games(self, monkeypatch):
+        """Test that a TTL of 0 disables eviction for that status."""
+        monkeypatch.setenv("GAME_TTL_FINISHED", "0")
+        self.make_game("old", "oldgame", "finished")
+        
+        assert game_store.sweep(game_store.last_active["old"] + 10 ** 6)["games"] == 0
+        assert game_store.get_game("old") is not None
+    
+    def test_reused_name_kept(self):
+        """Test that evicting a game keeps its name pointing at a newer game."""
+        self.make_game("old", "samename", "finished")
+        game_store.save_game(Game(game_id="new", game_name="samename", status="waiting"))
+        now = game_store.last_active["old"] + game_store.DEFAULT_TTLS["finished"] + 1
+        game_store.last_active["new"] = now
+        
+        game_store.sweep(now)
+        
+        assert game_store.get_game_by_name("samename").game_id == "new"
+    
+    def test_activity_postpones_eviction(self):
+        """Test that saving a turn counts as activity for its game."""
+        self.make_game("old", "oldgame", "finished")
+        now = game_store.last_active["old"] + game_store.DEFAULT_TTLS["finished"] + 1
+        game_store.last_active["old"] = now - 1
+        
+        assert game_store.sweep(now)["games"] == 0
+    
+    def test_touched_game_kept_in_storage(self, tmp_path, monkeypatch):
+        """Test that a game read recently is kept in memory and in the database."""
+        from unittest.mock import patch
+        monkeypatch.setenv("GAME_STORE", "sqlite")
+        monkeypatch.setenv("GAME_STORE_PATH", str(tmp_path / "games.db"))
+        try:
+            self.make_game("old", "oldgame", "finished")
+            game_storage.get_storage().flush()
+            now = game_store.last_active["old"] + game_store.DEFAULT_TTLS["finished"] + 1
+            with patch.object(game_store.time, "time", return_value=now - 1):
+                game_store.touch_game("old")
+            
+            reclaimed = game_store.sweep(now)
+            
+            assert reclaimed["games"] == 0
+            assert reclaimed["stored_games"] == 0
+            assert game_store.get_game("old") is not None
+        finally:
+            game_storage.close_storage()
+    
+    def test_totals_accumulate(self):
+        """Test that sweep_stats adds up every sweep."""
+        before = game_store.sweep_stats()
+        self.make_game("old", "oldgame", "finished")
+        game_store.sweep(game_store.last_active["old"] + game_store.DEFAULT_TTLS["finished"] + 1)
+        
+        after = game_store.sweep_stats()
+        assert after["sweeps"] == before["sweeps"] + 1
+        assert after["games"] == before["games"] + 1
+    
+    def test_sqlite_rows_purged(self, tmp_path, monkeypatch):
+        """Test that expired games are deleted from storage, not just memory."""
+        monkeypatch.setenv("GAME_STORE", "sqlite")
+        monkeypatch.setenv("GAME_STORE_PATH", str(tmp_path / "games.db"))
+        try:
+            self.make_game("old", "oldgame", "finished")
+            self.make_game("live", "livegame", "playing")
+            now = game_store.last_active["old"] + game_store.DEFAULT_TTLS["finished"] + 1
+            
+            reclaimed = game_store.sweep(now)
+            
+            assert reclaimed["stored_games"] == 1
+            assert reclaimed["stored_turns"] == 2
+            assert game_store.get_game("old") is None
+            assert game_store.get_game("live") is not None
+        finally:
+            game_storage.close_storage()
+    
+    def test_sweeper_thread_stops(self):
+        """Test that the background sweeper runs and stops cleanly."""
+        game_store.start_sweeper(interval=0.01)
+        game_store.stop_sweeper()
+        assert game_store._sweeper is None
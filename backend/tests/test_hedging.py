@@ -0,0 +1,162 @@
+"""
+Tests for hedged similarity requests.
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+import hedging
+import word_similarity
+
+
+def warmed_hedger(latency: float = 0.01, samples: int = 20, **kwargs) -> hedging.Hedger:
+    """Build a hedger that has already seen enough fast calls to hedge."""
+    hedger = hedging.Hedger(**kwargs)
+    for _ in range(samples):
+        hedger.record(latency)
+    return hedger
+
+
+class SlowFirstCall:
+    """A call whose first request hangs and later requests answer at once."""
+    
+    def __init__(self, hang: float = 1.0):
+        self.hang = hang
+        self.requests = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self):
+        with self._lock:
+            self.requests += 1
+            first = self.requests == 1
+        if first:
+            time.sleep(self.hang)
+            return "primary"
+        return "hedge"
+
+
+class TestHedger:
+    """Test when hedges fire and which answer wins."""
+    
+    def test_no_hedge_without_samples(self):
+        """Test that nothing is hedged until the percentile can be estimated."""
+        hedger = hedging.Hedger()
+        call = SlowFirstCall(hang=0.05)
+        assert hedger.run(call) == "primary"
+        assert call.requests == 1
+        assert hedger.stats()["fired"] == 0
+    
+    def test_slow_call_is_hedged(self):
+        """Test that a call slower than the percentile gets a duplicate that wins."""
+        hedger = warmed_hedger(max_rate=1.0)
+        call = SlowFirstCall()
+        
+        start = time.monotonic()
+        assert hedger.run(call) == "hedge"
+        assert time.monotonic() - start < 0.5
+        assert hedger.stats()["fired"] == 1
+        assert hedger.stats()["won"] == 1
+    
+    def test_fast_call_not_hedged(self):
+        """Test that calls within the percentile are not duplicated."""
+        hedger = warmed_hedger(latency=1.0, max_rate=1.0)
+        assert hedger.run(lambda: "fast") == "fast"
+        assert hedger.stats()["fired"] == 0
+    
+    def test_rate_cap(self):
+        """Test that hedges stay under the configured extra request rate."""
+        hedger = warmed_hedger(latency=0.001, samples=200, max_rate=0.25)
+        for _ in range(8):
+            hedger.run(lambda: time.sleep(0.01) or "slow")
+        assert hedger.stats()["calls"] == 8
+        assert hedger.stats()["fired"] == 2
+    
+    def test_async_hedge_wins_and_cancels_primary(self):
+        """Test async hedging cancels the losing request."""
+        hedger = warmed_hedger(max_rate=1.0)
+        cancelled = []
+        requests = []
+        
+        async def call():
+            requests.append(1)
+            if len(requests) == 1:
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+                return "primary"
+            return "hedge"
+        
+        assert asyncio.run(hedger.run_async(call)) == "hedge"
+        assert cancelled == [True]
+        assert hedger.stats()["won"] == 1
+
+
+class TestHedgedBackendCalls:
+    """Test hedging in the similarity call path."""
+    
+    def test_disabled_by_default(self):
+        """Test that calls are not routed through the hedger unless enabled."""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}), \
+             patch('similarity_backends.OpenAIBackend.check', return_value=True):
+            assert word_similarity.query_semantic_similarity("car", "automobile") is True
+        assert hedging.stats() == {}
+    
+    def test_enabled_routes_through_hedger(self):
+        """Test that SIMILARITY_HEDGE=1 tracks calls per kind."""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key', 'SIMILARITY_HEDGE': '1'}), \
+             patch('similarity_backends.OpenAIBackend.check', return_value=True):
+            assert word_similarity.query_semantic_similarity("car", "automobile") is True
+        assert hedging.stats()["check"]["calls"] == 1
+    
+    def test_hedge_claims_slot_and_is_recorded(self):
+        """Test that a hedge is admitted by the governor and recorded as its own call."""
+        import similarity_health
+        import usage_ledger
+        
+        hedger = hedging.get_hedger("check")
+        for _ in range(20):
+            hedger.record(0.01)
+        hedger.max_rate = 1.0
+        slow_first = SlowFirstCall(hang=0.3)
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key', 'SIMILARITY_HEDGE': '1'}), \
+             patch('similarity_backends.OpenAIBackend.check', side_effect=lambda *args: slow_first() == "hedge"), \
+             patch.object(similarity_health, "admit", wraps=similarity_health.admit) as mock_admit:
+            assert word_similarity.query_semantic_similarity("car", "automobile") is True
+            time.sleep(0.4)  # let the losing request finish
+        
+        assert mock_admit.call_count == 2
+        assert usage_ledger.totals()["calls"] == 2
+        assert similarity_health.stats()["in_flight"] == 0
+    
+    def test_async_losing_hedge_not_a_failure(self):
+        """Test that the cancelled loser of an async hedge frees its slot without failing the breaker."""
+        import similarity_health
+        import usage_ledger
+        
+        hedger = hedging.get_hedger("check")
+        for _ in range(20):
+            hedger.record(0.01)
+        hedger.max_rate = 1.0
+        requests = []
+        
+        async def check_async(self, word1, word2):
+            requests.append(word1)
+            if len(requests) == 1:
+                await asyncio.sleep(1.0)
+            return True
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key', 'SIMILARITY_HEDGE': '1'}), \
+             patch('similarity_backends.OpenAIBackend.check_async', check_async):
+            async def run():
+                result = await word_similarity.call_backend_async("check_async", "car", "automobile")
+                await asyncio.sleep(0)  # let the cancelled primary unwind
+                return result
+            
+            assert asyncio.run(run()) is True
+        
+        assert len(requests) == 2
+        assert usage_ledger.totals()["calls"] == 2
+        assert similarity_health.stats()["in_flight"] == 0
+        assert similarity_health.breaker.stats()["failures"] == 0
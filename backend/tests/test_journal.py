@@ -0,0 +1,221 @@
+"""
+Tests for the game journal and snapshots.
+"""
+import json
+import os
+import pytest
+from game_manager import create_game, join_game, start_game, start_turn, submit_question, submit_answer, record_answer
+import game_store
+import journal
+import scoring_queue
+
+
+@pytest.fixture
+def journal_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("GAME_JOURNAL_DIR", str(tmp_path))
+    yield tmp_path
+    journal.close_journal()
+
+
+def forget_games():
+    """Drop the in-memory state, like a restarted server."""
+    game_store.games.clear()
+    game_store.games_by_name.clear()
+    game_store.turns.clear()
+    game_store.turns_by_game.clear()
+    game_store.games_by_status.clear()
+    game_store.indexed_games.clear()
+    game_store.waiting_by_name.clear()
+    game_store.last_active.clear()
+
+
+def crash():
+    """Stop the journal without a final snapshot, then forget everything in memory."""
+    current = journal.get_journal()
+    current.sync()
+    current._closing.set()
+    current._wake.set()
+    current._syncer.join()
+    current._file.close()
+    os.close(current._lock_fd)
+    journal._journal = None
+    journal._journal_dir = None
+    forget_games()
+
+
+def play_first_turn():
+    """Create a three-player game and score its first turn."""
+    game, alice_id = create_game("testgame", "Alice")
+    _, bob_id, _ = join_game("testgame", "Bob")
+    _, carol_id, _ = join_game("testgame", "Carol")
+    start_game(game.game_id, alice_id, 2)
+    turn, _ = start_turn(game.game_id)
+    submit_question(game.game_id, alice_id, "Name a pet")
+    for player_id, word in ((alice_id, "dog"), (bob_id, "dog"), (carol_id, "fish")):
+        submit_answer(game.game_id, player_id, word)
+    return game.game_id, turn.turn_id, (alice_id, bob_id, carol_id)
+
+
+class TestJournal:
+    """Test rebuilding games from the journal after a crash."""
+    
+    def test_replay_after_crash(self, journal_dir):
+        """Test that a game and its scored turn come back from the journal alone."""
+        game_id, turn_id, (alice_id, bob_id, carol_id) = play_first_turn()
+        before = game_store.get_game(game_id).to_dict()
+        crash()
+        
+        restored = journal.restore()
+        
+        assert restored["replayed"] == 10
+        game = game_store.get_game(game_id)
+        assert game.to_dict() == before
+        assert game_store.get_game_by_name("testgame") is game
+        turn = game_store.get_turn(turn_id)
+        assert turn.is_complete
+        assert turn.answers == {alice_id: "dog", bob_id: "dog", carol_id: "fish"}
+        assert game.get_player(bob_id).score == 2
+    
+    def test_play_continues_after_restore(self, journal_dir):
+        """Test that a restored game accepts the next turn."""
+        game_id, _, (_, bob_id, _) = play_first_turn()
+        crash()
+        journal.restore()
+        
+        turn, error = start_turn(game_id)
+        assert error is None
+        assert turn.questioner_id == bob_id
+    
+    def test_snapshot_replaces_old_journals(self, journal_dir):
+        """Test that a snapshot deletes the journals it covers and restores with the tail."""
+        game_id, _, _ = play_first_turn()
+        journal.get_journal().snapshot()
+        start_turn(game_id)
+        names = sorted(os.listdir(journal_dir))
+        crash()
+        
+        restored = journal.restore()
+        
+        assert names == ["journal-000002.jsonl", "journal.lock", "snapshot-000002.json"]
+        assert restored == {"games": 1, "replayed": 1, "skipped": 0}
+        assert game_store.get_current_turn(game_id).phase == "question"
+    
+    def test_records_already_in_snapshot_skipped(self, journal_dir):
+        """Test that replaying changes the snapshot already has leaves the game unchanged."""
+        game_id, _, _ = play_first_turn()
+        before = game_store.get_game(game_id).to_dict()
+        crash()
+        journal.restore()
+        
+        # Replay the same journal again on top of the restored games
+        current = journal.get_journal()
+        for generation, path in current.files()[0]:
+            if generation < current.generation:
+                with open(path, encoding="utf-8") as f:
+                    assert not any(journal.replay(json.loads(line)) for line in f)
+        assert game_store.get_game(game_id).to_dict() == before
+    
+    def test_close_writes_snapshot(self, journal_dir):
+        """Test that a clean shutdown leaves a snapshot to start from."""
+        game_id, _, _ = play_first_turn()
+        journal.close_journal()
+        forget_games()
+        
+        restored = journal.restore()
+        
+        assert restored["games"] == 1
+        assert restored["replayed"] == 0
+        assert game_store.get_game(game_id).current_round == 0
+    
+    def test_cut_short_line_skipped(self, journal_dir):
+        """Test that a line a crash cut short doesn't stop the replay."""
+        game, _ = create_game("testgame", "Alice")
+        crash()
+        with open(journal_dir / "journal-000001.jsonl", "a", encoding="utf-8") as f:
+            f.write('{"op":"join","game_id":')
+        
+        restored = journal.restore()
+        
+        assert restored["replayed"] == 1
+        assert game_store.get_game(game.game_id) is not None
+    
+    def test_pending_scoring_resumed(self, journal_dir):
+        """Test that a turn waiting for scores when the server stopped is scored after restore."""
+        game, alice_id = create_game("testgame", "Alice")
+        _, bob_id, _ = join_game("testgame", "Bob")
+        _, carol_id, _ = join_game("testgame", "Carol")
+        start_game(game.game_id, alice_id, 1)
+        turn, _ = start_turn(game.game_id)
+        submit_question(game.game_id, alice_id, "Name a pet")
+        for player_id in (alice_id, bob_id, carol_id):
+            record_answer(game.game_id, player_id, "cat")
+        crash()
+        
+        journal.restore()
+        assert scoring_queue.wait_for_idle(timeout=10)
+        
+        assert game_store.get_turn(turn.turn_id).is_complete
+    
+    def test_disabled_without_directory(self, monkeypatch):
+        """Test that nothing is recorded unless GAME_JOURNAL_DIR is set."""
+        monkeypatch.delenv("GAME_JOURNAL_DIR", raising=False)
+        create_game("testgame", "Alice")
+        assert journal.get_journal() is None
+        assert journal.restore() is None
+    
+    def test_close_while_game_locked(self, journal_dir):
+        """Test that closing doesn't deadlock with a thread recording under a game lock."""
+        import threading
+        import time
+        
+        game, _ = create_game("testgame", "Alice")
+        locked = threading.Event()
+        
+        def record_under_lock():
+            with game_store.game_lock(game.game_id):
+                locked.set()
+                time.sleep(0.2)  # let close_journal reach the snapshot
+                journal.record("start", game_id=game.game_id, rounds=1)
+        
+        recorder = threading.Thread(target=record_under_lock)
+        recorder.start()
+        locked.wait()
+        closer = threading.Thread(target=journal.close_journal)
+        closer.start()
+        
+        recorder.join(5)
+        closer.join(5)
+        assert not recorder.is_alive() and not closer.is_alive()
+    
+    def test_swept_game_stays_evicted(self, journal_dir):
+        """Test that a game the sweeper evicted isn't rebuilt on restart."""
+        import time
+        
+        game_id, turn_id, _ = play_first_turn()
+        journal.get_journal().snapshot()
+        assert game_store.sweep(now=time.time() + 10 ** 6)["games"] == 1
+        crash()
+        
+        restored = journal.restore()
+        
+        assert restored["replayed"] == 1
+        assert game_store.get_game(game_id) is None
+        assert game_store.get_game_by_name("testgame") is None
+        assert game_store.get_turn(turn_id) is None
+    
+    def test_disabled_with_several_workers(self, journal_dir, monkeypatch):
+        """Test that the journal stays off when more than one worker is configured."""
+        monkeypatch.setenv("BACKEND_WORKERS", "2")
+        create_game("testgame", "Alice")
+        assert journal.get_journal() is None
+        assert os.listdir(journal_dir) == []
+    
+    def test_directory_held_by_one_journal(self, journal_dir):
+        """Test that a second journal can't share a directory that is in use."""
+        first = journal.get_journal()
+        with pytest.raises(RuntimeError):
+            journal.Journal(str(journal_dir))
+        
+        first.close()
+        second = journal.Journal(str(journal_dir))
+        second.close()
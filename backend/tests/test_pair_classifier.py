@@ -0,0 +1,111 @@
+"""
+Tests for the learned pair classifier tier.
+"""
+import json
+from unittest.mock import patch
+import pair_classifier
+import word_similarity
+
+
+# Typos and variants match; unrelated words don't
+TRAINING = [
+    ("recieve", "receive", True), ("seperate", "separate", True), ("definately", "definitely", True),
+    ("occured", "occurred", True), ("tommorow", "tomorrow", True), ("begining", "beginning", True),
+    ("beleive", "believe", True), ("calender", "calendar", True), ("wierd", "weird", True),
+    ("untill", "until", True), ("adress", "address", True), ("freind", "friend", True),
+    ("banana", "bananna", True), ("pizza", "piza", True), ("yellow", "yelow", True),
+    ("dog", "piano", False), ("apple", "river", False), ("house", "cloud", False),
+    ("green", "table", False), ("summer", "pencil", False), ("train", "banana", False),
+    ("music", "forest", False), ("coffee", "window", False), ("tiger", "bottle", False),
+    ("chair", "ocean", False), ("lemon", "guitar", False), ("snow", "money", False),
+    ("blue", "horse", False), ("candle", "rocket", False), ("paper", "sunset", False),
+]
+
+
+class TestPairClassifier:
+    """Test features, training and thresholds."""
+    
+    def test_features_in_unit_range(self):
+        """Test that every feature is between 0 and 1."""
+        for word1, word2, _ in TRAINING:
+            values = pair_classifier.features(word1, word2)
+            assert len(values) == len(pair_classifier.FEATURE_NAMES)
+            assert all(0.0 <= value <= 1.0 for value in values)
+    
+    def test_edit_distance(self):
+        """Test the Levenshtein distance."""
+        assert pair_classifier.edit_distance("kitten", "sitting") == 3
+        assert pair_classifier.edit_distance("", "abc") == 3
+    
+    def test_trained_model_separates_examples(self):
+        """Test that training learns to tell typos from unrelated words."""
+        classifier = pair_classifier.train(TRAINING)
+        assert classifier.probability("acheive", "achieve") > 0.8
+        assert classifier.probability("window", "potato") < 0.2
+    
+    def test_thresholds_leave_uncertain_pairs_undecided(self):
+        """Test that only confident pairs are answered locally."""
+        classifier = pair_classifier.choose_thresholds(
+            pair_classifier.train(TRAINING), TRAINING, precision=1.0, min_support=5
+        )
+        assert classifier.classify("acheive", "achieve") is True
+        assert classifier.classify("window", "potato") is False
+        
+        # A side that never reaches the target precision is disabled
+        disabled = pair_classifier.choose_thresholds(
+            pair_classifier.train(TRAINING), TRAINING, precision=1.0, min_support=100
+        )
+        assert disabled.classify("acheive", "achieve") is None
+    
+    def test_save_and_load(self, tmp_path):
+        """Test that a saved model loads with the same parameters."""
+        path = str(tmp_path / "model.json")
+        classifier = pair_classifier.train(TRAINING, epochs=10)
+        classifier.save(path)
+        loaded = pair_classifier.PairClassifier.load(path)
+        assert loaded.weights == classifier.weights
+        assert loaded.high == classifier.high
+
+
+class TestVerdictRecording:
+    """Test that AI verdicts are logged for training."""
+    
+    def test_pair_and_cluster_verdicts_logged(self, tmp_path):
+        """Test that pairwise and clustering verdicts are both recorded."""
+        path = tmp_path / "verdicts.jsonl"
+        with patch.dict('os.environ', {'SIMILARITY_VERDICT_LOG': str(path)}):
+            with patch.object(word_similarity, "query_semantic_similarity", return_value=True):
+                word_similarity.are_words_similar("car", "automobile")
+            with patch.object(word_similarity, "cluster_words_with_ai",
+                              return_value=[["boat", "ship"], ["plane"]]):
+                word_similarity.group_similar_words({"p1": "boat", "p2": "ship", "p3": "plane"})
+        
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert records[0] == {"word1": "car", "word2": "automobile", "similar": True, "source": "pair"}
+        assert {(r["word1"], r["word2"], r["similar"]) for r in records[1:]} == {
+            ("boat", "ship", True), ("boat", "plane", False), ("ship", "plane", False)
+        }
+        assert len(pair_classifier.read_verdicts([str(path)])) == 4
+
+
+class TestClassifierTier:
+    """Test the classifier answering pairs before the AI."""
+    
+    def test_confident_pairs_skip_ai(self, tmp_path):
+        """Test that confidently classified pairs never reach the AI."""
+        path = str(tmp_path / "model.json")
+        pair_classifier.choose_thresholds(
+            pair_classifier.train(TRAINING), TRAINING, precision=1.0, min_support=5
+        ).save(path)
+        
+        with patch.dict('os.environ', {'SIMILARITY_CLASSIFIER_PATH': path}), \
+             patch.object(word_similarity, "query_semantic_similarity", return_value=True) as mock_query:
+            assert word_similarity.are_words_similar("acheive", "achieve") is True
+            assert word_similarity.are_words_similar("window", "potato") is False
+            mock_query.assert_not_called()
+            
+            with patch.object(word_similarity, "cluster_words_with_ai") as mock_cluster:
+                groups = word_similarity.group_similar_words({"p1": "acheive", "p2": "achieve", "p3": "potato"})
+            mock_cluster.assert_not_called()
+        
+        assert groups == {"acheive": ["p1", "p2"], "potato": ["p3"]}
@@ -0,0 +1,168 @@
+"""
+Tests for the pluggable similarity backends and the stand-in LLM server.
+"""
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+import similarity_backends
+import stub_llm_server
+import word_similarity
+
+
+class TestBackendRegistry:
+    """Test selecting backends by configuration."""
+    
+    def test_default_backend_is_openai(self):
+        """Test that OpenAI is used when nothing is configured."""
+        with patch.dict('os.environ', {}, clear=True):
+            assert isinstance(similarity_backends.get_backend(), similarity_backends.OpenAIBackend)
+    
+    def test_backend_selected_by_env(self):
+        """Test that SIMILARITY_BACKEND picks the backend."""
+        with patch.dict('os.environ', {'SIMILARITY_BACKEND': 'local'}):
+            backend = similarity_backends.get_backend()
+            assert isinstance(backend, similarity_backends.LocalBackend)
+            assert similarity_backends.get_backend() is backend
+    
+    def test_unknown_backend_raises(self):
+        """Test that a misconfigured backend name is an error."""
+        with patch.dict('os.environ', {'SIMILARITY_BACKEND': 'nope'}):
+            with pytest.raises(ValueError):
+                similarity_backends.get_backend()
+    
+    def test_register_backend(self):
+        """Test that registered backends are used by word_similarity."""
+        class AlwaysSame(similarity_backends.SimilarityBackend):
+            def check(self, word1, word2):
+                return True
+        
+        similarity_backends.register_backend("always", AlwaysSame)
+        try:
+            with patch.dict('os.environ', {'SIMILARITY_BACKEND': 'always'}):
+                assert word_similarity.are_words_similar("car", "banana") is True
+        finally:
+            similarity_backends.BACKENDS.pop("always")
+    
+    def test_local_backend(self):
+        """Test the offline base-form backend."""
+        backend = similarity_backends.LocalBackend()
+        assert backend.check("dogs", "dog") is True
+        assert backend.check("dog", "cat") is False
+        assert backend.cluster(["colour", "color", "dog"]) == [["colour", "color"], ["dog"]]
+        assert asyncio.run(backend.check_async("ran", "run")) is True
+        assert backend.check("evening", "even") is False
+    
+    def test_exact_backend(self):
+        """Test that the exact backend never merges distinct words."""
+        backend = similarity_backends.ExactBackend()
+        assert backend.check("Dog", "dog") is True
+        assert backend.check("dogs", "dog") is False
+
+
+class TestReplayBackend:
+    """Test recording and replaying backend answers."""
+    
+    def test_records_and_replays(self, tmp_path):
+        """Test that answers from the source are recorded and replayed without it."""
+        path = str(tmp_path / "replay.jsonl")
+        recorder = similarity_backends.ReplayBackend(path, similarity_backends.LocalBackend())
+        assert recorder.check("dogs", "dog") is True
+        assert recorder.canonicalize(["dogs"]) == {"dogs": "dog"}
+        
+        replayer = similarity_backends.ReplayBackend(path)
+        assert replayer.check("dog", "dogs") is True
+        assert replayer.canonicalize(["dogs"]) == {"dogs": "dog"}
+        assert replayer.check("dog", "cat") is None
+        assert replayer.stats()["hits"] == 2
+    
+    def test_configured_by_env(self, tmp_path):
+        """Test building the replay backend from the environment."""
+        path = tmp_path / "replay.jsonl"
+        path.write_text(json.dumps({"kind": "check", "words": ["car", "automobile"], "answer": True}) + "\n")
+        
+        with patch.dict('os.environ', {'SIMILARITY_BACKEND': 'replay', 'SIMILARITY_REPLAY_PATH': str(path)}):
+            assert word_similarity.are_words_similar("automobile", "car") is True
+
+
+class TestStubServer:
+    """Test the OpenAI backend against the local stand-in server."""
+    
+    @pytest.fixture
+    def server(self):
+        pytest.importorskip("openai")
+        server = stub_llm_server.StubLLMServer(seed=0).start()
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'stub', 'OPENAI_BASE_URL': server.base_url}):
+            yield server
+        server.stop()
+    
+    def test_stub_answers(self):
+        """Test the stand-in's replies to each request kind."""
+        assert stub_llm_server.answer("Are 'puppies' and 'dog' similar enough to be considered the same answer?") == "YES"
+        assert stub_llm_server.answer("Are 'cat' and 'dog' similar enough to be considered the same answer?") == "NO"
+        reply = stub_llm_server.answer('Group these answers: ["car", "automobile", "dog"]')
+        assert json.loads(reply) == {"groups": [["car", "automobile"], ["dog"]]}
+    
+    def test_openai_backend_check(self, server):
+        """Test pairwise checks over HTTP."""
+        backend = similarity_backends.OpenAIBackend()
+        assert backend.check("automobile", "car") is True
+        assert backend.check("dog", "car") is False
+        assert server.requests == 2
+    
+    def test_timeout_not_retried(self, server):
+        """Test that a slow call gives up after one request within the call timeout."""
+        import time
+        server.latency = 1.0
+        backend = similarity_backends.OpenAIBackend()
+        
+        start = time.monotonic()
+        with patch.dict('os.environ', {'SIMILARITY_CALL_TIMEOUT': '0.3'}):
+            assert backend.check("automobile", "car") is None
+        
+        assert time.monotonic() - start < 0.9
+        assert server.requests == 1
+    
+    def test_sync_client_reused(self, server):
+        """Test that sync calls share one client."""
+        assert similarity_backends.get_client() is similarity_backends.get_client()
+    
+    def test_openai_backend_async(self, server):
+        """Test clustering and canonicalization through the async client."""
+        backend = similarity_backends.OpenAIBackend()
+        
+        async def run():
+            return (
+                await backend.cluster_async(["car", "automobile", "dog"]),
+                await backend.canonicalize_async(["kittens"])
+            )
+        
+        clusters, canonical = asyncio.run(run())
+        assert clusters == [["car", "automobile"], ["dog"]]
+        assert canonical == {"kittens": "cat"}
+    
+    def test_openai_backend_vocabulary(self, server):
+        """Test prefetching a question's likely answers over HTTP."""
+        vocabulary = similarity_backends.OpenAIBackend().vocabulary("What do you drive?", 10)
+        assert vocabulary["automobile"] == "car"
+        assert vocabulary["puppy"] == "dog"
+    
+    def test_vocabulary_own_timeout(self, server):
+        """Test that a vocabulary call waits for its own timeout rather than the call timeout."""
+        server.latency = 0.5
+        with patch.dict('os.environ', {'SIMILARITY_CALL_TIMEOUT': '0.2'}):
+            vocabulary = similarity_backends.OpenAIBackend().vocabulary("What do you drive?", 10, timeout=5)
+        assert vocabulary["automobile"] == "car"
+    
+    def test_grouping_end_to_end(self, server):
+        """Test grouping a turn's answers against the stand-in."""
+        groups = word_similarity.group_similar_words({
+            "p1": "car", "p2": "automobile", "p3": "dog", "p4": "puppy"
+        })
+        assert sorted(sorted(group) for group in groups.values()) == [["p1", "p2"], ["p3", "p4"]]
+    
+    def test_injected_errors_fall_back(self, server):
+        """Test that server errors come back as undecided."""
+        server.error_rate = 1.0
+        assert similarity_backends.OpenAIBackend().check("automobile", "car") is None
+        assert server.errors >= 1
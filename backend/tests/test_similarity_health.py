@@ -0,0 +1,137 @@
+"""
+Tests for the similarity circuit breaker, deadlines and degraded mode.
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+import similarity_health
+import word_similarity
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+    
+    def test_opens_after_consecutive_failures(self):
+        """Test that the breaker opens after the failure threshold."""
+        breaker = similarity_health.CircuitBreaker(failure_threshold=3)
+        for _ in range(2):
+            breaker.record(False, 0.1)
+        assert breaker.state == "closed"
+        breaker.record(False, 0.1)
+        assert breaker.state == "open"
+        assert breaker.allow() is False
+    
+    def test_success_resets_failures(self):
+        """Test that failures must be consecutive."""
+        breaker = similarity_health.CircuitBreaker(failure_threshold=2)
+        breaker.record(False, 0.1)
+        breaker.record(True, 0.1)
+        breaker.record(False, 0.1)
+        assert breaker.state == "closed"
+    
+    def test_slow_calls_count_as_failures(self):
+        """Test that high latency opens the breaker too."""
+        breaker = similarity_health.CircuitBreaker(failure_threshold=2, slow_seconds=1.0)
+        breaker.record(True, 3.0)
+        breaker.record(True, 3.0)
+        assert breaker.state == "open"
+    
+    def test_half_open_probe(self):
+        """Test that one probe is allowed after the cooldown and decides the state."""
+        clock = FakeClock()
+        breaker = similarity_health.CircuitBreaker(failure_threshold=1, cooldown=10, clock=clock)
+        breaker.record(False, 0.1)
+        clock.now = 11
+        assert breaker.state == "half_open"
+        assert breaker.allow() is True
+        assert breaker.allow() is False
+        breaker.record(False, 0.1)
+        assert breaker.state == "open"
+        
+        clock.now = 22
+        assert breaker.allow() is True
+        breaker.record(True, 0.1)
+        assert breaker.state == "closed"
+        assert breaker.stats()["opened"] == 2
+
+
+class TestDegradedGrouping:
+    """Test that grouping falls back to local matching when the provider is unhealthy."""
+    
+    def test_open_breaker_skips_ai(self):
+        """Test that no AI call is made while the breaker is open."""
+        for _ in range(similarity_health.breaker.failure_threshold):
+            similarity_health.breaker.record(False, 0.1)
+        
+        with patch.object(word_similarity, 'cluster_words_with_ai') as mock_cluster, \
+             patch.object(word_similarity, 'query_semantic_similarity') as mock_query:
+            groups = word_similarity.group_similar_words({"p1": "dogs", "p2": "dog", "p3": "automobile", "p4": "car"})
+        
+        mock_cluster.assert_not_called()
+        mock_query.assert_not_called()
+        assert groups == {"dogs": ["p1", "p2"], "automobile": ["p3"], "car": ["p4"]}
+        assert similarity_health.stats()["degraded"]["local_only"] == 1
+    
+    def test_failing_backend_opens_breaker(self):
+        """Test that repeated backend failures open the breaker and stop further calls."""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}), \
+             patch('similarity_backends.OpenAIBackend.check', return_value=None) as mock_check:
+            for _ in range(similarity_health.breaker.failure_threshold + 3):
+                assert word_similarity.query_semantic_similarity("car", "automobile") is None
+        
+        assert mock_check.call_count == similarity_health.breaker.failure_threshold
+        stats = similarity_health.stats()
+        assert stats["breaker"]["state"] == "open"
+        assert stats["degraded"]["breaker_open"] == 3
+    
+    def test_queue_backlog_degrades(self):
+        """Test that a deep scoring queue switches turns to local matching."""
+        with patch.dict('os.environ', {'SIMILARITY_MAX_QUEUED': '0'}), \
+             patch('scoring_queue.stats', return_value={"pending": 1}):
+            assert similarity_health.healthy() is False
+            assert similarity_health.admit() is False
+        assert similarity_health.stats()["degraded"]["queue_backlog"] == 1
+    
+    def test_deadline_bounds_pairwise_checks(self):
+        """Test that slow pairwise checks are abandoned at the turn deadline."""
+        release = threading.Event()
+        
+        def slow_check(word1, word2):
+            release.wait(2)
+            return True
+        
+        with patch.dict('os.environ', {'SIMILARITY_BATCH': '0', 'SIMILARITY_TURN_BUDGET': '0.1'}), \
+             patch.object(word_similarity, 'query_semantic_similarity', side_effect=slow_check):
+            start = time.monotonic()
+            groups = word_similarity.group_similar_words({"p1": "car", "p2": "automobile", "p3": "vehicle"})
+            elapsed = time.monotonic() - start
+            
+            # Let the abandoned checks finish so they don't leak into other tests
+            release.set()
+            while word_similarity.pair_flight.in_flight():
+                time.sleep(0.01)
+        word_similarity.verdict_cache.clear()
+        
+        assert elapsed < 0.45
+        assert len(groups) == 3
+        assert similarity_health.stats()["degraded"]["deadline"] >= 1
+    
+    def test_async_call_timeout(self):
+        """Test that a hung async call is cut off at SIMILARITY_CALL_TIMEOUT."""
+        async def hang(word1, word2):
+            await asyncio.sleep(5)
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key', 'SIMILARITY_CALL_TIMEOUT': '0.05'}), \
+             patch('similarity_backends.OpenAIBackend.check_async', side_effect=hang):
+            assert asyncio.run(word_similarity.query_semantic_similarity_async("car", "automobile")) is None
+        
+        assert similarity_health.stats()["breaker"]["failures"] == 1
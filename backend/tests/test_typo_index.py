@@ -0,0 +1,89 @@
+"""
+Tests for the typo-correction index.
+"""
+import time
+from unittest.mock import patch
+import typo_index
+import word_similarity
+
+
+WORDS = ["elephant", "giraffe", "receive", "separate", "banana", "tomorrow", "cat", "car", "cart"]
+
+
+def build_index(words=WORDS) -> typo_index.TypoIndex:
+    index = typo_index.TypoIndex()
+    for word in words:
+        index.add(word)
+    return index
+
+
+class TestTypoIndex:
+    """Test SymSpell lookups."""
+    
+    def test_dictionary_words_correct_to_themselves(self):
+        """Test that known words are never corrected to another word."""
+        index = build_index()
+        assert index.correct("cart") == "cart"
+        assert index.correct("Car") == "car"
+    
+    def test_corrects_typos(self):
+        """Test insertions, deletions, substitutions and transpositions."""
+        index = build_index()
+        assert index.correct("elefant") == "elephant"
+        assert index.correct("girafe") == "giraffe"
+        assert index.correct("recieve") == "receive"
+        assert index.correct("seperate") == "separate"
+        assert index.correct("tommorrow") == "tomorrow"
+    
+    def test_no_correction_beyond_distance(self):
+        """Test that distant and short words are left alone."""
+        index = build_index()
+        assert index.correct("elbow") is None
+        assert index.correct("cst") is None
+    
+    def test_prefers_frequent_words_on_ties(self):
+        """Test that the more frequent word wins between equally close candidates."""
+        index = typo_index.TypoIndex()
+        index.add("parent", 5)
+        index.add("patent", 50)
+        assert index.correct("pament") == "patent"
+    
+    def test_edit_distance_transposition(self):
+        """Test that an adjacent swap counts as one edit."""
+        assert typo_index.edit_distance("recieve", "receive", 2) == 1
+        assert typo_index.edit_distance("abcdef", "zzzzzz", 2) == 3
+    
+    def test_load_word_list(self, tmp_path):
+        """Test loading a word list with optional counts."""
+        path = tmp_path / "words.txt"
+        path.write_text("elephant 10\ngiraffe\n\n")
+        index = typo_index.TypoIndex.load(str(path))
+        assert len(index) == 2
+        assert index.counts["elephant"] == 10
+    
+    def test_lookup_fast_on_large_dictionary(self):
+        """Test that lookups don't scan the dictionary."""
+        index = build_index([f"{a}{b}{c}word" for a in "abcdefghij" for b in "abcdefghij" for c in "abcdefghij"] + WORDS)
+        start = time.perf_counter()
+        for _ in range(100):
+            assert index.correct("elefant") == "elephant"
+        assert time.perf_counter() - start < 0.5
+
+
+class TestTypoGrouping:
+    """Test the typo tier in grouping."""
+    
+    def test_typos_grouped_without_ai(self, tmp_path):
+        """Test that misspellings merge with the word they were meant to be."""
+        path = tmp_path / "words.txt"
+        path.write_text("\n".join(WORDS))
+        
+        with patch.dict('os.environ', {'SIMILARITY_WORDLIST_PATH': str(path)}), \
+             patch.object(word_similarity, "cluster_words_with_ai") as mock_cluster:
+            groups = word_similarity.group_similar_words(
+                {"p1": "elephant", "p2": "elefants", "p3": "car", "p4": "cart"}
+            )
+            assert word_similarity.are_words_similar("recieve", "receive") is True
+        
+        mock_cluster.assert_called_once_with(["elephant", "car", "cart"])
+        assert groups["elephant"] == ["p1", "p2"]
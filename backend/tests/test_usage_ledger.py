@@ -0,0 +1,53 @@
+"""
+Tests for the similarity usage ledger.
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+import usage_ledger
+import word_similarity
+
+
+class TestUsageLedger:
+    """Test recording and rolling up provider usage."""
+    
+    def test_calls_attributed_to_scope(self):
+        """Test that calls count toward their turn, game and the totals."""
+        with usage_ledger.scope("game1", "turn1"):
+            usage_ledger.record_call("check", True, 0.2)
+            usage_ledger.record_tokens(SimpleNamespace(prompt_tokens=30, completion_tokens=2))
+        usage_ledger.record_call("cluster", False, 0.4)
+        
+        game = usage_ledger.game_usage("game1")
+        assert game["calls"] == 1
+        assert game["total_tokens"] == 32
+        assert game["turns"]["turn1"]["by_kind"] == {"check": 1}
+        
+        totals = usage_ledger.totals()
+        assert totals["calls"] == 2
+        assert totals["failures"] == 1
+        assert totals["max_latency"] == 0.4
+    
+    def test_unknown_usage_ignored(self):
+        """Test that responses without token counts are skipped."""
+        usage_ledger.record_tokens(None)
+        assert usage_ledger.totals()["total_tokens"] == 0
+    
+    def test_bounded_retention(self):
+        """Test that only the most recent games and turns are kept."""
+        with patch.dict('os.environ', {'USAGE_MAX_GAMES': '2', 'USAGE_MAX_TURNS': '2'}):
+            for index in range(3):
+                with usage_ledger.scope(f"game{index}", f"turn{index}"):
+                    usage_ledger.record_call("check", True, 0.1)
+        
+        assert usage_ledger.game_usage("game0") is None
+        assert [game["game_id"] for game in usage_ledger.recent_games()] == ["game2", "game1"]
+        assert usage_ledger.totals()["calls"] == 3
+    
+    def test_scope_follows_pairwise_checks_into_threads(self):
+        """Test that concurrent pairwise checks are attributed to the turn."""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key', 'SIMILARITY_BATCH': '0'}), \
+             patch('similarity_backends.OpenAIBackend.check', return_value=False):
+            with usage_ledger.scope("game1", "turn1"):
+                word_similarity.group_similar_words({"p1": "car", "p2": "boat", "p3": "plane"})
+        
+        assert usage_ledger.game_usage("game1")["turns"]["turn1"]["calls"] == 3
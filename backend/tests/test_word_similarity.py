@@ -1,8 +1,13 @@
 """
 Tests for word_similarity module - word matching logic.
 """
+import asyncio
 import pytest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
+import similarity_backends
 import word_similarity
 
 
@@ -156,3 +161,632 @@ class TestWordSimilarity:
             result = word_similarity.check_semantic_similarity("dog", "cat")
             assert result is False  # Should fall back to False on error
 
+
+
+class TestVerdictCache:
+    """Test the similarity verdict cache."""
+    
+    def test_key_is_symmetric(self):
+        """Test that (a, b) and (b, a) share one cache entry."""
+        cache = word_similarity.VerdictCache()
+        cache.put("color", "colour", True)
+        
+        assert cache.get("colour", "color") is True
+        assert cache.get("Color", "COLOUR") is True
+    
+    def test_hit_and_miss_counters(self):
+        """Test that hits and misses are counted."""
+        cache = word_similarity.VerdictCache()
+        assert cache.get("dog", "cat") is None
+        cache.put("dog", "cat", False)
+        assert cache.get("cat", "dog") is False
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = word_similarity.VerdictCache(max_size=2)
+        cache.put("a", "b", True)
+        cache.put("c", "d", True)
+        cache.get("a", "b")  # touch a/b so c/d is oldest
+        cache.put("e", "f", False)
+        
+        assert cache.get("a", "b") is True
+        assert cache.get("c", "d") is None
+        assert cache.get("e", "f") is False
+    
+    def test_persists_to_sqlite(self, tmp_path):
+        """Test that verdicts survive a new cache instance on the same file."""
+        path = str(tmp_path / "verdicts.db")
+        cache = word_similarity.VerdictCache(path=path)
+        cache.put("theater", "theatre", True)
+        
+        reloaded = word_similarity.VerdictCache(path=path)
+        assert reloaded.get("theatre", "theater") is True
+    
+    def test_are_words_similar_uses_cache(self):
+        """Test that a repeated pair only queries the AI once."""
+        with patch.object(word_similarity, "query_semantic_similarity", return_value=True) as mock_query:
+            assert word_similarity.are_words_similar("car", "automobile") is True
+            assert word_similarity.are_words_similar("automobile", "car") is True
+        
+        assert mock_query.call_count == 1
+    
+    def test_failed_check_is_not_cached(self):
+        """Test that a missing verdict (no API / error) is not cached."""
+        with patch.object(word_similarity, "query_semantic_similarity", return_value=None) as mock_query:
+            assert word_similarity.are_words_similar("car", "automobile") is False
+            assert word_similarity.are_words_similar("car", "automobile") is False
+        
+        assert mock_query.call_count == 2
+
+
+class TestBatchedClustering:
+    """Test single-call batched clustering of a turn's answers."""
+    
+    def test_parse_clusters_valid(self):
+        """Test parsing a well-formed clustering reply."""
+        content = '{"groups": [["color", "Colour"], ["dog"]]}'
+        clusters = similarity_backends.parse_clusters(content, ["color", "colour", "dog"])
+        assert clusters == [["color", "colour"], ["dog"]]
+    
+    def test_parse_clusters_rejects_bad_replies(self):
+        """Test that malformed or incomplete replies are rejected."""
+        words = ["color", "colour", "dog"]
+        assert similarity_backends.parse_clusters("not json", words) is None
+        assert similarity_backends.parse_clusters('{"clusters": []}', words) is None
+        # Missing a word
+        assert similarity_backends.parse_clusters('{"groups": [["color", "colour"]]}', words) is None
+        # Word in two groups
+        assert similarity_backends.parse_clusters('{"groups": [["color", "colour"], ["colour", "dog"]]}', words) is None
+        # Unknown word
+        assert similarity_backends.parse_clusters('{"groups": [["color", "colour"], ["dog", "cat"]]}', words) is None
+    
+    def test_group_uses_clusters(self):
+        """Test that one clustering call groups all answers."""
+        words = {"p1": "color", "p2": "dog", "p3": "colour", "p4": "color"}
+        
+        with patch.object(word_similarity, "cluster_words_with_ai",
+                          return_value=[["colour", "color"], ["dog"]]) as mock_cluster, \
+             patch.object(word_similarity, "are_words_similar") as mock_pairwise:
+            groups = word_similarity.group_similar_words(words)
+        
+        # colour is merged with color locally, so only distinct forms are sent
+        mock_cluster.assert_called_once_with(["color", "dog"])
+        mock_pairwise.assert_not_called()
+        assert groups == {"color": ["p1", "p3", "p4"], "dog": ["p2"]}
+    
+    def test_cluster_verdicts_cached(self):
+        """Test that grouping the same answers again is decided from the verdict cache."""
+        words = {"p1": "car", "p2": "automobile", "p3": "dog"}
+        backend = MagicMock()
+        backend.cluster.return_value = [["car", "automobile"], ["dog"]]
+        
+        with patch.object(similarity_backends, "get_backend", return_value=backend):
+            first = word_similarity.group_similar_words(words)
+            second = word_similarity.group_similar_words(words)
+        
+        backend.cluster.assert_called_once()
+        backend.check.assert_not_called()
+        assert first == second == {"car": ["p1", "p2"], "dog": ["p3"]}
+        assert word_similarity.verdict_cache.get("car", "dog") is False
+    
+    def test_group_falls_back_to_pairwise(self):
+        """Test that an unusable clustering reply falls back to pairwise checks."""
+        words = {"p1": "car", "p2": "automobile", "p3": "dog"}
+        
+        def fake_similar(word1, word2, threshold=0.85):
+            return {word1, word2} == {"car", "automobile"}
+        
+        with patch.object(word_similarity, "cluster_words_with_ai", return_value=None), \
+             patch.object(word_similarity, "are_words_similar", side_effect=fake_similar):
+            groups = word_similarity.group_similar_words(words)
+        
+        assert groups == {"car": ["p1", "p2"], "dog": ["p3"]}
+    
+    def test_group_batch_disabled(self):
+        """Test that SIMILARITY_BATCH=0 skips the clustering call."""
+        with patch.dict('os.environ', {'SIMILARITY_BATCH': '0'}), \
+             patch.object(word_similarity, "cluster_words_with_ai") as mock_cluster:
+            groups = word_similarity.group_similar_words({"p1": "dog", "p2": "cat"})
+        
+        mock_cluster.assert_not_called()
+        assert len(groups) == 2
+
+
+class TestPairwiseGrouping:
+    """Test concurrent pairwise grouping with union-find."""
+    
+    def test_union_find_root_is_earliest(self):
+        """Test that merges keep the earliest word as the root regardless of order."""
+        components = word_similarity.UnionFind(["a", "b", "c"])
+        components.union("c", "b")
+        components.union("b", "a")
+        
+        assert components.find("c") == "a"
+        assert components.connected("a", "c")
+    
+    def test_identical_words_not_checked(self):
+        """Test that identical words are deduplicated before pair checks."""
+        words = {"p1": "dog", "p2": "Dog", "p3": "cat"}
+        
+        with patch.object(word_similarity, "are_words_similar", return_value=False) as mock_similar:
+            groups = word_similarity.group_pairwise(words)
+        
+        mock_similar.assert_called_once_with("dog", "cat")
+        assert groups == {"dog": ["p1", "p2"], "cat": ["p3"]}
+    
+    def test_matches_are_transitive(self):
+        """Test that chained matches end up in one group in player order."""
+        words = {"p1": "puppy", "p2": "cat", "p3": "dogs", "p4": "dog"}
+        
+        def fake_similar(word1, word2, threshold=0.85):
+            return {word1, word2} in ({"puppy", "dog"}, {"dog", "dogs"})
+        
+        with patch.object(word_similarity, "are_words_similar", side_effect=fake_similar):
+            groups = word_similarity.group_pairwise(words)
+        
+        assert groups == {"puppy": ["p1", "p3", "p4"], "cat": ["p2"]}
+    
+    def test_pairs_checked_concurrently(self):
+        """Test that pair checks overlap instead of running one after another."""
+        words = {f"p{i}": f"word{i}" for i in range(5)}  # 10 unique pairs
+        
+        def slow_similar(word1, word2, threshold=0.85):
+            time.sleep(0.1)
+            return False
+        
+        with patch.dict('os.environ', {'SIMILARITY_BATCH': '0'}), \
+             patch.object(word_similarity, "are_words_similar", side_effect=slow_similar):
+            start = time.monotonic()
+            groups = word_similarity.group_similar_words(words)
+            elapsed = time.monotonic() - start
+        
+        assert len(groups) == 5
+        assert elapsed < 0.5
+
+
+class TestAsyncSimilarity:
+    """Test the async similarity API."""
+    
+    def test_async_exact_and_no_api(self):
+        """Test async checks without an API key."""
+        with patch.dict('os.environ', {}, clear=True):
+            assert asyncio.run(word_similarity.are_words_similar_async("Dog", "dog")) is True
+            assert asyncio.run(word_similarity.are_words_similar_async("dog", "cat")) is False
+    
+    def test_async_uses_cache(self):
+        """Test that the async path shares the verdict cache."""
+        async def fake_query(word1, word2):
+            return True
+        
+        with patch.object(word_similarity, "query_semantic_similarity_async", side_effect=fake_query) as mock_query:
+            assert asyncio.run(word_similarity.are_words_similar_async("car", "automobile")) is True
+        
+        assert word_similarity.are_words_similar("automobile", "car") is True
+        assert mock_query.call_count == 1
+    
+    def test_async_client_reused(self):
+        """Test that the async client is created once per loop and key."""
+        mock_openai = MagicMock()
+        
+        async def get_twice():
+            return similarity_backends.get_async_client(), similarity_backends.get_async_client()
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}), \
+             patch.dict('sys.modules', {'openai': mock_openai}):
+            first, second = asyncio.run(get_twice())
+        
+        assert first is second
+        mock_openai.AsyncOpenAI.assert_called_once_with(api_key='test-key', max_retries=0)
+    
+    def test_async_slow_sync_backend_keeps_loop_responsive(self):
+        """Test that a backend with only sync calls doesn't block the event loop."""
+        class SlowBackend(similarity_backends.SimilarityBackend):
+            def cluster(self, words):
+                time.sleep(0.3)
+                return [[word] for word in words]
+        
+        async def run():
+            ticks = 0
+            
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+            
+            ticker = asyncio.create_task(tick())
+            groups = await word_similarity.group_similar_words_async({"p1": "car", "p2": "dog"})
+            ticker.cancel()
+            return groups, ticks
+        
+        with patch.object(similarity_backends, "get_backend", return_value=SlowBackend()):
+            groups, ticks = asyncio.run(run())
+        
+        assert len(groups) == 2
+        assert ticks >= 10
+    
+    def test_async_group_uses_clusters(self):
+        """Test async grouping with a batched clustering reply."""
+        async def fake_cluster(words):
+            return [["color", "colour"], ["dog"]]
+        
+        with patch.object(word_similarity, "cluster_words_with_ai_async", side_effect=fake_cluster):
+            groups = asyncio.run(word_similarity.group_similar_words_async(
+                {"p1": "color", "p2": "dog", "p3": "colour"}
+            ))
+        
+        assert groups == {"color": ["p1", "p3"], "dog": ["p2"]}
+    
+    def test_async_pairwise_runs_concurrently(self):
+        """Test that async pair checks overlap."""
+        async def slow_similar(word1, word2, threshold=0.85):
+            await asyncio.sleep(0.1)
+            return {word1, word2} == {"car", "automobile"}
+        
+        words = {"p1": "car", "p2": "automobile", "p3": "dog", "p4": "cat"}  # 6 unique pairs
+        with patch.dict('os.environ', {'SIMILARITY_BATCH': '0'}), \
+             patch.object(word_similarity, "are_words_similar_async", side_effect=slow_similar):
+            start = time.monotonic()
+            groups = asyncio.run(word_similarity.group_similar_words_async(words))
+            elapsed = time.monotonic() - start
+        
+        assert groups == {"car": ["p1", "p2"], "dog": ["p3"], "cat": ["p4"]}
+        assert elapsed < 0.4
+
+
+class TestLocalMatching:
+    """Test the local word-form tier."""
+    
+    @pytest.mark.parametrize("word1,word2", [
+        ("dog", "dogs"),
+        ("ran", "run"),
+        ("theater", "theatre"),
+        ("color", "colours"),
+        ("organise", "organizes"),
+        ("box", "boxes"),
+        ("city", "cities"),
+        ("pony", "ponies"),
+        ("tie", "ties"),
+        ("mouse", "mice"),
+    ])
+    def test_local_matches_without_api(self, word1, word2):
+        """Test that word forms match locally even with no API key."""
+        with patch.dict('os.environ', {}, clear=True):
+            assert word_similarity.are_words_similar(word1, word2) is True
+    
+    @pytest.mark.parametrize("word1,word2", [
+        ("hope", "hop"),
+        ("news", "new"),
+        ("bed", "be"),
+        ("car", "automobile"),
+        ("run", "running"),
+        ("organising", "organized"),
+        ("lied", "lie"),
+    ])
+    def test_local_tier_undecided(self, word1, word2):
+        """Test that unrelated words are left for the AI."""
+        assert word_similarity.check_local_similarity(word1, word2) is None
+    
+    @pytest.mark.parametrize("word1,word2", [
+        ("earring", "ear"),
+        ("evening", "even"),
+        ("herring", "her"),
+        ("boxing", "box"),
+        ("wedding", "wed"),
+        ("rugged", "rug"),
+        ("wicked", "wick"),
+        ("pudding", "pud"),
+        ("morning", "morn"),
+    ])
+    def test_look_alike_inflections_not_merged(self, word1, word2):
+        """Test that words that only look like -ing/-ed forms are not matched locally."""
+        assert word_similarity.check_local_similarity(word1, word2) is None
+        with patch.dict('os.environ', {}, clear=True):
+            groups = word_similarity.group_similar_words({"p1": word1, "p2": word2})
+        assert len(groups) == 2
+    
+    @pytest.mark.parametrize("word1,word2", [
+        ("sky", "ski"),
+        ("skies", "skis"),
+        ("chilly", "chilli"),
+        ("saw", "see"),
+        ("left", "leave"),
+        ("fell", "fall"),
+        ("lost", "lose"),
+        ("fed", "feed"),
+        ("drunk", "drink"),
+        ("dice", "die"),
+        ("storey", "story"),
+        ("cheque", "check"),
+    ])
+    def test_ambiguous_forms_not_merged(self, word1, word2):
+        """Test that forms which are also other words are left for the AI."""
+        assert word_similarity.check_local_similarity(word1, word2) is None
+    
+    def test_local_match_skips_ai(self):
+        """Test that locally matched pairs never reach the AI."""
+        with patch.object(word_similarity, "query_semantic_similarity") as mock_query:
+            assert word_similarity.are_words_similar("dogs", "dog") is True
+        mock_query.assert_not_called()
+    
+    def test_group_merges_local_forms_without_api(self):
+        """Test that grouping uses the local tier when AI is unavailable."""
+        words = {"p1": "dogs", "p2": "cat", "p3": "dog", "p4": "colour", "p5": "color"}
+        with patch.dict('os.environ', {}, clear=True):
+            groups = word_similarity.group_similar_words(words)
+        
+        assert groups == {"dogs": ["p1", "p3"], "cat": ["p2"], "colour": ["p4", "p5"]}
+    
+    def test_group_no_ai_call_when_local_tier_resolves_all(self):
+        """Test that no clustering request is made when one form remains."""
+        with patch.object(word_similarity, "cluster_words_with_ai") as mock_cluster:
+            groups = word_similarity.group_similar_words({"p1": "dog", "p2": "dogs"})
+        
+        mock_cluster.assert_not_called()
+        assert groups == {"dog": ["p1", "p2"]}
+
+
+
+class TestAnswerWarming:
+    """Test speculative matching of answers while a turn is still open."""
+    
+    def test_warm_answer_caches_verdicts(self):
+        """Test that warming checks the new answer against earlier ones."""
+        def fake_query(word1, word2):
+            return {word1, word2} == {"car", "automobile"}
+        
+        with patch.dict('os.environ', {'SIMILARITY_WARM': '1'}), \
+             patch.object(word_similarity, "query_semantic_similarity", side_effect=fake_query):
+            word_similarity.warm_answer("automobile", ["car", "banana"]).result()
+        
+        assert word_similarity.verdict_cache.get("car", "automobile") is True
+        assert word_similarity.verdict_cache.get("banana", "automobile") is False
+    
+    def test_group_uses_warmed_verdicts(self):
+        """Test that grouping only sends pairs without a cached verdict to the AI."""
+        word_similarity.verdict_cache.put("car", "automobile", True)
+        word_similarity.verdict_cache.put("car", "banana", False)
+        word_similarity.verdict_cache.put("automobile", "banana", False)
+        
+        with patch.object(word_similarity, "cluster_words_with_ai",
+                          return_value=[["car"], ["banana"], ["fruit"]]) as mock_cluster:
+            groups = word_similarity.group_similar_words(
+                {"p1": "car", "p2": "automobile", "p3": "banana", "p4": "fruit"}
+            )
+        
+        mock_cluster.assert_called_once_with(["car", "fruit", "banana"])
+        assert groups == {"car": ["p1", "p2"], "banana": ["p3"], "fruit": ["p4"]}
+    
+    def test_fully_warmed_turn_skips_ai(self):
+        """Test that no AI call is made when every pair was warmed."""
+        word_similarity.verdict_cache.put("car", "automobile", True)
+        
+        with patch.object(word_similarity, "cluster_words_with_ai") as mock_cluster:
+            groups = word_similarity.group_similar_words({"p1": "car", "p2": "automobile"})
+        
+        mock_cluster.assert_not_called()
+        assert groups == {"car": ["p1", "p2"]}
+    
+    def test_warming_disabled(self):
+        """Test that warming is off unless SIMILARITY_WARM=1."""
+        assert word_similarity.warm_answer("automobile", ["car"]) is None
+        with patch.dict('os.environ', {'SIMILARITY_WARM': '0'}):
+            assert word_similarity.warm_answer("automobile", ["car"]) is None
+
+
+
+
+class TestVocabularyPrefetch:
+    """Test grouping answers with a question's prefetched likely answers."""
+    
+    def test_prefetch_stores_vocabulary(self):
+        """Test that the prefetch job stores the vocabulary by base form."""
+        with patch.dict('os.environ', {'SIMILARITY_PREFETCH': '1'}), \
+             patch.object(word_similarity, "fetch_vocabulary",
+                          return_value={"cars": "car", "automobile": "car", "bus": "bus"}) as mock_call:
+            word_similarity.prefetch_vocabulary("turn-1", "What do you drive?").result()
+        
+        mock_call.assert_called_once_with("What do you drive?", 40)
+        assert word_similarity.get_vocabulary("turn-1") == {"car": "car", "automobile": "car", "bus": "bus"}
+    
+    def test_prefetch_disabled_by_default(self):
+        """Test that nothing is prefetched unless SIMILARITY_PREFETCH=1."""
+        assert word_similarity.prefetch_vocabulary("turn-1", "What do you drive?") is None
+    
+    def test_slow_prefetch_skips_breaker(self):
+        """Test that slow vocabulary calls use their own timeout and don't open the breaker."""
+        import similarity_health
+        
+        backend = MagicMock()
+        backend.vocabulary.side_effect = lambda question, size, timeout: time.sleep(0.05) or {"car": "car"}
+        with patch.dict('os.environ', {'SIMILARITY_PREFETCH_TIMEOUT': '60'}), \
+             patch.object(similarity_backends, "get_backend", return_value=backend), \
+             patch.object(similarity_health.breaker, "slow_seconds", 0.01):
+            for _ in range(similarity_health.breaker.failure_threshold + 1):
+                assert word_similarity.fetch_vocabulary("What do you drive?", 40) == {"car": "car"}
+        
+        backend.vocabulary.assert_called_with("What do you drive?", 40, 60.0)
+        assert similarity_health.breaker.state == similarity_health.CLOSED
+        assert similarity_health.breaker.stats()["failures"] == 0
+    
+    def test_vocabulary_groups_without_ai(self):
+        """Test that answers in the vocabulary are grouped with local lookups only."""
+        word_similarity.store_vocabulary("turn-1", {"car": "car", "automobile": "car", "bus": "bus"})
+        
+        with patch.object(word_similarity, "cluster_words_with_ai") as mock_cluster, \
+             patch.object(word_similarity, "query_semantic_similarity") as mock_query:
+            groups = word_similarity.group_similar_words(
+                {"p1": "cars", "p2": "automobile", "p3": "bus"},
+                vocabulary=word_similarity.get_vocabulary("turn-1")
+            )
+        
+        mock_cluster.assert_not_called()
+        mock_query.assert_not_called()
+        assert groups == {"cars": ["p1", "p2"], "bus": ["p3"]}
+    
+    def test_unexpected_answers_still_asked(self):
+        """Test that only pairs involving answers outside the vocabulary go to the AI."""
+        vocabulary = {"car": "car", "bus": "bus"}
+        
+        with patch.object(word_similarity, "cluster_words_with_ai",
+                          return_value=[["car", "sedan"], ["bus"]]) as mock_cluster:
+            groups = word_similarity.group_similar_words(
+                {"p1": "car", "p2": "bus", "p3": "sedan"}, vocabulary=vocabulary
+            )
+        
+        mock_cluster.assert_called_once_with(["car", "sedan", "bus"])
+        assert groups == {"car": ["p1", "p3"], "bus": ["p2"]}
+    
+    def test_retention_is_bounded(self):
+        """Test that only the most recent SIMILARITY_PREFETCH_TURNS vocabularies are kept."""
+        with patch.dict('os.environ', {'SIMILARITY_PREFETCH_TURNS': '2'}):
+            for turn_id in ["t1", "t2", "t3"]:
+                word_similarity.store_vocabulary(turn_id, {"car": "car"})
+        
+        assert word_similarity.get_vocabulary("t1") is None
+        assert word_similarity.get_vocabulary("t3") == {"car": "car"}
+
+
+class TestRequestCoalescing:
+    """Test that identical in-flight similarity queries share one request."""
+    
+    def test_concurrent_pair_lookups_share_one_call(self):
+        """Test that threads asking about the same pair make one AI call."""
+        started = threading.Event()
+        release = threading.Event()
+        
+        def slow_query(word1, word2):
+            started.set()
+            release.wait(2)
+            return True
+        
+        shared_before = word_similarity.pair_flight.shared
+        with patch.object(word_similarity, "query_semantic_similarity", side_effect=slow_query) as mock_query:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                leader = pool.submit(word_similarity.are_words_similar, "red", "crimson")
+                started.wait(2)
+                followers = [
+                    pool.submit(word_similarity.are_words_similar, *pair)
+                    for pair in [("crimson", "red"), ("Red", "crimson"), ("red", "crimson ")]
+                ]
+                while word_similarity.pair_flight.shared < shared_before + 3:
+                    time.sleep(0.01)
+                release.set()
+                results = [leader.result()] + [future.result() for future in followers]
+        
+        assert results == [True] * 4
+        assert mock_query.call_count == 1
+    
+    def test_failures_reach_waiting_callers(self):
+        """Test that an exception in the shared call is raised to every caller."""
+        flight = word_similarity.SingleFlight()
+        release = threading.Event()
+        
+        def failing():
+            release.wait(2)
+            raise RuntimeError("boom")
+        
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(flight.do, "key", failing)
+            while not flight.in_flight():
+                time.sleep(0.01)
+            second = pool.submit(flight.do, "key", failing)
+            while not flight.shared:
+                time.sleep(0.01)
+            release.set()
+            for future in (first, second):
+                with pytest.raises(RuntimeError):
+                    future.result()
+        assert flight.in_flight() == 0
+    
+    def test_async_lookups_share_one_call(self):
+        """Test that concurrent async lookups of a pair make one AI call."""
+        calls = []
+        
+        async def slow_query(word1, word2):
+            calls.append((word1, word2))
+            await asyncio.sleep(0.05)
+            return True
+        
+        async def run():
+            return await asyncio.gather(*(
+                word_similarity.are_words_similar_async("red", "crimson") for _ in range(5)
+            ))
+        
+        with patch.object(word_similarity, "query_semantic_similarity_async", side_effect=slow_query):
+            assert asyncio.run(run()) == [True] * 5
+        assert len(calls) == 1
+
+
+class TestCanonicalGrouping:
+    """Test grouping by cached canonical answers."""
+    
+    def test_parse_canonical_forms(self):
+        """Test parsing and validating a canonicalization reply."""
+        words = ["automobile", "car"]
+        assert similarity_backends.parse_canonical_forms(
+            '{"automobile": "Car", "car": "car"}', words
+        ) == {"automobile": "car", "car": "car"}
+        assert similarity_backends.parse_canonical_forms('{"automobile": "car"}', words) is None
+        assert similarity_backends.parse_canonical_forms('{"automobile": "motor car", "car": "car"}', words) is None
+        assert similarity_backends.parse_canonical_forms("nope", words) is None
+    
+    def test_cache_keys_by_base_form(self):
+        """Test that inflected words share the cached canonical answer."""
+        cache = word_similarity.CanonicalCache()
+        cache.put_many({"automobiles": "cars"})
+        
+        assert cache.get("automobile") == "car"
+        assert cache.get("truck") is None
+    
+    def test_cache_persists_to_sqlite(self, tmp_path):
+        """Test that canonical answers survive a new cache instance."""
+        path = str(tmp_path / "similarity.db")
+        word_similarity.CanonicalCache(path=path).put_many({"automobile": "car"})
+        
+        assert word_similarity.CanonicalCache(path=path).get("automobile") == "car"
+    
+    def test_unseen_words_resolved_in_one_call(self):
+        """Test that a turn costs one call for unseen words and none once cached."""
+        def fake_canonicalize(words):
+            return {word: {"automobiles": "car", "puppy": "dog"}.get(word, word) for word in words}
+        
+        words = {"p1": "car", "p2": "automobiles", "p3": "dog", "p4": "puppy"}
+        with patch.dict('os.environ', {'SIMILARITY_GROUPING': 'canonical'}), \
+             patch.object(word_similarity, "canonicalize_words_with_ai",
+                          side_effect=fake_canonicalize) as mock_canonicalize, \
+             patch.object(word_similarity, "cluster_words_with_ai") as mock_cluster:
+            first = word_similarity.group_similar_words(words)
+            second = word_similarity.group_similar_words(words)
+        
+        mock_canonicalize.assert_called_once_with(["car", "automobiles", "dog", "puppy"])
+        mock_cluster.assert_not_called()
+        assert first == second == {"car": ["p1", "p2"], "dog": ["p3", "p4"]}
+    
+    def test_failed_canonicalization_falls_back(self):
+        """Test that unresolved words still go through clustering."""
+        words = {"p1": "car", "p2": "automobile"}
+        with patch.dict('os.environ', {'SIMILARITY_GROUPING': 'canonical'}), \
+             patch.object(word_similarity, "canonicalize_words_with_ai", return_value=None), \
+             patch.object(word_similarity, "cluster_words_with_ai",
+                          return_value=[["car", "automobile"]]) as mock_cluster:
+            groups = word_similarity.group_similar_words(words)
+        
+        mock_cluster.assert_called_once()
+        assert groups == {"car": ["p1", "p2"]}
+    
+    def test_async_canonical_grouping(self):
+        """Test canonical grouping on the async path."""
+        async def fake_canonicalize(words):
+            return {word: "car" for word in words}
+        
+        with patch.dict('os.environ', {'SIMILARITY_GROUPING': 'canonical'}), \
+             patch.object(word_similarity, "canonicalize_words_with_ai_async", side_effect=fake_canonicalize):
+            groups = asyncio.run(word_similarity.group_similar_words_async({"p1": "car", "p2": "automobile"}))
+        
+        assert groups == {"car": ["p1", "p2"]}
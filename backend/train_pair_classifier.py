@@ -0,0 +1,56 @@
+"""
+Train the local pair classifier from recorded AI verdicts.
+
+    python train_pair_classifier.py verdicts.jsonl --out pair_model.json
+
+Holds out part of the verdicts to pick confidence thresholds that keep
+each side's precision at --precision, then reports how many held-out pairs
+the model would answer locally and how accurately.
+"""
+import argparse
+import random
+
+import pair_classifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local pair classifier")
+    parser.add_argument("logs", nargs="+", help="Verdict logs written via SIMILARITY_VERDICT_LOG")
+    parser.add_argument("--out", default="pair_model.json")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of pairs held out for thresholds")
+    parser.add_argument("--precision", type=float, default=0.98, help="Required precision of local verdicts")
+    parser.add_argument("--min-support", type=int, default=10,
+                        help="Held-out pairs needed before a threshold is trusted")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    examples = pair_classifier.read_verdicts(args.logs)
+    random.Random(args.seed).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+    training, held_out = examples[:split], examples[split:]
+    print(f"{len(examples)} pairs ({sum(similar for _, _, similar in examples)} matches), "
+          f"{len(training)} for training, {len(held_out)} held out")
+    
+    classifier = pair_classifier.train(training, epochs=args.epochs)
+    pair_classifier.choose_thresholds(classifier, held_out, precision=args.precision,
+                                      min_support=args.min_support)
+    
+    decided = correct = 0
+    for word1, word2, similar in held_out:
+        verdict = classifier.classify(word1, word2)
+        if verdict is not None:
+            decided += 1
+            correct += verdict == similar
+    
+    coverage = decided / len(held_out) if held_out else 0.0
+    accuracy = correct / decided if decided else 0.0
+    print(f"thresholds: match >= {classifier.high:.3f}, no match <= {classifier.low:.3f}")
+    print(f"held out: {coverage:.1%} answered locally, {accuracy:.1%} of those correct")
+    
+    classifier.save(args.out)
+    print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Typo correction with a SymSpell-style deletion dictionary.
+
+Every dictionary word is indexed under the strings reachable from its
+prefix by deleting up to SIMILARITY_TYPO_DISTANCE characters (default 2),
+so a lookup only generates the deletions of the query and verifies the few
+words sharing one. Lookups stay fast as the dictionary grows.
+
+Set SIMILARITY_WORDLIST_PATH to a word list (one word per line, optionally
+followed by a frequency count) to enable the tier. It is loaded once, at
+startup.
+"""
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+import os
+import threading
+
+
+class TypoIndex:
+    """A SymSpell deletion dictionary over a word list."""
+    
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.counts: Dict[str, int] = {}
+        self._deletes: Dict[str, List[str]] = {}
+    
+    def add(self, word: str, count: int = 1) -> None:
+        """Add a word (or raise its count if it is already indexed)."""
+        word = word.strip().lower()
+        if not word:
+            return
+        if word in self.counts:
+            self.counts[word] += count
+            return
+        
+        self.counts[word] = count
+        for delete in deletions(word[:self.prefix_length], self.max_distance):
+            self._deletes.setdefault(delete, []).append(word)
+    
+    def __contains__(self, word: str) -> bool:
+        return word.strip().lower() in self.counts
+    
+    def __len__(self) -> int:
+        return len(self.counts)
+    
+    def correct(self, word: str) -> Optional[str]:
+        """
+        Get the dictionary word a (possibly misspelled) word was meant to be.
+        
+        Returns:
+            The word itself if it is in the dictionary, the closest
+            dictionary word within the allowed distance (most frequent on
+            ties), or None if there is none
+        """
+        word = word.strip().lower()
+        if word in self.counts:
+            return word
+        
+        limit = self.allowed_distance(word)
+        if limit == 0:
+            return None
+        
+        best: Optional[Tuple[int, int, str]] = None
+        seen: Set[str] = set()
+        for delete in deletions(word[:self.prefix_length], limit):
+            for candidate in self._deletes.get(delete, ()):
+                if candidate in seen or abs(len(candidate) - len(word)) > limit:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, limit)
+                if distance <= limit:
+                    key = (distance, -self.counts[candidate], candidate)
+                    if best is None or key < best:
+                        best = key
+        return best[2] if best else None
+    
+    def allowed_distance(self, word: str) -> int:
+        """Short words tolerate fewer edits (a 3-letter word 2 edits away is another word)."""
+        if len(word) <= 3:
+            return 0
+        if len(word) <= 5:
+            return min(1, self.max_distance)
+        return self.max_distance
+    
+    @classmethod
+    def load(cls, path: str, max_distance: int = 2) -> "TypoIndex":
+        """Build an index from a word list file."""
+        index = cls(max_distance=max_distance)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                count = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+                index.add(parts[0], count)
+        return index
+
+
+def deletions(word: str, max_distance: int) -> Set[str]:
+    """Get every string reachable by deleting up to max_distance characters (including the word)."""
+    found = {word}
+    for distance in range(1, min(max_distance, len(word)) + 1):
+        for positions in combinations(range(len(word)), distance):
+            skip = set(positions)
+            found.add("".join(char for i, char in enumerate(word) if i not in skip))
+    return found
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent transpositions).
+    
+    Returns limit + 1 as soon as the distance is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    
+    before_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+_index: Optional[TypoIndex] = None
+_index_path: Optional[str] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[TypoIndex]:
+    """
+    Get the index for SIMILARITY_WORDLIST_PATH, building it once.
+    
+    Returns:
+        The index, or None if no word list is configured or it can't be read
+    """
+    global _index, _index_path
+    
+    path = os.getenv("SIMILARITY_WORDLIST_PATH")
+    if not path:
+        return None
+    
+    with _index_lock:
+        if _index_path != path:
+            _index_path = path
+            try:
+                _index = TypoIndex.load(path, int(os.getenv("SIMILARITY_TYPO_DISTANCE", "2")))
+            except Exception as e:
+                print(f"Could not load word list from {path}: {e}")
+                _index = None
+        return _index
@@ -0,0 +1,155 @@
+"""
+Usage ledger for similarity provider calls.
+
+Records calls, tokens, latency and outcome per turn, per game and in total.
+Calls are attributed to the game/turn set with scope(), which is carried
+into worker threads by submit(). Only the most recent USAGE_MAX_TURNS turns
+(default 1000) and USAGE_MAX_GAMES games (default 200) are kept.
+"""
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import os
+import threading
+
+
+class UsageStats:
+    """Rolled-up usage of one turn, game, or the whole server."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.by_kind: Dict[str, int] = {}
+    
+    def add_call(self, kind: str, success: bool, latency: float) -> None:
+        self.calls += 1
+        if not success:
+            self.failures += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+    
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "avg_latency": self.total_latency / self.calls if self.calls else 0.0,
+            "max_latency": self.max_latency,
+            "by_kind": dict(self.by_kind),
+        }
+
+
+_scope: ContextVar[Optional[Tuple[str, Optional[str]]]] = ContextVar("usage_scope", default=None)
+_lock = threading.Lock()
+_totals = UsageStats()
+_games: "OrderedDict[str, UsageStats]" = OrderedDict()
+_turns: "OrderedDict[str, Tuple[str, UsageStats]]" = OrderedDict()  # turn_id -> (game_id, stats)
+
+
+@contextmanager
+def scope(game_id: str, turn_id: Optional[str] = None) -> Iterator[None]:
+    """Attribute provider calls made inside the block to a game and turn."""
+    token = _scope.set((game_id, turn_id))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def submit(executor: Executor, fn: Callable, *args) -> Future:
+    """Submit work to a thread pool, keeping the caller's game/turn scope."""
+    return executor.submit(copy_context().run, fn, *args)
+
+
+def record_call(kind: str, success: bool, latency: float) -> None:
+    """Record one provider call in the current scope."""
+    with _lock:
+        for stats in _current_stats():
+            stats.add_call(kind, success, latency)
+
+
+def record_tokens(usage: Any) -> None:
+    """Record the token usage reported with a chat-completion response."""
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if not isinstance(prompt_tokens, int) or not isinstance(completion_tokens, int):
+        return
+    with _lock:
+        for stats in _current_stats():
+            stats.add_tokens(prompt_tokens, completion_tokens)
+
+
+def totals() -> Dict[str, Any]:
+    with _lock:
+        return _totals.to_dict()
+
+
+def game_usage(game_id: str) -> Optional[Dict[str, Any]]:
+    """Get a game's usage and that of its retained turns, or None if not recorded."""
+    with _lock:
+        stats = _games.get(game_id)
+        if stats is None:
+            return None
+        return {
+            "game_id": game_id,
+            **stats.to_dict(),
+            "turns": {
+                turn_id: turn_stats.to_dict()
+                for turn_id, (turn_game_id, turn_stats) in _turns.items()
+                if turn_game_id == game_id
+            },
+        }
+
+
+def recent_games(limit: int = 20) -> List[Dict[str, Any]]:
+    """Get the usage of the most recently active games, newest first."""
+    with _lock:
+        game_ids = list(reversed(_games))[:limit]
+        return [{"game_id": game_id, **_games[game_id].to_dict()} for game_id in game_ids]
+
+
+def reset() -> None:
+    global _totals
+    with _lock:
+        _totals = UsageStats()
+        _games.clear()
+        _turns.clear()
+
+
+def _current_stats() -> List[UsageStats]:
+    """Get the stats to update for the current scope (caller holds _lock)."""
+    found = [_totals]
+    current = _scope.get()
+    if current is None:
+        return found
+    
+    game_id, turn_id = current
+    found.append(_touch(_games, game_id, UsageStats, int(os.getenv("USAGE_MAX_GAMES", "200"))))
+    if turn_id is not None:
+        entry = _touch(_turns, turn_id, lambda: (game_id, UsageStats()), int(os.getenv("USAGE_MAX_TURNS", "1000")))
+        found.append(entry[1])
+    return found
+
+
+def _touch(entries: OrderedDict, key: str, create: Callable[[], Any], limit: int) -> Any:
+    """Get or create an entry, marking it most recent and evicting the oldest beyond the limit."""
+    if key in entries:
+        entries.move_to_end(key)
+    else:
+        entries[key] = create()
+        while len(entries) > limit:
+            entries.popitem(last=False)
+    return entries[key]
@@ -0,0 +1,224 @@
+"""
+Local, deterministic word normalization for matching answers without AI.
+
+Maps a word to a base form key so that plural/singular forms (dog/dogs),
+irregular forms (ran/run, mice/mouse) and US/UK spellings (color/colour)
+share one key. Regular -ed/-ing endings are not stripped: too many words
+only look like inflections (evening/even, wicked/wick). All tables are
+plain dicts loaded once at import.
+"""
+from functools import lru_cache
+
+
+# Irregular plurals and verb forms -> base form. Forms that are also other
+# words (saw, left, fell, lost, fed, drunk, dice, felt, spoke, leaves,
+# lives) are left out: a local match is final, so they go to the AI instead.
+IRREGULAR_FORMS = {
+    "children": "child",
+    "men": "man",
+    "women": "woman",
+    "people": "person",
+    "mice": "mouse",
+    "geese": "goose",
+    "feet": "foot",
+    "teeth": "tooth",
+    "oxen": "ox",
+    "lice": "louse",
+    "knives": "knife",
+    "wives": "wife",
+    "loaves": "loaf",
+    "wolves": "wolf",
+    "calves": "calf",
+    "halves": "half",
+    "shelves": "shelf",
+    "thieves": "thief",
+    "elves": "elf",
+    "cacti": "cactus",
+    "fungi": "fungus",
+    "octopi": "octopus",
+    "buses": "bus",
+    "potatoes": "potato",
+    "tomatoes": "tomato",
+    "heroes": "hero",
+    "echoes": "echo",
+    "ran": "run",
+    "went": "go",
+    "gone": "go",
+    "ate": "eat",
+    "eaten": "eat",
+    "swam": "swim",
+    "swum": "swim",
+    "sang": "sing",
+    "sung": "sing",
+    "drank": "drink",
+    "flew": "fly",
+    "flown": "fly",
+    "drove": "drive",
+    "driven": "drive",
+    "wrote": "write",
+    "written": "write",
+    "rode": "ride",
+    "ridden": "ride",
+    "slept": "sleep",
+    "bought": "buy",
+    "brought": "bring",
+    "caught": "catch",
+    "taught": "teach",
+    "thought": "think",
+    "fought": "fight",
+    "sat": "sit",
+    "spoken": "speak",
+    "froze": "freeze",
+    "frozen": "freeze",
+    "fallen": "fall",
+    "won": "win",
+    "told": "tell",
+    "sold": "sell",
+    "kept": "keep",
+    "made": "make",
+    "paid": "pay",
+    "said": "say",
+    "seen": "see",
+    "took": "take",
+    "taken": "take",
+    "gave": "give",
+    "given": "give",
+    "knew": "know",
+    "known": "know",
+    "grew": "grow",
+    "grown": "grow",
+    "threw": "throw",
+    "thrown": "throw",
+    "began": "begin",
+    "begun": "begin",
+}
+
+# British/alternate spellings -> American spelling. Spellings whose American
+# form is also another word (storey/story, cheque/check, tyre/tire,
+# metre/meter) are left out.
+SPELLING_VARIANTS = {
+    "colour": "color",
+    "favourite": "favorite",
+    "favour": "favor",
+    "flavour": "flavor",
+    "honour": "honor",
+    "humour": "humor",
+    "labour": "labor",
+    "neighbour": "neighbor",
+    "behaviour": "behavior",
+    "harbour": "harbor",
+    "rumour": "rumor",
+    "vapour": "vapor",
+    "armour": "armor",
+    "odour": "odor",
+    "theatre": "theater",
+    "centre": "center",
+    "litre": "liter",
+    "fibre": "fiber",
+    "calibre": "caliber",
+    "sombre": "somber",
+    "spectre": "specter",
+    "grey": "gray",
+    "aluminium": "aluminum",
+    "programme": "program",
+    "catalogue": "catalog",
+    "dialogue": "dialog",
+    "analogue": "analog",
+    "analyse": "analyze",
+    "paralyse": "paralyze",
+    "organise": "organize",
+    "realise": "realize",
+    "recognise": "recognize",
+    "apologise": "apologize",
+    "criticise": "criticize",
+    "memorise": "memorize",
+    "emphasise": "emphasize",
+    "defence": "defense",
+    "offence": "offense",
+    "licence": "license",
+    "pretence": "pretense",
+    "travelling": "traveling",
+    "traveller": "traveler",
+    "cancelled": "canceled",
+    "jewellery": "jewelry",
+    "pyjamas": "pajamas",
+    "plough": "plow",
+    "moustache": "mustache",
+    "doughnut": "donut",
+    "sceptic": "skeptic",
+    "mum": "mom",
+    "aeroplane": "airplane",
+    "manoeuvre": "maneuver",
+    "encyclopaedia": "encyclopedia",
+    "paediatric": "pediatric",
+    "oestrogen": "estrogen",
+    "ageing": "aging",
+    "judgement": "judgment",
+    "whisky": "whiskey",
+    "cosy": "cozy",
+    "kerb": "curb",
+}
+
+# Words ending in "s" that are not plurals and must not be stemmed
+INVARIANT_WORDS = {
+    "news", "series", "species", "means", "lens", "gas", "bus", "plus",
+    "yes", "this", "his", "its", "us", "was", "has", "is", "as",
+    "always", "perhaps", "chaos", "physics", "mathematics", "politics",
+    "tennis", "chess", "scissors", "pants", "jeans", "shorts",
+}
+
+
+def base_form(word: str) -> str:
+    """
+    Get the base form key of a word.
+    
+    Two words with the same key are considered the same answer. Unknown
+    words map to themselves (lowercased) after stemming.
+    """
+    return _base_form(word.strip().lower())
+
+
+@lru_cache(maxsize=50000)
+def _base_form(word: str) -> str:
+    word = _lookup(word)
+    if word in INVARIANT_WORDS:
+        return word
+    
+    stem = strip_plural(word)
+    mapped = _lookup(stem)
+    # A table hit on the stem needs stemming again (e.g. colours -> colour -> color)
+    return strip_plural(mapped) if mapped != stem else stem
+
+
+def _lookup(word: str) -> str:
+    word = IRREGULAR_FORMS.get(word, word)
+    return SPELLING_VARIANTS.get(word, word)
+
+
+def strip_plural(word: str) -> str:
+    """
+    Strip a plural ending (step 1a of the Porter stemmer), turning -ies back
+    into -y (ponies -> pony).
+    
+    Porter's step 1b (-ed/-ing) is deliberately left out: ear/earring,
+    even/evening and wed/wedding would become the same answer. So is step
+    1c (final y -> i), which makes sky/ski and chilly/chilli the same
+    answer. Those pairs are left to the later tiers and the AI, as are
+    steps 2-5 (derivational suffixes), which merge words players would not
+    consider the same answer.
+    """
+    if len(word) <= 2:
+        return word
+    
+    if word.endswith("sses"):
+        return word[:-2]
+    if word.endswith("ies"):
+        # ties -> tie, but ponies -> pony (movies -> movy is left undecided)
+        return word[:-1] if len(word) <= 4 else word[:-3] + "y"
+    if word.endswith(("xes", "ches", "shes", "zzes")):
+        # Not in Porter's step 1a, which leaves "boxe" for step 5 to trim
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss") and not word.endswith("us"):
+        return word[:-1]
+    return word
+
@@ -1,9 +1,283 @@
 """
 Word similarity checking for matching answers that are "close enough".
-Uses exact matching or AI for semantic matching.
+Uses exact matching, local word-form rules, word vectors, or AI for semantic matching.
 """
-from typing import List, Dict, Set
+from collections import OrderedDict
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Hashable, List, Dict, Set, Optional, Tuple
 import os
+import sqlite3
+import threading
+import time
+
+from word_forms import base_form
+import embeddings
+import hedging
+import pair_classifier
+import typo_index
+import similarity_backends
+import similarity_health
+import usage_ledger
+
+
+class VerdictCache:
+    """
+    Cache of similarity verdicts keyed by an unordered word pair.
+    
+    Keeps a bounded LRU in memory and, if a path is given, persists every
+    verdict to a SQLite file so it survives restarts.
+    """
+    
+    def __init__(self, max_size: int = 10000, path: Optional[str] = None):
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], bool]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "word1 TEXT NOT NULL, word2 TEXT NOT NULL, similar INTEGER NOT NULL, "
+                "PRIMARY KEY (word1, word2))"
+            )
+            self._db.commit()
+    
+    @staticmethod
+    def make_key(word1: str, word2: str) -> Tuple[str, str]:
+        """Build a symmetric key so (a, b) and (b, a) share one entry."""
+        a = word1.strip().lower()
+        b = word2.strip().lower()
+        return (a, b) if a <= b else (b, a)
+    
+    def get(self, word1: str, word2: str) -> Optional[bool]:
+        """Return the cached verdict for a pair, or None if unknown."""
+        key = self.make_key(word1, word2)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT similar FROM verdicts WHERE word1 = ? AND word2 = ?", key
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, bool(row[0]))
+                    self.hits += 1
+                    return bool(row[0])
+            
+            self.misses += 1
+            return None
+    
+    def put(self, word1: str, word2: str, similar: bool) -> None:
+        """Store a verdict for a pair."""
+        key = self.make_key(word1, word2)
+        with self._lock:
+            self._remember(key, similar)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO verdicts (word1, word2, similar) VALUES (?, ?, ?)",
+                    (key[0], key[1], int(similar))
+                )
+                self._db.commit()
+    
+    def put_many(self, verdicts: List[Tuple[str, str, bool]]) -> None:
+        """Store verdicts for several pairs, committing once."""
+        rows = [(*self.make_key(word1, word2), int(similar)) for word1, word2, similar in verdicts]
+        with self._lock:
+            for word1, word2, similar in rows:
+                self._remember((word1, word2), bool(similar))
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO verdicts (word1, word2, similar) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+    
+    def clear(self) -> None:
+        """Drop the in-memory entries and reset counters (the SQLite file is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+    
+    def _remember(self, key: Tuple[str, str], similar: bool) -> None:
+        self._entries[key] = similar
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class CanonicalCache:
+    """
+    Permanent mapping from a word's base form to its canonical answer key.
+    
+    Words with the same canonical key are the same answer, so a turn can be
+    grouped with one lookup per word. Entries are never evicted; if a path is
+    given they are also persisted to SQLite.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS canonical_forms ("
+                "form TEXT PRIMARY KEY, canonical TEXT NOT NULL)"
+            )
+            self._db.commit()
+    
+    def get(self, word: str) -> Optional[str]:
+        """Return the canonical key for a word, or None if unknown."""
+        form = base_form(word)
+        with self._lock:
+            if form in self._entries:
+                self.hits += 1
+                return self._entries[form]
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT canonical FROM canonical_forms WHERE form = ?", (form,)
+                ).fetchone()
+                if row is not None:
+                    self._entries[form] = row[0]
+                    self.hits += 1
+                    return row[0]
+            
+            self.misses += 1
+            return None
+    
+    def put_many(self, canonical_by_word: Dict[str, str]) -> None:
+        """Store canonical answers, keyed by the base form of each word."""
+        rows = [(base_form(word), base_form(canonical)) for word, canonical in canonical_by_word.items()]
+        with self._lock:
+            self._entries.update(rows)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO canonical_forms (form, canonical) VALUES (?, ?)", rows
+                )
+                self._db.commit()
+    
+    def clear(self) -> None:
+        """Drop the in-memory entries and reset counters (the SQLite file is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one.
+    
+    The first caller for a key runs the call; callers arriving while it is
+    in flight wait for it and get the same result (or exception).
+    """
+    
+    def __init__(self):
+        self.shared = 0
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            result = call()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved for callers that never came
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+    
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Async version of SingleFlight, coalescing calls within each event loop.
+    
+    If the leading call is cancelled, callers waiting on it get None.
+    """
+    
+    def __init__(self):
+        self.shared = 0
+        self._calls: Dict[Tuple[int, Hashable], "asyncio.Future"] = {}
+    
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        future = self._calls.get(flight_key)
+        if future is not None:
+            self.shared += 1
+            # Shielded so a waiting caller's cancellation doesn't cancel the shared call
+            return await asyncio.shield(future)
+        
+        future = self._calls[flight_key] = loop.create_future()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.set_result(None)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[flight_key]
+    
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+# Shared caches; set SIMILARITY_CACHE_PATH to persist them across restarts
+verdict_cache = VerdictCache(
+    max_size=int(os.getenv("SIMILARITY_CACHE_SIZE", "10000")),
+    path=os.getenv("SIMILARITY_CACHE_PATH") or None
+)
+canonical_cache = CanonicalCache(path=os.getenv("SIMILARITY_CACHE_PATH") or None)
+
+# Concurrent AI lookups of the same pair (from any game) share one request
+pair_flight = SingleFlight()
+pair_flight_async = AsyncSingleFlight()
 
 
 def are_words_similar(word1: str, word2: str, threshold: float = 0.85) -> bool:
@@ -13,17 +287,154 @@ def are_words_similar(word1: str, word2: str, threshold: float = 0.85) -> bool:
     Args:
         word1: First word
         word2: Second word
-        threshold: Unused, kept for compatibility
+        threshold: Minimum cosine similarity for an embedding match
     
     Returns:
         True if words are similar enough, False otherwise
     """
+    verdict = check_without_ai(word1, word2, threshold)
+    if verdict is not None:
+        return verdict
+    
+    # Join an identical in-flight request rather than asking the AI twice
+    verdict = pair_flight.do(
+        VerdictCache.make_key(word1, word2),
+        lambda: query_semantic_similarity(word1, word2)
+    )
+    if verdict is None:
+        return False
+    
+    remember_verdict(word1, word2, verdict)
+    return verdict
+
+
+async def are_words_similar_async(word1: str, word2: str, threshold: float = 0.85) -> bool:
+    """
+    Async version of are_words_similar.
+    
+    The tiers before the AI may read SQLite and word tables, so they run in
+    a worker thread, as does storing the AI's verdict.
+    """
+    verdict = await asyncio.to_thread(check_without_ai, word1, word2, threshold)
+    if verdict is not None:
+        return verdict
+    
+    verdict = await pair_flight_async.do(
+        VerdictCache.make_key(word1, word2),
+        lambda: query_semantic_similarity_async(word1, word2)
+    )
+    if verdict is None:
+        return False
+    
+    await asyncio.to_thread(remember_verdict, word1, word2, verdict)
+    return verdict
+
+
+def check_without_ai(word1: str, word2: str, threshold: float = 0.85) -> Optional[bool]:
+    """
+    Decide a pair with every tier before the AI.
+    
+    Returns:
+        The verdict, or None if only the AI can decide the pair
+    """
     # Exact match (case-insensitive)
     if word1.lower() == word2.lower():
         return True
     
-    # Check with AI if available
-    return check_semantic_similarity(word1, word2)
+    # Local match on base forms (plurals, inflections, spelling variants)
+    if check_local_similarity(word1, word2):
+        return True
+    
+    if check_typo_similarity(word1, word2):
+        return True
+    
+    # Word vectors decide both ways when both words are in the embedding table
+    verdict = check_embedding_similarity(word1, word2, threshold)
+    if verdict is not None:
+        return verdict
+    
+    # Check the verdict cache before asking the AI
+    cached = verdict_cache.get(word1, word2)
+    if cached is not None:
+        return cached
+    
+    # The learned classifier answers pairs it is confident about
+    return check_classifier_similarity(word1, word2)
+
+
+def remember_verdict(word1: str, word2: str, verdict: bool) -> None:
+    """Cache an AI verdict for a pair and add it to the classifier's training log."""
+    verdict_cache.put(word1, word2, verdict)
+    pair_classifier.record_verdict(word1, word2, verdict, "pair")
+
+
+def check_local_similarity(word1: str, word2: str) -> Optional[bool]:
+    """
+    Decide a pair locally without any network call.
+    
+    Returns:
+        True if both words share a base form (dog/dogs, ran/run,
+        theater/theatre), or None if the local rules can't decide
+    """
+    if base_form(word1) == base_form(word2):
+        return True
+    return None
+
+
+def check_typo_similarity(word1: str, word2: str) -> Optional[bool]:
+    """
+    Decide a pair with the typo-correction dictionary (no network).
+    
+    Returns:
+        True if both words correct to the same dictionary word
+        (elefant/elephant), or None if no word list is configured or they don't
+    """
+    index = typo_index.get_index()
+    if index is None:
+        return None
+    
+    corrected = corrected_form(index, word1)
+    if corrected is not None and corrected == corrected_form(index, word2):
+        return True
+    return None
+
+
+def corrected_form(index: typo_index.TypoIndex, word: str) -> Optional[str]:
+    """Get the base form of the dictionary word a word corrects to, or None."""
+    corrected = index.correct(word) or index.correct(base_form(word))
+    return base_form(corrected) if corrected is not None else None
+
+
+def check_embedding_similarity(word1: str, word2: str, threshold: float = 0.85) -> Optional[bool]:
+    """
+    Decide a pair with word vectors (no network).
+    
+    Returns:
+        Whether the cosine similarity reaches the threshold, or None if no
+        embedding table is configured or either word is not in it
+    """
+    table = embeddings.get_table()
+    if table is None:
+        return None
+    
+    similarity = table.similarity(word1, word2)
+    if similarity is None:
+        return None
+    return similarity >= threshold
+
+
+def check_classifier_similarity(word1: str, word2: str) -> Optional[bool]:
+    """
+    Decide a pair with the classifier learned from past AI verdicts (no network).
+    
+    Returns:
+        The classifier's verdict, or None if no classifier is configured or
+        it isn't confident about the pair
+    """
+    classifier = pair_classifier.get_classifier()
+    if classifier is None:
+        return None
+    return classifier.classify(word1, word2)
 
 
 def check_semantic_similarity(word1: str, word2: str) -> bool:
@@ -31,46 +442,156 @@ def check_semantic_similarity(word1: str, word2: str) -> bool:
     Use AI to check if words are semantically similar.
     Falls back to False if AI is not available.
     """
-    # Check if OpenAI API key is available
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    if not openai_api_key:
-        return False
+    return query_semantic_similarity(word1, word2) is True
+
+
+def query_semantic_similarity(word1: str, word2: str) -> Optional[bool]:
+    """
+    Ask the configured similarity backend whether two words are similar.
     
-    try:
-        import openai
-        
-        client = openai.OpenAI(api_key=openai_api_key)
-        
-        response = client.chat.completions.create(
-            model="gpt-5-nano-2025-08-07",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a word similarity checker. Determine if two single words are similar enough to be considered the same answer in a word game. Consider:\n- Spelling variations (color/colour, theater/theatre)\n- Plural/singular forms (dog/dogs)\n- Common synonyms (car/automobile, dog/puppy)\n- Different forms of the same word (run/running)\n\nRespond with only 'YES' or 'NO'."
-                },
-                {
-                    "role": "user",
-                    "content": f"Are '{word1}' and '{word2}' similar enough to be considered the same answer? Answer YES or NO only."
-                }
-            ],
-            temperature=0.1,
-            max_tokens=10
-        )
-        
-        answer = response.choices[0].message.content.strip().upper()
-        return answer == "YES"
-    except Exception as e:
-        # If AI check fails, fall back to False
-        print(f"AI similarity check failed: {e}")
-        return False
+    Returns:
+        True/False verdict, or None if the backend is not available or the
+        call failed (so callers can avoid caching a non-answer)
+    """
+    return call_backend("check", word1, word2)
+
+
+async def query_semantic_similarity_async(word1: str, word2: str) -> Optional[bool]:
+    """Async version of query_semantic_similarity."""
+    return await call_backend_async("check_async", word1, word2)
+
+
+def cluster_words_with_ai(words: List[str]) -> Optional[List[List[str]]]:
+    """
+    Ask the configured backend to cluster all distinct answers of a turn at once.
+    
+    Args:
+        words: Distinct lowercase words
+    
+    Returns:
+        List of clusters (each a list of words from the input), or None if the
+        backend is not available, the call failed, or the reply could not be parsed
+    """
+    return call_backend("cluster", words)
+
 
+async def cluster_words_with_ai_async(words: List[str]) -> Optional[List[List[str]]]:
+    """Async version of cluster_words_with_ai."""
+    return await call_backend_async("cluster_async", words)
 
-def group_similar_words(words: Dict[str, str]) -> Dict[str, List[str]]:
+
+def canonicalize_words_with_ai(words: List[str]) -> Optional[Dict[str, str]]:
+    """
+    Ask the configured backend for the canonical answer of each word at once.
+    
+    Returns:
+        Dictionary mapping each word -> canonical answer, or None if the
+        backend is not available, the call failed, or the reply could not be parsed
+    """
+    return call_backend("canonicalize", words)
+
+
+async def canonicalize_words_with_ai_async(words: List[str]) -> Optional[Dict[str, str]]:
+    """Async version of canonicalize_words_with_ai."""
+    return await call_backend_async("canonicalize_async", words)
+
+
+def call_backend(method: str, *args):
+    """
+    Call a method of the configured backend through the circuit breaker and
+    governor, hedging slow calls if SIMILARITY_HEDGE=1. Every request made,
+    hedges included, claims its own governor slot and is recorded in the
+    usage ledger.
+    
+    Returns:
+        The backend's answer, or None if the backend is unavailable, the
+        provider is unhealthy or overloaded, or the call failed
+    """
+    backend = similarity_backends.get_backend()
+    if not backend.available() or not similarity_health.admit():
+        return None
+    
+    def attempt():
+        # Runs with a slot already claimed by admit()
+        start = time.monotonic()
+        result = None
+        try:
+            result = getattr(backend, method)(*args)
+        finally:
+            duration = time.monotonic() - start
+            similarity_health.release(result is not None, duration)
+            usage_ledger.record_call(method, result is not None, duration)
+        return result
+    
+    if hedging.enabled():
+        return hedging.get_hedger(method).run(attempt, admit=similarity_health.admit)
+    return attempt()
+
+
+async def call_backend_async(method: str, *args):
+    """
+    Async version of call_backend. Requests share a SIMILARITY_CALL_TIMEOUT
+    deadline; a request cancelled before it finishes (the loser of a hedge)
+    gives back its slot without counting against the provider.
+    """
+    backend = similarity_backends.get_backend()
+    if not backend.available() or not similarity_health.admit():
+        return None
+    
+    kind = method.removesuffix("_async")
+    deadline = time.monotonic() + similarity_health.call_timeout()
+    
+    async def attempt():
+        # Runs with a slot already claimed by admit()
+        start = time.monotonic()
+        result = None
+        cancelled = False
+        try:
+            result = await asyncio.wait_for(getattr(backend, method)(*args), max(0.0, deadline - start))
+        except asyncio.TimeoutError:
+            print(f"AI similarity call timed out after {similarity_health.call_timeout()}s")
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            duration = time.monotonic() - start
+            if cancelled:
+                similarity_health.abandon()
+            else:
+                similarity_health.release(result is not None, duration)
+            usage_ledger.record_call(kind, result is not None, duration)
+        return result
+    
+    if hedging.enabled():
+        return await hedging.get_hedger(kind).run_async(attempt, admit=similarity_health.admit)
+    return await attempt()
+
+
+def group_similar_words(words: Dict[str, str], threshold: Optional[float] = None,
+                        vocabulary: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
     """
     Group words that are similar enough to be considered matches.
     
+    Identical words and words with the same local base form are merged
+    first, then words correcting to the same dictionary word (if a word list
+    is configured), then words in the turn's prefetched vocabulary are
+    bucketed by its canonical answers, then known words are compared with
+    word vectors if an embedding table is configured. With SIMILARITY_GROUPING=canonical, each
+    remaining word is mapped to a cached canonical answer (unseen words are
+    resolved in one batched request) and bucketed by it. Pairs with a cached
+    verdict (often warmed by warm_answer while players answered) or that the
+    learned classifier is confident about are decided next. Pairs still
+    undecided are sent to the AI in one batched clustering request (unless
+    SIMILARITY_BATCH=0); if that is unavailable or the reply can't be
+    parsed, they are checked pairwise instead. AI calls stop at the turn's SIMILARITY_TURN_BUDGET
+    deadline, and are skipped entirely while the provider is unhealthy or
+    overloaded (see similarity_health), leaving only the local matches.
+    
     Args:
         words: Dictionary mapping player_id -> word
+        threshold: Minimum cosine similarity for an embedding match
+            (defaults to SIMILARITY_THRESHOLD, or 0.85)
+        vocabulary: The turn's prefetched likely answers (see get_vocabulary)
     
     Returns:
         Dictionary mapping canonical_word -> list of player_ids
@@ -78,33 +599,614 @@ def group_similar_words(words: Dict[str, str]) -> Dict[str, List[str]]:
     if not words:
         return {}
     
+    components, decided = resolve_locally(distinct_words(words), threshold, vocabulary)
+    deadline = similarity_health.Deadline()
+    if canonical_grouping_enabled() and provider_usable(deadline):
+        decided.append(merge_canonical_forms(components.roots(), components))
+    
+    pending = merge_cached_verdicts(pending_pairs(components, decided), components)
+    if pending and provider_usable(deadline):
+        if not (batching_enabled() and merge_clusters(pending, components)):
+            if provider_usable(deadline):
+                merge_pairwise(pending, components, deadline)
+    
+    return assemble_groups(words, components)
+
+
+async def group_similar_words_async(words: Dict[str, str], threshold: Optional[float] = None,
+                                    vocabulary: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
+    """Async version of group_similar_words."""
+    if not words:
+        return {}
+    
+    # Tiers that read SQLite, word tables or the verdict log run in worker threads
+    components, decided = await asyncio.to_thread(resolve_locally, distinct_words(words), threshold, vocabulary)
+    deadline = similarity_health.Deadline()
+    if canonical_grouping_enabled() and provider_usable(deadline):
+        decided.append(await merge_canonical_forms_async(components.roots(), components))
+    
+    pending = await asyncio.to_thread(merge_cached_verdicts, pending_pairs(components, decided), components)
+    if pending and provider_usable(deadline):
+        if not (batching_enabled() and await merge_clusters_async(pending, components)):
+            if provider_usable(deadline):
+                await merge_pairwise_async(pending, components, deadline)
+    
+    return assemble_groups(words, components)
+
+
+def group_pairwise(words: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Group words by checking every pair of distinct words (no batching).
+    
+    Returns:
+        Dictionary mapping canonical_word -> list of player_ids
+    """
+    distinct = distinct_words(words)
+    components = UnionFind(distinct)
+    merge_pairwise(unique_pairs(distinct), components)
+    return assemble_groups(words, components)
+
+
+def resolve_locally(distinct: List[str], threshold: Optional[float] = None,
+                    vocabulary: Optional[Dict[str, str]] = None) -> Tuple["UnionFind", List[Set[str]]]:
+    """
+    Merge everything that can be decided without the AI.
+    
+    Returns:
+        Tuple of (merged word sets, sets of words whose pairs are all decided)
+    """
+    if threshold is None:
+        threshold = default_threshold()
+    
+    components = UnionFind(distinct)
+    merge_local_matches(distinct, components)
+    merge_typo_corrections(components.roots(), components)
+    decided = [merge_vocabulary(components.roots(), components, vocabulary or {})]
+    decided.append(merge_embedding_matches(components.roots(), components, threshold))
+    return components, decided
+
+
+def pending_pairs(components: "UnionFind", decided: List[Set[str]]) -> List[Tuple[str, str]]:
+    """Get the pairs of set representatives that no tier has decided yet."""
+    return [
+        (word1, word2)
+        for word1, word2 in unique_pairs(components.roots())
+        if not any(word1 in words and word2 in words for words in decided)
+    ]
+
+
+def merge_cached_verdicts(pairs: List[Tuple[str, str]], components: "UnionFind") -> List[Tuple[str, str]]:
+    """
+    Decide pairs that already have a cached AI verdict, or that the learned
+    classifier is confident about.
+    
+    Returns:
+        The undecided pairs left, as pairs of set representatives
+    """
+    unknown = []
+    for word1, word2 in pairs:
+        verdict = verdict_cache.get(word1, word2)
+        if verdict is None:
+            verdict = check_classifier_similarity(word1, word2)
+        if verdict is None:
+            unknown.append((word1, word2))
+        elif verdict:
+            components.union(word1, word2)
+    
+    # Pairs whose words were merged meanwhile collapse onto their representatives
+    remaining = (tuple(sorted((components.find(a), components.find(b)), key=components.order))
+                 for a, b in unknown)
+    return list(dict.fromkeys(pair for pair in remaining if pair[0] != pair[1]))
+
+
+def provider_usable(deadline: similarity_health.Deadline) -> bool:
+    """
+    Check if a turn may still ask the provider.
+    
+    Returns:
+        False (counting the degradation) if the turn's deadline has passed or
+        the provider is unhealthy, so the turn keeps its local matches only
+    """
+    if deadline.expired():
+        similarity_health.record_degraded("deadline")
+        return False
+    if not similarity_health.healthy():
+        similarity_health.record_degraded("local_only")
+        return False
+    return True
+
+
+def batching_enabled() -> bool:
+    """Check if answers should be clustered in one batched AI request."""
+    return os.getenv("SIMILARITY_BATCH", "1") != "0"
+
+
+def canonical_grouping_enabled() -> bool:
+    """Check if answers should be bucketed by canonical answer keys."""
+    return os.getenv("SIMILARITY_GROUPING", "cluster") == "canonical"
+
+
+def default_threshold() -> float:
+    """Get the cosine similarity threshold for embedding matches."""
+    return float(os.getenv("SIMILARITY_THRESHOLD", "0.85"))
+
+
+def merge_local_matches(words: List[str], components: "UnionFind") -> None:
+    """Merge words that share a local base form (dog/dogs, colour/color)."""
+    merge_by_key({word: base_form(word) for word in words}, components)
+
+
+def merge_typo_corrections(words: List[str], components: "UnionFind") -> None:
+    """Merge words that correct to the same dictionary word (elefant/elephant)."""
+    index = typo_index.get_index()
+    if index is None:
+        return
+    
+    keys = {}
+    for word in words:
+        corrected = corrected_form(index, word)
+        if corrected is not None:
+            keys[word] = corrected
+    merge_by_key(keys, components)
+
+
+def merge_vocabulary(words: List[str], components: "UnionFind", vocabulary: Dict[str, str]) -> Set[str]:
+    """
+    Merge words that share a canonical answer in a prefetched vocabulary.
+    
+    Returns:
+        The words found in the vocabulary (every pair of them is decided)
+    """
+    keys = {}
+    for word in words:
+        key = vocabulary.get(base_form(word))
+        if key is not None:
+            keys[word] = key
+    merge_by_key(keys, components)
+    return set(keys)
+
+
+def merge_canonical_forms(words: List[str], components: "UnionFind") -> Set[str]:
+    """
+    Merge words that share a canonical answer.
+    
+    Canonical answers come from the permanent cache; words not in it are
+    resolved together in one batched request.
+    
+    Returns:
+        The words whose canonical answer is known (every pair of them is decided)
+    """
+    keys, unknown = lookup_canonical_forms(words)
+    if unknown:
+        resolved = canonicalize_words_with_ai(unknown)
+        if resolved is not None:
+            canonical_cache.put_many(resolved)
+            keys.update(lookup_canonical_forms(unknown)[0])
+    
+    merge_by_key(keys, components)
+    return set(keys)
+
+
+async def merge_canonical_forms_async(words: List[str], components: "UnionFind") -> Set[str]:
+    """Async version of merge_canonical_forms; cache reads and writes run in a worker thread."""
+    keys, unknown = await asyncio.to_thread(lookup_canonical_forms, words)
+    if unknown:
+        resolved = await canonicalize_words_with_ai_async(unknown)
+        if resolved is not None:
+            await asyncio.to_thread(canonical_cache.put_many, resolved)
+            keys.update((await asyncio.to_thread(lookup_canonical_forms, unknown))[0])
+    
+    merge_by_key(keys, components)
+    return set(keys)
+
+
+def lookup_canonical_forms(words: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Look words up in the canonical cache.
+    
+    Returns:
+        Tuple of (word -> canonical key for cached words, uncached words)
+    """
+    keys: Dict[str, str] = {}
+    unknown: List[str] = []
+    for word in words:
+        key = canonical_cache.get(word)
+        if key is None:
+            unknown.append(word)
+        else:
+            keys[word] = key
+    return keys, unknown
+
+
+def merge_by_key(keys: Dict[str, str], components: "UnionFind") -> None:
+    """Merge words that map to the same key, in one pass."""
+    first_by_key: Dict[str, str] = {}
+    for word, key in keys.items():
+        if key in first_by_key:
+            components.union(first_by_key[key], word)
+        else:
+            first_by_key[key] = word
+
+
+def merge_embedding_matches(words: List[str], components: "UnionFind", threshold: float) -> Set[str]:
+    """
+    Merge words whose vectors are similar, comparing all known words at once.
+    
+    Returns:
+        The words found in the embedding table (every pair of them is decided)
+    """
+    table = embeddings.get_table()
+    if table is None:
+        return set()
+    
+    known, matches = table.similar_pairs(words, threshold)
+    for word1, word2 in matches:
+        components.union(word1, word2)
+    return set(known)
+
+
+def merge_clusters(pairs: List[Tuple[str, str]], components: "UnionFind") -> bool:
+    """
+    Decide pairs using a single batched clustering request.
+    
+    Returns:
+        True if the clustering reply was usable, False otherwise
+    """
+    clusters = cluster_words_with_ai(words_in_pairs(pairs))
+    if clusters is None:
+        return False
+    
+    merge_cluster_list(clusters, pairs, components)
+    return True
+
+
+async def merge_clusters_async(pairs: List[Tuple[str, str]], components: "UnionFind") -> bool:
+    """Async version of merge_clusters."""
+    clusters = await cluster_words_with_ai_async(words_in_pairs(pairs))
+    if clusters is None:
+        return False
+    
+    # Writes the verdict cache and log
+    await asyncio.to_thread(merge_cluster_list, clusters, pairs, components)
+    return True
+
+
+def merge_cluster_list(clusters: List[List[str]], pairs: List[Tuple[str, str]],
+                       components: "UnionFind") -> None:
+    """
+    Merge clustered words, but only for pairs that were still undecided.
+    
+    Every pair sent is cached with its verdict, so the same answers in a
+    later turn are decided without asking again.
+    """
+    cluster_of = {word: index for index, cluster in enumerate(clusters) for word in cluster}
+    verdicts = []
+    for word1, word2 in pairs:
+        similar = word1 in cluster_of and cluster_of[word1] == cluster_of.get(word2)
+        verdicts.append((word1, word2, similar))
+        pair_classifier.record_verdict(word1, word2, similar, "cluster")
+        if similar:
+            components.union(word1, word2)
+    verdict_cache.put_many(verdicts)
+
+
+def merge_pairwise(pairs: List[Tuple[str, str]], components: "UnionFind",
+                   deadline: Optional[similarity_health.Deadline] = None) -> None:
+    """
+    Decide pairs with one similarity check each.
+    
+    The checks run concurrently on a shared bounded thread pool, and
+    matches are merged with union-find so the result doesn't depend on the
+    order in which checks finish. Checks not finished by the deadline count
+    as no match.
+    """
+    if deadline is None:
+        deadline = similarity_health.Deadline()
+    
+    if len(pairs) == 1:
+        verdicts = [are_words_similar(*pairs[0])]
+    else:
+        futures = [usage_ledger.submit(get_executor(), are_words_similar, *pair) for pair in pairs]
+        done, not_done = wait(futures, timeout=deadline.remaining())
+        for future in not_done:
+            future.cancel()
+        if not_done:
+            similarity_health.record_degraded("deadline")
+        verdicts = [future in done and future.result() for future in futures]
+    
+    for (word1, word2), similar in zip(pairs, verdicts):
+        if similar:
+            components.union(word1, word2)
+
+
+async def merge_pairwise_async(pairs: List[Tuple[str, str]], components: "UnionFind",
+                               deadline: Optional[similarity_health.Deadline] = None) -> None:
+    """
+    Async version of merge_pairwise.
+    
+    Checks run as concurrent tasks, at most SIMILARITY_MAX_WORKERS at a time.
+    """
+    if not pairs:
+        return
+    if deadline is None:
+        deadline = similarity_health.Deadline()
+    semaphore = asyncio.Semaphore(int(os.getenv("SIMILARITY_MAX_WORKERS", "8")))
+    
+    async def check(pair: Tuple[str, str]) -> bool:
+        async with semaphore:
+            return await are_words_similar_async(*pair)
+    
+    tasks = [asyncio.ensure_future(check(pair)) for pair in pairs]
+    done, not_done = await asyncio.wait(tasks, timeout=deadline.remaining())
+    for task in not_done:
+        task.cancel()
+    if not_done:
+        similarity_health.record_degraded("deadline")
+    verdicts = [task in done and task.result() for task in tasks]
+    
+    for (word1, word2), similar in zip(pairs, verdicts):
+        if similar:
+            components.union(word1, word2)
+
+
+def words_in_pairs(pairs: List[Tuple[str, str]]) -> List[str]:
+    """Get the distinct words of a list of pairs, in order of appearance."""
+    return list(dict.fromkeys(word for pair in pairs for word in pair))
+
+
+def unique_pairs(words: List[str]) -> List[Tuple[str, str]]:
+    """Get every unordered pair of distinct words."""
+    return [
+        (words[i], words[j])
+        for i in range(len(words))
+        for j in range(i + 1, len(words))
+    ]
+
+
+class UnionFind:
+    """
+    Disjoint sets over words.
+    
+    The root of each set is always its earliest word (in the order given),
+    so merges are independent of the order in which they are applied.
+    """
+    
+    def __init__(self, items: List[str]):
+        self._order = {item: index for index, item in enumerate(items)}
+        self._parent = {item: item for item in items}
+    
+    def find(self, item: str) -> str:
+        root = item
+        while self._parent[root] != root:
+            root = self._parent[root]
+        # Path compression
+        while self._parent[item] != root:
+            self._parent[item], item = root, self._parent[item]
+        return root
+    
+    def union(self, a: str, b: str) -> None:
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return
+        if self._order[root_b] < self._order[root_a]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+    
+    def order(self, item: str) -> int:
+        """Get the position of an item in the order given."""
+        return self._order[item]
+    
+    def connected(self, a: str, b: str) -> bool:
+        return self.find(a) == self.find(b)
+    
+    def roots(self) -> List[str]:
+        """Get one representative word per set, in the order given."""
+        return [item for item in self._order if self.find(item) == item]
+
+
+def distinct_words(words: Dict[str, str]) -> List[str]:
+    """Get the distinct lowercase words in player order."""
+    return list(dict.fromkeys(word.lower() for word in words.values()))
+
+
+def assemble_groups(words: Dict[str, str], components: UnionFind) -> Dict[str, List[str]]:
+    """
+    Build the canonical_word -> player_ids mapping from merged word sets.
+    
+    The first word seen in each set (in player order) is its canonical word.
+    """
+    canonical_by_root: Dict[str, str] = {}
     groups: Dict[str, List[str]] = {}
-    processed: Set[str] = set()
+    for player_id, word in words.items():
+        root = components.find(word.lower())
+        if root not in canonical_by_root:
+            canonical_by_root[root] = word
+            groups[word] = []
+        groups[canonical_by_root[root]].append(player_id)
     
-    # Create a list of (player_id, word) pairs
-    word_list = list(words.items())
+    return groups
+
+
+def warm_answer(word: str, answered: List[str]) -> Optional[Future]:
+    """
+    Start matching a new answer against the answers already in, in the background.
     
-    for player_id, word in word_list:
-        if player_id in processed:
-            continue
-        
-        # Find or create a group for this word
-        canonical_word = word
-        group_found = False
-        
-        # Check if this word is similar to any existing group
-        for existing_canonical, player_ids in groups.items():
-            if are_words_similar(word, existing_canonical):
-                # Add to existing group
-                groups[existing_canonical].append(player_id)
-                processed.add(player_id)
-                group_found = True
-                break
+    Verdicts land in the verdict cache (canonical answers in the canonical
+    cache with SIMILARITY_GROUPING=canonical), so by the time the last answer
+    arrives, grouping only has to resolve that answer's own pairs. Nothing
+    about the turn itself changes.
+    
+    Off unless SIMILARITY_WARM=1: each answer costs a check per earlier
+    answer, which is more provider calls than the one batched call made at
+    scoring time. Skipped while the provider is unhealthy.
+    
+    Args:
+        word: The new answer
+        answered: The answers submitted before it
+    
+    Returns:
+        The background job, or None if nothing was started
+    """
+    if os.getenv("SIMILARITY_WARM", "0") != "1" or not similarity_health.healthy():
+        return None
+    
+    word = word.lower()
+    others = [other for other in dict.fromkeys(answer.lower() for answer in answered) if other != word]
+    if not others and not canonical_grouping_enabled():
+        return None
+    return usage_ledger.submit(get_warm_executor(), _warm_answer, word, others)
+
+
+def _warm_answer(word: str, others: List[str]) -> None:
+    try:
+        if canonical_grouping_enabled():
+            _, unknown = lookup_canonical_forms([word])
+            resolved = canonicalize_words_with_ai(unknown) if unknown else None
+            if resolved is not None:
+                canonical_cache.put_many(resolved)
+            return
         
-        # If no similar group found, create a new group
-        if not group_found:
-            groups[canonical_word] = [player_id]
-            processed.add(player_id)
+        threshold = default_threshold()
+        for other in others:
+            are_words_similar(word, other, threshold)
+    except Exception as e:
+        print(f"Answer warming failed: {e}")
+
+
+def prefetch_enabled() -> bool:
+    """Check if likely answers should be prefetched when a question is asked."""
+    return os.getenv("SIMILARITY_PREFETCH", "0") == "1"
+
+
+def prefetch_vocabulary(turn_id: str, question: str) -> Optional[Future]:
+    """
+    Start predicting a question's likely answers in the background.
     
-    return groups
+    Players take a while to answer, so the backend is asked for about
+    SIMILARITY_PREFETCH_SIZE (default 40) likely answers with their canonical
+    answers, stored for the turn. At scoring time answers found in it are
+    grouped without asking the AI. Enabled with SIMILARITY_PREFETCH=1 and
+    skipped while the provider is unhealthy.
+    
+    The request bypasses the circuit breaker and governor (see
+    fetch_vocabulary), so a long vocabulary reply can't open the breaker
+    for the turns being scored.
+    
+    Args:
+        turn_id: The turn the question was asked in
+        question: The question text
+    
+    Returns:
+        The background job, or None if nothing was started
+    """
+    if not prefetch_enabled() or not similarity_health.healthy():
+        return None
+    return usage_ledger.submit(get_warm_executor(), _prefetch_vocabulary, turn_id, question)
+
+
+def _prefetch_vocabulary(turn_id: str, question: str) -> None:
+    try:
+        vocabulary = fetch_vocabulary(question, int(os.getenv("SIMILARITY_PREFETCH_SIZE", "40")))
+        if vocabulary is not None:
+            store_vocabulary(turn_id, vocabulary)
+    except Exception as e:
+        print(f"Vocabulary prefetch failed: {e}")
+
+
+def prefetch_timeout() -> float:
+    return float(os.getenv("SIMILARITY_PREFETCH_TIMEOUT", "30"))
 
+
+def fetch_vocabulary(question: str, size: int) -> Optional[Dict[str, str]]:
+    """
+    Ask the backend for a question's likely answers.
+    
+    Unlike call_backend, this doesn't go through the circuit breaker or the
+    governor: nobody waits on the reply and it is much longer than a
+    verdict, so it gets its own SIMILARITY_PREFETCH_TIMEOUT (default 30
+    seconds) and its duration isn't counted as a slow provider call. The
+    call is still recorded in the usage ledger.
+    
+    Returns:
+        The vocabulary (word -> canonical answer), or None if the backend is
+        unavailable or the call failed
+    """
+    backend = similarity_backends.get_backend()
+    if not backend.available():
+        return None
+    
+    start = time.monotonic()
+    result = None
+    try:
+        result = backend.vocabulary(question, size, prefetch_timeout())
+    finally:
+        usage_ledger.record_call("vocabulary", result is not None, time.monotonic() - start)
+    return result
+
+
+_vocabularies: "OrderedDict[str, Dict[str, str]]" = OrderedDict()  # turn_id -> base form -> canonical key
+_vocabulary_lock = threading.Lock()
+
+
+def store_vocabulary(turn_id: str, vocabulary: Dict[str, str]) -> None:
+    """
+    Store a turn's likely answers, keyed by base form so inflections match too.
+    
+    Only the most recent SIMILARITY_PREFETCH_TURNS turns (default 256) are kept.
+    """
+    keys = {base_form(word): base_form(canonical) for word, canonical in vocabulary.items()}
+    with _vocabulary_lock:
+        _vocabularies[turn_id] = keys
+        _vocabularies.move_to_end(turn_id)
+        while len(_vocabularies) > int(os.getenv("SIMILARITY_PREFETCH_TURNS", "256")):
+            _vocabularies.popitem(last=False)
+
+
+def get_vocabulary(turn_id: str) -> Optional[Dict[str, str]]:
+    """Get a turn's prefetched vocabulary (base form -> canonical key), if any."""
+    with _vocabulary_lock:
+        return _vocabularies.get(turn_id)
+
+
+def discard_vocabulary(turn_id: str) -> None:
+    """Forget a turn's prefetched vocabulary once the turn is scored."""
+    with _vocabulary_lock:
+        _vocabularies.pop(turn_id, None)
+
+
+def clear_vocabularies() -> None:
+    with _vocabulary_lock:
+        _vocabularies.clear()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_warm_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool used for concurrent similarity checks."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("SIMILARITY_MAX_WORKERS", "8")),
+                thread_name_prefix="similarity"
+            )
+        return _executor
+
+
+def get_warm_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool for warming answers (SIMILARITY_WARM_WORKERS threads,
+    default 2), kept apart so warming never queues ahead of scoring.
+    """
+    global _warm_executor
+    with _executor_lock:
+        if _warm_executor is None:
+            _warm_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("SIMILARITY_WARM_WORKERS", "2")),
+                thread_name_prefix="similarity-warm"
+            )
+        return _warm_executor
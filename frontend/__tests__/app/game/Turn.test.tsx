@@ -144,6 +144,28 @@ describe('Turn Component', () => {
       expect(screen.getByText(/2 \/ 3 players have answered/i)).toBeInTheDocument()
     })
 
+    it('shows scoring message and hides words while scoring is pending', () => {
+      const pendingTurn = {
+        ...mockTurn,
+        phase: 'scoring_pending',
+        answers: { player1: 'answered', player2: 'answered', player3: 'answered' },
+      }
+
+      render(
+        <Turn
+          turn={pendingTurn}
+          players={mockPlayers}
+          currentPlayerId="player3"
+          previousScores={{}}
+          isCurrentTurn={true}
+        />
+      )
+
+      expect(screen.getByText(/scoring answers/i)).toBeInTheDocument()
+      expect(screen.queryByText('answered')).not.toBeInTheDocument()
+      expect(screen.queryByPlaceholderText(/enter a single word answer/i)).not.toBeInTheDocument()
+    })
+
     it('calls onAnswerSubmit when answer is submitted', async () => {
       const user = userEvent.setup()
       const onAnswerSubmit = jest.fn()
@@ -125,7 +125,8 @@ export default function Turn({
   const answeredCount = turn.answers ? Object.keys(turn.answers).length : 0
   const totalPlayers = players?.length || 0
   const allAnswered = answeredCount === totalPlayers
-  const showAnswers = turn.phase === 'scoring' || turn.is_complete || allAnswered
+  const isScoringPending = turn.phase === 'scoring_pending'
+  const showAnswers = !isScoringPending && (turn.phase === 'scoring' || turn.is_complete || allAnswered)
 
   return (
     <div style={{
@@ -198,6 +199,21 @@ export default function Turn({
         </div>
       )}
 
+      {/* Scoring in progress */}
+      {isScoringPending && (
+        <div style={{
+          textAlign: 'center',
+          color: '#666',
+          fontSize: '14px',
+          padding: '10px',
+          backgroundColor: 'white',
+          borderRadius: '4px',
+          marginBottom: '10px'
+        }}>
+          Scoring answers...
+        </div>
+      )}
+
       {/* Answer input for current player during answer phase */}
       {turn.phase === 'answer' && isCurrentTurn && !hasAnswered && onAnswerSubmit && (
         <div style={{
@@ -6,9 +6,11 @@
 set -e
 
 # Start FastAPI backend in the background
+# More than one worker needs GAME_STORE=shared so workers see the same games
+# (GAME_JOURNAL_DIR is single-worker only and is ignored with more workers)
 echo "Starting FastAPI backend on port 8000..."
 cd /app/backend
-python3 -m uvicorn main:app --host 0.0.0.0 --port 8000 &
+python3 -m uvicorn main:app --host 0.0.0.0 --port 8000 --workers "${BACKEND_WORKERS:-1}" &
 BACKEND_PID=$!
 
 # Wait a moment for backend to start